@@ -0,0 +1,167 @@
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_question(question):
+    """표기만 다른 질문이 같은 키가 되도록 정리 (유니코드 정규화, 소문자, 문장부호/공백 정리)"""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"[?!.,~·…\"'()\[\]]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _identifiers(text):
+    # 숫자·영문 식별자(공고번호, 연도, NCIC 등)는 임베딩이 비슷해도 다르면 다른 질문으로 취급
+    return frozenset(re.findall(r"[0-9a-z][0-9a-z\-]*", text))
+
+
+def get_index_version(db_path):
+    """
+    인덱스가 바뀌었는지 판단하기 위한 버전 문자열.
+    db_maker.py가 실행될 때마다 다시 쓰는 manifest.json을 기준으로 하고, 없으면 Chroma 파일을 봅니다.
+    """
+    for name in ("manifest.json", "chroma.sqlite3"):
+        path = os.path.join(db_path, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            return f"{name}:{stat.st_mtime_ns}:{stat.st_size}"
+    return "missing"
+
+
+class SemanticAnswerCache:
+    """
+    BiddingAgent.get_answer 앞단의 의미 기반 답변 캐시.
+    - 정규화한 질문이 같으면 바로 히트, 아니면 질문 임베딩의 코사인 유사도가 threshold 이상인 항목을 찾음
+    - 유사도가 높아도 질문이 가리키는 대상(영문·숫자 식별자 + scope(question))이 다르면 다른 질문으로 취급
+      (scope: 질문에 나온 공고/사업/기관 집합 등. "A기관 정보시스템 사업 예산"과 "B기관 ..."이 섞이지 않도록)
+    - TTL이 지난 항목은 무시하고, max_entries를 넘으면 가장 오래 안 쓴 항목부터 제거(LRU)
+    - 인덱스 버전이 바뀌면 전체 비움
+    질문은 검색 단계와 같은 원문 그대로 임베딩하므로, 임베딩 캐시를 쓰면 검색이 같은 벡터를 다시 요청하지 않습니다.
+    """
+
+    def __init__(self, embeddings, threshold=0.95, ttl=3600, max_entries=1000, scope=None):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.scope = scope
+
+        self._entries = OrderedDict()  # 정규화 질문 -> {"vector", "target", "answer", "context", "created"}
+        self._matrix = None            # 유사도 계산용 (항목 수 x 차원) 행렬, 항목이 바뀌면 다시 만듦
+        self._keys = []
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize_vector(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _embed(self, question):
+        return self._normalize_vector(self.embeddings.embed_query(question))
+
+    async def _aembed(self, question):
+        return self._normalize_vector(await self.embeddings.aembed_query(question))
+
+    def _target(self, question, normalized):
+        """질문이 가리키는 대상: 이 값이 다르면 임베딩이 비슷해도 다른 질문"""
+        return _identifiers(normalized), (self.scope(question) if self.scope is not None else None)
+
+    def _check_version(self, index_version):
+        if index_version != self._version:
+            self._entries.clear()
+            self._matrix = None
+            self._version = index_version
+
+    def _expire(self):
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _lookup_exact(self, normalized, index_version):
+        """(결과, 임베딩 검색 필요 여부)를 반환"""
+        with self._lock:
+            self._check_version(index_version)
+            self._expire()
+            if not self._entries:
+                return None, False
+
+            # 표기까지 같은 질문이면 임베딩 없이 바로 반환
+            if normalized in self._entries:
+                return self._hit(normalized), False
+        return None, True
+
+    def _lookup_similar(self, normalized, target, vector):
+        # 다르게 표현된 질문이면 임베딩 유사도로 검색
+        with self._lock:
+            if not self._entries:
+                return None
+            if self._matrix is None:
+                self._keys = list(self._entries)
+                self._matrix = np.stack([self._entries[k]["vector"] for k in self._keys])
+            scores = self._matrix @ vector
+            best = int(np.argmax(scores))
+            candidate = self._keys[best]
+            if scores[best] < self.threshold or self._entries[candidate]["target"] != target:
+                return None
+            return self._hit(candidate)
+
+    def _hit(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry["answer"], entry["context"]
+
+    def _put(self, normalized, index_version, target, vector, answer, context):
+        with self._lock:
+            self._check_version(index_version)
+            self._entries[normalized] = {
+                "vector": vector,
+                "target": target,
+                "answer": answer,
+                "context": context,
+                "created": time.time(),
+            }
+            self._entries.move_to_end(normalized)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def lookup(self, question, index_version):
+        normalized = normalize_question(question)
+        result, need_vector = self._lookup_exact(normalized, index_version)
+        if not need_vector:
+            return result
+        # 임베딩 호출은 잠금 밖에서
+        return self._lookup_similar(normalized, self._target(question, normalized), self._embed(question))
+
+    async def alookup(self, question, index_version):
+        normalized = normalize_question(question)
+        result, need_vector = self._lookup_exact(normalized, index_version)
+        if not need_vector:
+            return result
+        return self._lookup_similar(normalized, self._target(question, normalized), await self._aembed(question))
+
+    def store(self, question, index_version, answer, context):
+        normalized = normalize_question(question)
+        target = self._target(question, normalized)
+        self._put(normalized, index_version, target, self._embed(question), answer, context)
+
+    async def astore(self, question, index_version, answer, context):
+        normalized = normalize_question(question)
+        target = self._target(question, normalized)
+        self._put(normalized, index_version, target, await self._aembed(question), answer, context)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
@@ -1,32 +1,41 @@
 import streamlit as st
 import os
-from rag_core import BiddingAgent
+from concurrent.futures import ThreadPoolExecutor
 
 # 페이지 설정
 st.set_page_config(page_title="Bidding Mate", layout="wide")
 st.title("입찰 공고 분석 AI")
 
+# 에이전트 로딩: 무거운 임포트(rag_core, LangChain), DB 열기, 워밍업은 백그라운드 스레드에서 하고 화면은 바로 그림
+@st.cache_resource
+def start_loading_agent():
+    def load():
+        from rag_core import BiddingAgent
+        # 첫 질문이 커넥션 설정/인덱스 로딩을 기다리지 않도록 로딩할 때 워밍업
+        return BiddingAgent(warm_up=True)
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-loader").submit(load)
+
+agent_future = start_loading_agent()
+
+if agent_future.done() and agent_future.exception() is not None:
+    st.error(f"시스템 초기화 오류: {agent_future.exception()}")
+    # 다음 새로고침 때 다시 로딩하도록 실패한 결과는 캐시에서 지움
+    start_loading_agent.clear()
+    st.stop()
+
 # 사이드바
 with st.sidebar:
     st.header("System Info")
-    st.success("System Status: Online")
+    if agent_future.done():
+        st.success("System Status: Online")
+    else:
+        st.warning("System Status: Loading...")
     st.info("Module: LangGraph + OOP Applied")
 
 # 세션 상태 초기화
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-# 에이전트 로딩
-@st.cache_resource
-def load_agent():
-    return BiddingAgent()
-
-try:
-    agent = load_agent()
-except Exception as e:
-    st.error(f"시스템 초기화 오류: {e}")
-    st.stop()
-
 # 대화 히스토리 출력 루프
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
@@ -56,34 +65,52 @@ if prompt := st.chat_input("궁금한 점을 물어보세요..."):
 
     # 2. 어시스턴트 답변 생성 및 화면 표시
     with st.chat_message("assistant"):
-        with st.spinner("분석 중..."):
-            try:
-                # 에이전트에게 질문하여 답변과 문서 리스트를 받아옴
-                answer, docs = agent.get_answer(prompt)
-                
-                # 답변 텍스트 먼저 출력
-                st.markdown(answer)
-                
-                # docs가 존재할 때만(라우터가 yes일 때만) expander 생성
-                if docs and len(docs) > 0:
-                    with st.expander("📚 참고 문서 보기"):
-                        for i, doc in enumerate(docs):
-                            # 딕셔너리에서 데이터 추출
-                            full_path = doc.get('source', '파일 경로 없음')
-                            content = doc.get('content', '내용 없음')
-                            file_name = os.path.basename(full_path)
-                            
-                            # 제목 출력 (아이콘 + 파일명)
-                            st.markdown(f"**📄 {i+1}. {file_name}**")
-                            # 내용 출력
-                            st.text(content[:500] + "...")
-                            st.divider()
+        try:
+            # 아직 백그라운드 로딩 중이면 끝날 때까지 기다림 (로딩 오류는 아래 except에서 표시)
+            if not agent_future.done():
+                with st.spinner("시스템 준비 중..."):
+                    agent_future.result()
+            agent = agent_future.result()
+
+            # 에이전트가 답변 토큰(str)을 생성되는 대로 보내고, 마지막에 참고 문서 리스트(list)를 보냄
+            docs = []
+            stream = agent.stream_answer(prompt)
+
+            def token_stream(first_token):
+                yield first_token
+                for item in stream:
+                    if isinstance(item, list):
+                        docs.extend(item)
+                    else:
+                        yield item
+
+            # 첫 토큰이 나올 때까지(의도 파악, 검색, 채점)만 스피너 표시
+            with st.spinner("분석 중..."):
+                first_token = next(stream)
+
+            # 답변 텍스트를 토큰 단위로 바로바로 출력
+            answer = st.write_stream(token_stream(first_token))
+            
+            # docs가 존재할 때만(라우터가 yes일 때만) expander 생성
+            if docs and len(docs) > 0:
+                with st.expander("📚 참고 문서 보기"):
+                    for i, doc in enumerate(docs):
+                        # 딕셔너리에서 데이터 추출
+                        full_path = doc.get('source', '파일 경로 없음')
+                        content = doc.get('content', '내용 없음')
+                        file_name = os.path.basename(full_path)
+                        
+                        # 제목 출력 (아이콘 + 파일명)
+                        st.markdown(f"**📄 {i+1}. {file_name}**")
+                        # 내용 출력
+                        st.text(content[:500] + "...")
+                        st.divider()
 
-                # 3. 세션 상태에 답변과 문서를 함께 저장
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": answer, 
-                    "docs": docs
-                })
-            except Exception as e:
-                st.error(f"오류 발생: {e}")
\ No newline at end of file
+            # 3. 세션 상태에 답변과 문서를 함께 저장
+            st.session_state.messages.append({
+                "role": "assistant", 
+                "content": answer, 
+                "docs": docs
+            })
+        except Exception as e:
+            st.error(f"오류 발생: {e}")
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+clean_text 마이크로 벤치마크 + 기존 구현과의 결과 비교 (OpenAI 호출 없음).
+
+db_maker.py에 있던 정규식 버전(legacy_clean_text)과 text_normalizer.clean_text를
+- 일반 문장 / 공백 없이 붙은 표 셀 / 반복되는 양식 필드 / 긴 숫자열 등 페이지 유형별로 시간을 재고
+- 같은 페이지들과 무작위로 만든 문자열(--fuzz개)에서 결과가 한 글자라도 다르면 실패(종료 코드 1)로 처리합니다.
+
+실행 예 (프로젝트 루트에서):
+    python -m benchmarks.bench_clean_text --page-chars 5000 --output bench_clean_text.json
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+from benchmarks.common import summarize, WORDS
+from text_normalizer import clean_text
+
+
+def legacy_clean_text(text):
+    """db_maker.py의 예전 clean_text (비교 기준, 수정하지 말 것)"""
+    if not text: return ""
+    text = text.replace('\r\n', '\n').replace('\t', ' ')
+    text = re.sub(r'[\.\-\=_]{3,}', '', text)
+    text = re.sub(r'(\b\w+\b)( \1){2,}', r'\1', text)
+    text = re.sub(r'(\w{2,})(\1){2,}', r'\1', text)
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'\n+', '\n\n', text)
+    return text.strip()
+
+
+def _fit(text, chars):
+    return (text * (chars // max(len(text), 1) + 1))[:chars]
+
+
+def make_pages(chars, rng):
+    """페이지 유형별 텍스트 (각각 대략 chars자)"""
+    sentence = lambda: " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 15))) + ".\n"
+    return {
+        # 일반 본문: 짧은 단어, 띄어쓰기
+        "normal": _fit("".join(sentence() for _ in range(200)), chars),
+        # 표 셀이 공백 없이 붙어서 추출된 경우 (거의 반복되지만 숫자가 계속 바뀜)
+        "joined_table_cells": "".join(f"항목{i}금액{i * 1370 % 9973}원" for i in range(chars))[:chars],
+        # 같은 양식 필드가 붙어서 반복
+        "form_fields": _fit("성명성명성명생년월일주소주소주소연락처" + "□" * 5 + "\t", chars),
+        # 긴 숫자열 (계좌/일련번호 등이 이어진 경우)
+        "digits": "".join(rng.choice("0123456789") for _ in range(chars)),
+        # 글자 몇 개로만 된 긴 단어 (기존 정규식이 가장 느린 경우)
+        "small_alphabet_run": "".join(rng.choice("가나다라") for _ in range(chars)),
+        # 같은 셀 값이 띄어쓰기로 반복 (단어 반복 패턴 대상)
+        "repeated_cells": _fit("합계 합계 합계 소계 소계 소계 금액 ", chars),
+        # 구분선/빈 줄이 많은 양식
+        "separators": _fit("제출서류 ---------- 확인 ====== ____\n\n\n", chars),
+    }
+
+
+def fuzz_cases(count, rng):
+    """짧은 반복 단위, 공백, 밑줄/숫자가 섞인 무작위 문자열 (긴 단어 처리 경로도 타도록 일부는 길게)"""
+    alphabets = ["ab", "abc", "aab", "가나", "가나다", "a1_", "0", "ab ", "가 나\n"]
+    for _ in range(count):
+        alphabet = rng.choice(alphabets)
+        length = rng.choice([rng.randint(0, 40), rng.randint(60, 400)])
+        text = "".join(rng.choice(alphabet) for _ in range(length))
+        for _ in range(rng.randint(0, 3)):
+            unit = "".join(rng.choice(alphabet.strip() or "a") for _ in range(rng.randint(1, 6)))
+            at = rng.randint(0, len(text))
+            joiner = rng.choice(["", " "])
+            text = text[:at] + joiner.join([unit] * rng.randint(2, 12)) + text[at:]
+        yield text
+
+
+def measure(func, text, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func(text)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="clean_text 정규식 버전 vs text_normalizer 비교")
+    parser.add_argument("--page-chars", type=int, default=5000, help="페이지당 글자 수")
+    parser.add_argument("--iterations", type=int, default=5, help="페이지 유형별 측정 횟수")
+    parser.add_argument("--fuzz", type=int, default=20000, help="결과 비교용 무작위 문자열 개수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON 리포트 저장 경로 (기본: 표준 출력만)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = make_pages(args.page_chars, rng)
+
+    mismatches = []
+    for name, text in pages.items():
+        if clean_text(text) != legacy_clean_text(text):
+            mismatches.append(name)
+    for text in fuzz_cases(args.fuzz, rng):
+        if clean_text(text) != legacy_clean_text(text):
+            mismatches.append(text)
+
+    timings = {}
+    for name, text in pages.items():
+        legacy = measure(legacy_clean_text, text, args.iterations)
+        current = measure(clean_text, text, args.iterations)
+        timings[name] = {
+            "legacy": legacy,
+            "text_normalizer": current,
+            "speedup_p50": round(legacy["p50_ms"] / max(current["p50_ms"], 1e-6), 2),
+        }
+
+    report = {
+        "config": {"page_chars": args.page_chars, "iterations": args.iterations, "fuzz": args.fuzz, "seed": args.seed},
+        "equivalence": {"checked": len(pages) + args.fuzz, "mismatches": len(mismatches), "examples": mismatches[:5]},
+        "pages": timings,
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    if mismatches:
+        print(f"결과가 다른 입력 {len(mismatches)}개", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+BiddingAgent 노드별 지연시간 벤치마크 (OpenAI 호출 없음).
+
+합성 Chroma 인덱스를 만들고 ChatOpenAI / OpenAIEmbeddings를 결정적인 가짜 모델로 바꿔서
+router, retrieve, grade, generate, (선택) rerank, _format_docs, get_answer(전체)의 p50/p95/p99를 JSON으로 출력합니다.
+가짜 모델의 지연은 옵션으로 조절하며, 0으로 두면 순수 로컬 오버헤드(MMR, 포맷팅, 그래프 디스패치)만 측정됩니다.
+
+실행 예 (프로젝트 루트에서):
+    python -m benchmarks.bench_pipeline --chunks 100000 --iterations 50 --output bench_pipeline.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from langchain_chroma import Chroma
+
+from benchmarks.common import WORDS, summarize
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from lexical_index import build_from_collection, LEXICAL_INDEX_FILE
+from vector_index import build_vector_index, VECTOR_INDEX_DIR
+from rag_core import BiddingAgent
+
+def build_index(db_path, num_chunks, dim, batch_size=5000, seed=0):
+    """합성 청크 num_chunks개로 Chroma 인덱스 생성 (이미 같은 크기로 만들어져 있으면 재사용)"""
+    vectordb = Chroma(persist_directory=db_path, embedding_function=FakeEmbeddings(size=dim))
+    lexical_path = os.path.join(db_path, LEXICAL_INDEX_FILE)
+    vector_path = os.path.join(db_path, VECTOR_INDEX_DIR)
+    if vectordb._collection.count() == num_chunks and os.path.exists(lexical_path) and os.path.exists(vector_path):
+        print(f" -> 기존 합성 인덱스 재사용: {db_path} ({num_chunks}개 청크)", file=sys.stderr)
+        return
+
+    rng = np.random.default_rng(seed)
+    num_projects = max(1, num_chunks // 200)
+    started = time.time()
+    for start in range(0, num_chunks, batch_size):
+        n = min(batch_size, num_chunks - start)
+        vectors = rng.standard_normal((n, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        texts, metadatas = [], []
+        for i in range(start, start + n):
+            project = i % num_projects
+            words = rng.choice(WORDS, size=120)
+            texts.append(" ".join(words)[:500])
+            metadatas.append({
+                "source": f"synthetic_{project}.pdf",
+                "project_name": f"합성 사업 {project}",
+                "notice_no": f"2025{project:07d}",
+                "budget": str(100_000_000 + project),
+                "agency": f"기관 {project % 50}",
+            })
+        vectordb._collection.upsert(
+            ids=[f"synthetic-{i}" for i in range(start, start + n)],
+            embeddings=vectors.tolist(),
+            documents=texts,
+            metadatas=metadatas,
+        )
+        print(f"   [{start + n}/{num_chunks}] 합성 청크 저장 ({time.time() - started:.1f}초)", file=sys.stderr)
+
+    # db_maker.py와 같이 하이브리드 검색용 키워드 인덱스와 mmap 벡터 인덱스도 생성
+    build_from_collection(vectordb._collection).save(lexical_path)
+    build_vector_index(vectordb._collection, db_path)
+
+
+def measure(func, inputs, iterations, warmup=1):
+    for value in inputs[:warmup]:
+        func(value)
+    samples = []
+    for i in range(iterations):
+        value = inputs[i % len(inputs)]
+        started = time.perf_counter()
+        func(value)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def load_questions(path="test_data.json"):
+    with open(path, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+    if isinstance(raw_data, dict):
+        return raw_data["question"]
+    return [item["question"] for item in raw_data]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BiddingAgent 노드별 지연시간 벤치마크 (가짜 LLM/임베딩 사용)")
+    parser.add_argument("--chunks", type=int, default=5000, help="합성 인덱스 청크 수")
+    parser.add_argument("--dim", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--iterations", type=int, default=30, help="노드별 측정 횟수")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="가짜 LLM 응답 지연(초)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="가짜 LLM 토큰당 지연(초)")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="가짜 임베딩 요청 지연(초)")
+    parser.add_argument("--vector-backend", choices=["chroma", "mmap"], default="chroma", help="검색 백엔드")
+    parser.add_argument("--final-k", type=int, default=8, help="채점/생성 모델에 넘기는 최종 청크 수")
+    parser.add_argument("--rerank", choices=["llm", "listwise", "lexical"], default=None, help="리랭크 방식 (기본: 사용 안 함)")
+    parser.add_argument("--db-path", default=None, help="합성 인덱스 경로 (기본: 청크 수별 임시 폴더)")
+    parser.add_argument("--output", default=None, help="JSON 리포트 저장 경로 (기본: 표준 출력만)")
+    args = parser.parse_args()
+
+    db_path = args.db_path or os.path.join(tempfile.gettempdir(), f"bidding_bench_{args.chunks}_{args.dim}")
+    build_index(db_path, args.chunks, args.dim)
+
+    llm = FakeChatModel(latency=args.llm_latency, token_latency=args.token_latency)
+    agent = BiddingAgent(
+        db_path=db_path,
+        csv_path=os.path.join(db_path, "no_metadata.csv"),
+        embedding_cache_dir=None,
+        answer_cache=False,
+        llm_heavy=llm,
+        llm_light=llm,
+        embeddings=FakeEmbeddings(size=args.dim, latency=args.embed_latency),
+        trace_path=None,
+        log_level="WARNING",
+        vector_backend=args.vector_backend,
+        final_k=args.final_k,
+        rerank=args.rerank,
+    )
+
+    questions = load_questions()
+    states = [{"question": q} for q in questions]
+    # 노드는 비동기 구현 하나뿐이므로 get_answer와 같은 전용 이벤트 루프에서 실행해 측정
+    node = lambda afunc: (lambda value: agent._run(afunc(value)))
+    retrieved = [{"question": q, **node(agent._aretrieve)({"question": q})} for q in questions[:5]]
+
+    nodes = {
+        "router": measure(node(agent._aroute_question), states, args.iterations),
+        "router_llm": measure(node(agent._allm_route), questions, args.iterations),
+        "retrieve": measure(node(agent._aretrieve), states, args.iterations),
+        "grade": measure(node(agent._agrade_documents), retrieved, args.iterations),
+        "generate": measure(node(agent._agenerate), retrieved, args.iterations),
+        **({"rerank": measure(node(agent._arerank_documents), retrieved, args.iterations)} if args.rerank else {}),
+        "format_docs": measure(lambda state: agent._format_docs(state["context"]), retrieved, args.iterations),
+        "get_answer": measure(agent.get_answer, questions, args.iterations),
+    }
+
+    # 생성 모델에 들어가는 컨텍스트 크기 (final_k를 줄이면 heavy 모델 입력이 얼마나 줄어드는지)
+    context_texts = [agent._context_text(state["context"]) for state in retrieved]
+    context = {
+        "docs_mean": round(float(np.mean([len(state["context"]) for state in retrieved])), 2),
+        "chars_mean": round(float(np.mean([len(text) for text in context_texts])), 1),
+        "tokens_mean": round(float(np.mean([agent.context_packer.count_tokens(text) for text in context_texts])), 1)
+        if agent.context_packer else None,
+    }
+
+    report = {
+        "config": {
+            "chunks": args.chunks,
+            "dim": args.dim,
+            "iterations": args.iterations,
+            "llm_latency": args.llm_latency,
+            "token_latency": args.token_latency,
+            "embed_latency": args.embed_latency,
+            "vector_backend": agent.vector_backend,
+            "rerank": args.rerank,
+            "retriever": agent.get_config()["search_kwargs"],
+            "final_k": agent.final_k,
+        },
+        "context": context,
+        "nodes": nodes,
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+mmap 벡터 인덱스 양자화(float32 / float16 / int8) 비교 벤치마크 (OpenAI 호출 없음).
+
+형식별 상주 메모리, float32 정확 검색 대비 recall@k(재채점 전/후), MMR 검색 지연을 JSON으로 출력합니다.
+--db-path에 db_maker.py로 만든 실제 DB를 주면 그 인덱스로 측정하고(--real-embeddings 시 OpenAI로 질문 임베딩),
+없으면 bench_pipeline과 같은 합성 인덱스를 만들어 씁니다.
+
+실행 예 (프로젝트 루트에서):
+    python -m benchmarks.bench_quantization --chunks 100000 --output bench_quantization.json
+"""
+import os
+import json
+import time
+import tempfile
+import argparse
+
+import numpy as np
+
+from benchmarks.bench_pipeline import build_index, load_questions
+from benchmarks.common import summarize
+from benchmarks.fakes import FakeEmbeddings
+from vector_index import MmapVectorIndex, QUANTIZATIONS, quantization_report
+
+
+def measure_mmr(index, query_vectors, k, fetch_k, lambda_mult):
+    samples = []
+    for vector in query_vectors:
+        started = time.perf_counter()
+        index.mmr(vector, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mmap 벡터 인덱스 양자화 메모리/recall/지연 비교")
+    parser.add_argument("--chunks", type=int, default=20000, help="합성 인덱스 청크 수")
+    parser.add_argument("--dim", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--fetch-k", type=int, default=50, help="재채점할 후보 수")
+    parser.add_argument("--db-path", default=None, help="측정할 DB 경로 (기본: 합성 인덱스)")
+    parser.add_argument("--real-embeddings", action="store_true", help="질문 임베딩에 OpenAI 사용 (실제 DB용)")
+    parser.add_argument("--output", default=None, help="JSON 리포트 저장 경로 (기본: 표준 출력만)")
+    args = parser.parse_args()
+
+    db_path = args.db_path
+    if db_path is None:
+        db_path = os.path.join(tempfile.gettempdir(), f"bidding_bench_{args.chunks}_{args.dim}")
+        build_index(db_path, args.chunks, args.dim)
+
+    questions = load_questions()
+    if args.real_embeddings:
+        from langchain_openai import OpenAIEmbeddings
+        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+    else:
+        embeddings = FakeEmbeddings(size=MmapVectorIndex.from_db(db_path).vectors.shape[1])
+    query_vectors = np.asarray(embeddings.embed_documents(questions), dtype=np.float32)
+
+    report = {
+        "config": {"db_path": db_path, "questions": len(questions), "k": args.k, "fetch_k": args.fetch_k},
+        "quality": quantization_report(db_path, query_vectors, k=args.k, rescore_k=args.fetch_k),
+        "mmr_latency": {
+            quantization or "float32": measure_mmr(
+                MmapVectorIndex.from_db(db_path, quantization, rescore_k=args.fetch_k),
+                query_vectors, args.k, args.fetch_k, 0.85,
+            )
+            for quantization in QUANTIZATIONS
+        },
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
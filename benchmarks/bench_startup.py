@@ -0,0 +1,138 @@
+"""
+콜드 스타트 벤치마크 (OpenAI 호출 없음).
+
+매번 새 파이썬 프로세스를 띄워서
+- 무거운 모듈(rag_core, langchain_openai, langchain_chroma, langgraph, ragas, streamlit 등)의 임포트 시간
+- rag_core 임포트 -> BiddingAgent 생성(DB 열기, 인덱스 로딩, 그래프 컴파일) -> 첫 답변 -> 두 번째 답변 단계별 시간
+을 재고 p50/p95/p99를 JSON으로 출력합니다. 모델은 bench_pipeline과 같은 가짜 LLM/임베딩을 씁니다.
+
+실행 예 (프로젝트 루트에서):
+    python -m benchmarks.bench_startup --runs 5 --output bench_startup.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+IMPORT_MODULES = [
+    "rag_core", "langchain_openai", "langchain_chroma", "chromadb", "langgraph.graph",
+    "server", "streamlit", "ragas", "datasets",
+]
+
+QUESTIONS = ["사업 예산과 평가 기준을 알려줘", "제안서 제출 기간은 언제야?"]
+
+
+def _run_child(args):
+    """새 프로세스에서 측정하고 마지막 줄의 JSON을 돌려받음 (다른 모듈 출력이 섞여도 무시)"""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", *args],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def child_import(module):
+    started = time.perf_counter()
+    __import__(module)
+    print(json.dumps({"seconds": time.perf_counter() - started}))
+
+
+def child_init(db_path, dim, vector_backend):
+    timings = {}
+    started = time.perf_counter()
+    import rag_core
+    timings["import_rag_core"] = time.perf_counter() - started
+
+    from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+    llm = FakeChatModel()
+    started = time.perf_counter()
+    agent = rag_core.BiddingAgent(
+        db_path=db_path,
+        csv_path=os.path.join(db_path, "no_metadata.csv"),
+        embedding_cache_dir=None,
+        answer_cache=False,
+        llm_heavy=llm,
+        llm_light=llm,
+        embeddings=FakeEmbeddings(size=dim),
+        trace_path=None,
+        log_level="WARNING",
+        vector_backend=vector_backend,
+    )
+    timings["agent_init"] = time.perf_counter() - started
+
+    # 생성자 안에서 한 번 하는 그래프 컴파일만 따로 (agent_init에 포함된 비용)
+    started = time.perf_counter()
+    agent._build_graph()
+    timings["graph_compile"] = time.perf_counter() - started
+
+    for name, question in zip(("first_answer", "second_answer"), QUESTIONS):
+        started = time.perf_counter()
+        agent.get_answer(question)
+        timings[name] = time.perf_counter() - started
+    print(json.dumps(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임포트/초기화(콜드 스타트) 시간 벤치마크")
+    parser.add_argument("--runs", type=int, default=5, help="측정마다 새 프로세스를 띄우는 횟수")
+    parser.add_argument("--chunks", type=int, default=5000, help="합성 인덱스 청크 수")
+    parser.add_argument("--dim", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--vector-backend", choices=["chroma", "mmap"], default="chroma", help="검색 백엔드")
+    parser.add_argument("--modules", nargs="*", default=IMPORT_MODULES, help="임포트 시간을 잴 모듈")
+    parser.add_argument("--db-path", default=None, help="합성 인덱스 경로 (기본: 청크 수별 임시 폴더)")
+    parser.add_argument("--output", default=None, help="JSON 리포트 저장 경로 (기본: 표준 출력만)")
+    parser.add_argument("--child-import", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-init", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_import:
+        return child_import(args.child_import)
+    db_path = args.db_path or os.path.join(tempfile.gettempdir(), f"bidding_bench_{args.chunks}_{args.dim}")
+    if args.child_init:
+        return child_init(db_path, args.dim, args.vector_backend)
+
+    # 측정용 자식 프로세스가 rag_core 등을 미리 임포트하지 않도록 여기서 임포트
+    from benchmarks.bench_pipeline import build_index
+    from benchmarks.common import summarize
+
+    build_index(db_path, args.chunks, args.dim)
+
+    imports = {}
+    for module in args.modules:
+        try:
+            samples = [_run_child(["--child-import", module])["seconds"] for _ in range(args.runs)]
+        except subprocess.CalledProcessError:
+            print(f" -> {module} 임포트 실패 (설치되지 않음), 건너뜀", file=sys.stderr)
+            continue
+        imports[module] = summarize(samples)
+
+    child_args = [
+        "--child-init", "--db-path", db_path, "--dim", str(args.dim), "--vector-backend", args.vector_backend,
+    ]
+    runs = [_run_child(child_args) for _ in range(args.runs)]
+    init = {phase: summarize([run[phase] for run in runs]) for phase in runs[0]}
+
+    report = {
+        "config": {
+            "runs": args.runs,
+            "chunks": args.chunks,
+            "dim": args.dim,
+            "vector_backend": args.vector_backend,
+            "python": sys.version.split()[0],
+        },
+        "imports": imports,
+        "init": init,
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
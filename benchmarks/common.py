@@ -0,0 +1,21 @@
+"""벤치마크 공용 도구 (rag_core/Chroma/LangGraph를 임포트하지 않으므로 어느 벤치마크에서나 가볍게 사용)"""
+import numpy as np
+
+# 합성 청크/문장에 쓰는 공고문 단어
+WORDS = [
+    "사업", "예산", "공고", "입찰", "제안서", "평가", "배점", "기술", "가격", "시스템", "구축", "고도화",
+    "유지보수", "운영", "기간", "계약", "자격", "공동수급", "요구사항", "보안", "데이터", "클라우드",
+    "인프라", "사용자", "관리", "기능", "개선", "통합", "연계", "서비스", "교육", "산출물", "검수",
+]
+
+
+def summarize(samples):
+    """초 단위 측정값 -> 평균/p50/p95/p99 (ms)"""
+    values = np.asarray(samples) * 1000
+    return {
+        "n": len(values),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
@@ -0,0 +1,106 @@
+import time
+import asyncio
+import hashlib
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    ChatOpenAI 대신 쓰는 결정적인 가짜 LLM.
+    프롬프트 종류(라우터/채점/생성)를 보고 항상 같은 답을 주며, 응답 지연(latency)과 토큰당 지연(token_latency)을 흉내 냅니다.
+    """
+
+    model_name: str = "fake-chat"
+    latency: float = 0.0
+    token_latency: float = 0.0
+    answer_tokens: int = 200
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _reply(self, messages):
+        prompt = messages[-1].content
+        if "분류:" in prompt:
+            return "bid"
+        if "yes 또는 no" in prompt:
+            return "yes"
+        # 생성 프롬프트: 문맥 길이와 무관하게 같은 길이의 답변
+        return " ".join(f"토큰{i}" for i in range(self.answer_tokens))
+
+    def _tokens(self, text):
+        words = text.split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    def _result(self, messages):
+        prompt = messages[-1].content
+        text = self._reply(messages)
+        usage = {"input_tokens": len(prompt), "output_tokens": len(text.split(" ")), "total_tokens": len(prompt) + len(text.split(" "))}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._reply(messages)
+        time.sleep(self.latency + self.token_latency * len(text.split(" ")))
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._reply(messages)
+        await asyncio.sleep(self.latency + self.token_latency * len(text.split(" ")))
+        return self._result(messages)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        for token in self._tokens(self._reply(messages)):
+            time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for token in self._tokens(self._reply(messages)):
+            await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    OpenAIEmbeddings 대신 쓰는 결정적인 가짜 임베딩.
+    텍스트 해시를 시드로 한 정규화 벡터를 돌려주고, 요청 1번당 지연(latency)을 흉내 냅니다.
+    """
+
+    def __init__(self, size=1536, latency=0.0):
+        self.size = size
+        self.latency = latency
+        self.model = f"fake-embedding-{size}"
+
+    def vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.size).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self.vector(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self.vector(text).tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency)
+        return [self.vector(text).tolist() for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self.vector(text).tolist()
@@ -0,0 +1,120 @@
+from typing import Any, Dict, List
+
+# 생성 모델(gpt-5) 프롬프트에 넣을 참고문서 최대 토큰 수 기본값
+DEFAULT_CONTEXT_TOKENS = 6000
+
+
+def _load_token_counter():
+    """gpt-5 계열과 같은 o200k_base로 토큰 수를 셈. 인코딩 파일을 받을 수 없으면 글자 수(한글은 대략 토큰 수와 비슷)로 대신"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return len
+
+
+def _merge_text(left, right, max_overlap, min_overlap=20):
+    """left 끝과 right 앞이 min_overlap자 이상 겹치면(청크 오버랩) 겹친 부분을 한 번만 남기고 이어 붙임. 안 겹치면 None"""
+    for size in range(min(max_overlap, len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    if right in left:
+        return left
+    return None
+
+
+class ContextPacker:
+    """
+    검색된 청크를 생성 프롬프트용 텍스트로 압축.
+    - 같은 공고(source)끼리 모으고, 같은 페이지에서 이어지거나 겹치는 청크(chunk_overlap)는 하나로 합침
+    - 공고번호/사업명/발주기관/예산 머리말은 공고마다 한 번만 출력
+    - 검색 순위가 높은 구간부터 max_tokens(토큰 예산) 안에 들어가는 만큼만 담음
+    """
+
+    def __init__(self, max_tokens=DEFAULT_CONTEXT_TOKENS, max_overlap=150):
+        self.max_tokens = max_tokens
+        self.max_overlap = max_overlap
+        self.count_tokens = _load_token_counter()
+
+    def _segments(self, docs):
+        """청크 -> 합쳐진 구간 리스트. 구간 = {"source", "rank"(가장 높은 순위), "page", "start", "text"}"""
+        by_page = {}
+        for rank, doc in enumerate(docs):
+            key = (doc.get("source", "출처 미상"), doc.get("page"))
+            by_page.setdefault(key, []).append((rank, doc))
+
+        segments = []
+        for (source, page), items in by_page.items():
+            # 위치 정보(start_index)가 있으면 문서 순서대로 정렬해서 인접/겹침 여부를 판단
+            items.sort(key=lambda item: (item[1].get("start_index") is None, item[1].get("start_index") or 0, item[0]))
+            current = None
+            for rank, doc in items:
+                text = doc.get("content", "")
+                start = doc.get("start_index")
+                if current is not None:
+                    merged = None
+                    if start is not None and current["end"] is not None and start <= current["end"]:
+                        merged = current["text"] + text[current["end"] - start:]
+                    elif start is None or current["end"] is None or start <= current["end"] + 1:
+                        merged = _merge_text(current["text"], text, self.max_overlap)
+                    if merged is not None:
+                        current["text"] = merged
+                        current["rank"] = min(current["rank"], rank)
+                        if start is not None and current["end"] is not None:
+                            current["end"] = max(current["end"], start + len(text))
+                        continue
+                current = {
+                    "source": source, "rank": rank, "page": page, "start": start or 0, "text": text,
+                    "end": start + len(text) if start is not None else None,
+                }
+                segments.append(current)
+        return segments
+
+    @staticmethod
+    def _header(number, doc):
+        return (
+            f"[참고문서 {number}]\n"
+            f"- 공고번호: {doc.get('notice_no', '정보없음')}\n"
+            f"- 사업명: {doc.get('project_name', '정보없음')}\n"
+            f"- 발주기관: {doc.get('agency', '정보없음')}\n"
+            f"- 확정예산(CSV): {doc.get('budget', '정보없음')}\n"
+            f"내용:"
+        )
+
+    def pack(self, docs: List[Dict[str, Any]]):
+        """(프롬프트용 텍스트, 토큰 수, 담긴 구간 수)를 반환"""
+        if not docs:
+            return "", 0, 0
+
+        first_doc = {}
+        for doc in docs:
+            first_doc.setdefault(doc.get("source", "출처 미상"), doc)
+        source_rank = {source: rank for rank, source in enumerate(first_doc)}
+
+        # 순위가 높은 구간부터 예산 안에 담기 (공고 머리말은 그 공고의 첫 구간을 담을 때 한 번만 계산)
+        chosen = []
+        used_tokens = 0
+        opened = set()
+        for segment in sorted(self._segments(docs), key=lambda segment: segment["rank"]):
+            cost = self.count_tokens(segment["text"]) + 1
+            if segment["source"] not in opened:
+                cost += self.count_tokens(self._header(len(opened) + 1, first_doc[segment["source"]])) + 2
+            if self.max_tokens and used_tokens + cost > self.max_tokens:
+                continue
+            used_tokens += cost
+            opened.add(segment["source"])
+            chosen.append(segment)
+
+        # 공고는 검색 순위대로, 공고 안에서는 문서 순서(페이지, 위치)대로 출력
+        chosen.sort(key=lambda segment: (source_rank[segment["source"]], segment["page"] or 0, segment["start"]))
+        blocks = []
+        current_source = None
+        for segment in chosen:
+            if segment["source"] != current_source:
+                current_source = segment["source"]
+                blocks.append([self._header(len(blocks) + 1, first_doc[current_source])])
+            blocks[-1].append(segment["text"])
+
+        text = "\n\n".join("\n".join(block) for block in blocks)
+        return text, self.count_tokens(text), len(chosen)
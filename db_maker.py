@@ -1,13 +1,23 @@
 import os
-import re
+import json
+import hashlib
 import shutil
+import time
+import signal
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
 import pandas as pd
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PDFPlumberLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
-from pdfminer.pdfparser import PDFSyntaxError
+from embedding_writer import EmbeddingWriter
+from http_clients import openai_http_clients
+from embedding_cache import EmbeddingCache, CachedEmbeddings, DEFAULT_CACHE_DIR
+from lexical_index import build_from_collection, LEXICAL_INDEX_FILE
+from vector_index import VECTOR_INDEX_DIR, build_vector_index, quantization_report
+from text_normalizer import clean_text
 
 # 0. 환경변수 로드
 load_dotenv()
@@ -17,111 +27,512 @@ PDF_FOLDER = "./data/raw/100_PDF"
 CSV_PATH = "./data/raw/data_full.csv"
 DB_PATH = "./chroma_db_chunk500"
 
-# DB 폴더 초기화
-if os.path.exists(DB_PATH):
-    shutil.rmtree(DB_PATH)
-    print(f"기존 DB 폴더({DB_PATH})를 삭제하고 새로 만듭니다.")
+# PDF 추출 병렬화 설정 (NUM_WORKERS <= 1 이면 기존처럼 한 프로세스에서 순차 처리)
+# PDF 워커는 큰 파일 하나에 수백 MB씩 쓰므로 기본값은 코어 수보다 하나 적게, 최대 8개
+NUM_WORKERS = int(os.getenv("DB_MAKER_WORKERS", max(1, min((os.cpu_count() or 2) - 1, 8))))
+PDF_TIMEOUT = int(os.getenv("DB_MAKER_PDF_TIMEOUT", 120))  # 파일 1개당 최대 처리 시간(초)
+PDF_KILL_GRACE = 10  # 워커 안 타임아웃이 동작하지 않으면 이만큼(초) 더 기다린 뒤 그 워커 프로세스를 강제 종료
+PDF_RETRIES = int(os.getenv("DB_MAKER_PDF_RETRIES", 1))  # 강제 종료/비정상 종료된 파일을 새 워커에서 다시 시도할 횟수
+
+# 청킹/임베딩 설정 (바뀌면 기존 청크와 호환되지 않으므로 전체 재구축)
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 150
+SEPARATORS = ["\n\n", "\n", " ", ""]
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR)  # 질문 임베딩(rag_core)과 같은 캐시 공유
+
+# 증분 인덱싱 설정 (False면 기존처럼 DB 폴더를 지우고 처음부터 다시 만듦)
+INCREMENTAL = os.getenv("DB_MAKER_INCREMENTAL", "1") == "1"
+MANIFEST_PATH = os.path.join(DB_PATH, "manifest.json")
+MANIFEST_SAVE_INTERVAL = 5  # 임베딩 중 파일별 진행 상황을 매니페스트에 쓰는 최소 간격(초)
+LEXICAL_INDEX_PATH = os.path.join(DB_PATH, LEXICAL_INDEX_FILE)  # 하이브리드 검색용 BM25 인덱스
+MMAP_INDEX = os.getenv("DB_MAKER_MMAP_INDEX", "1") == "1"  # rag_core의 vector_backend="mmap"용 행렬 파일도 내보낼지
+# 양자화(float16/int8) recall 리포트: 평가 질문을 매번 임베딩하므로 필요할 때만 켬
+QUANT_REPORT = os.getenv("DB_MAKER_QUANT_REPORT", "0") == "1"
+TEST_DATA_PATH = "./test_data.json"  # 리포트에 쓸 질문
+
+# 임베딩 요청 설정 (배치당 최대 토큰/청크 수, 동시 요청 수)
+EMBED_BATCH_TOKENS = int(os.getenv("DB_MAKER_EMBED_BATCH_TOKENS", 200_000))
+EMBED_BATCH_SIZE = int(os.getenv("DB_MAKER_EMBED_BATCH_SIZE", 1000))
+EMBED_CONCURRENCY = int(os.getenv("DB_MAKER_EMBED_CONCURRENCY", 4))
+
+
+class PDFTimeoutError(Exception):
+    pass
+
+
+class PDFParseError(Exception):
+    pass
+
 
 # 2. 메타데이터 로드 (파일명 기준 매칭)
-print(f"메타데이터 로딩 중... ({CSV_PATH})")
-try:
-    meta_df = pd.read_csv(CSV_PATH, encoding='utf-8')
+def load_metadata(csv_path):
+    print(f"메타데이터 로딩 중... ({csv_path})")
+    meta_df = pd.read_csv(csv_path, encoding='utf-8')
     meta_df = meta_df.fillna('')
-    
+
     print(f" -> CSV 컬럼 목록: {list(meta_df.columns)}")
-    
+
     # CSV의 '파일명' 컬럼에서 확장자(.pdf)를 떼고 깨끗하게 다듬어서 인덱스로 만듭니다.
     # 예: "사업명.pdf" -> "사업명"
     meta_df['match_key'] = meta_df['파일명'].astype(str).str.replace(r'\.pdf$', '', regex=True).str.strip()
-    
+
     # 이제 '파일명(match_key)'으로 검색할 수 있게 설정
     meta_df.set_index('match_key', inplace=True)
-    
+
     print(f" -> 총 {len(meta_df)}행의 메타데이터 로드 완료.")
     print(f" -> (참고) 매칭 키 예시 3개: {list(meta_df.index[:3])}")
-    
-except Exception as e:
-    print(f"오류: CSV 파일을 읽을 수 없습니다. ({e})")
-    exit()
-
-# 3. 텍스트 청소 함수
-def clean_text(text):
-    if not text: return ""
-    text = text.replace('\r\n', '\n').replace('\t', ' ')
-    text = re.sub(r'[\.\-\=_]{3,}', '', text)
-    text = re.sub(r'(\b\w+\b)( \1){2,}', r'\1', text)
-    text = re.sub(r'(\w{2,})(\1){2,}', r'\1', text)
-    text = re.sub(r' +', ' ', text)
-    text = re.sub(r'\n+', '\n\n', text)
-    return text.strip()
-
-# 4. 문서 로드 및 메타데이터 주입
-documents = []
-print(f"'{PDF_FOLDER}' 폴더에서 PDF 로딩 시작...")
-
-if not os.path.exists(PDF_FOLDER):
-    print(f"오류: PDF 폴더를 찾을 수 없습니다.")
-    exit()
-
-files = [f for f in os.listdir(PDF_FOLDER) if f.endswith(".pdf")]
-print(f" -> 대상 파일: {len(files)}개")
-
-success_count = 0
-
-for i, file in enumerate(files):
-    file_path = os.path.join(PDF_FOLDER, file)
-    
-    # 파일명에서 확장자 떼고 공백 제거 (CSV match_key와 똑같이 만듦)
-    file_id = os.path.splitext(file)[0].strip()
-    
+    return meta_df
+
+
+def get_file_metadata(meta_df, file_id):
+    """CSV 한 행을 워커 프로세스로 넘길 수 있도록 단순 딕셔너리로 변환 (매칭 실패 시 None)"""
+    if file_id not in meta_df.index:
+        return None
+
+    matched_row = meta_df.loc[file_id]
+    return {
+        "notice_no": str(matched_row.get("공고 번호", "알수없음")).strip(),
+        "project_name": str(matched_row.get("사업명", "알수없음")).strip(),
+        "budget": str(matched_row.get("사업 금액", "0")).strip(),
+        "agency": str(matched_row.get("발주 기관", "알수없음")).strip(),
+    }
+
+
+# 3. 텍스트 청소 함수: text_normalizer.clean_text (결과는 예전 정규식 버전과 같고, 띄어쓰기 없는 긴 단어에서도 선형에 가깝게 동작)
+
+
+# 4. PDF 1개 처리 (추출 -> 청소 -> 메타데이터 주입). 워커 프로세스에서 실행됩니다.
+def load_pdf(file_path, file, metadata):
+    # PDF 파서는 워커에서만 필요하므로 여기서 import (메인 프로세스는 매니페스트/임베딩만 다룸)
+    from langchain_community.document_loaders import PDFPlumberLoader
+    from pdfminer.pdfparser import PDFSyntaxError
+
     try:
-        loader = PDFPlumberLoader(file_path)
-        docs = loader.load()
-        
+        docs = PDFPlumberLoader(file_path).load()
+    except PDFSyntaxError as e:
+        raise PDFParseError(f"PDF 구문 오류: {e}") from e
+
+    for doc in docs:
+        doc.page_content = clean_text(doc.page_content)
+        if "텍스트" in doc.metadata: del doc.metadata["텍스트"]
+        doc.metadata["source"] = file
+
+        # 메타데이터 주입
+        if metadata is not None:
+            doc.metadata.update(metadata)
+
+    return docs
+
+
+def _raise_timeout(signum, frame):
+    raise PDFTimeoutError()
+
+
+def _load_pdf_task(index, file_path, file, metadata, timeout, loader=load_pdf):
+    """
+    파일 1개 처리: (순번, 페이지 리스트, 오류 메시지)를 돌려줍니다.
+    SIGALRM을 지원하는 OS에서는 워커 안에서 파일별 타임아웃을 걸고, 그래도 끝나지 않으면(C 코드 안에서 멈춤, Windows 등)
+    메인 프로세스가 그 워커만 강제 종료합니다.
+    """
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(timeout)
+
+    try:
+        return index, loader(file_path, file, metadata), None
+    except PDFTimeoutError:
+        return index, [], f"시간 초과({timeout}초)"
+    except Exception as e:
+        return index, [], str(e)
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+
+def _pdf_worker(conn, loader):
+    """워커 프로세스: 파일을 하나씩 받아 처리 결과를 돌려줌 (None을 받으면 종료)"""
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        conn.send(_load_pdf_task(*task, loader=loader))
+
+
+class _PDFWorker:
+    """
+    워커 프로세스 하나와 전용 파이프.
+    워커마다 파이프를 따로 두어 지금 어떤 파일을 처리 중인지 알 수 있고, 멈춘 워커 하나만 골라 종료할 수 있습니다.
+    """
+
+    def __init__(self, context, loader):
+        self.conn, child_conn = context.Pipe()
+        # daemon: 메인 프로세스가 끝날 때 남은 워커를 기다리지 않고 함께 종료
+        self.process = context.Process(target=_pdf_worker, args=(child_conn, loader), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.deadline = None
+
+    def start(self, task, timeout):
+        self.task = task
+        self.deadline = time.monotonic() + timeout if timeout else None
+        try:
+            self.conn.send(task)
+        except OSError:
+            pass  # 이미 죽은 워커: sentinel로 감지되어 교체됨
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        if self.task is not None or not self.process.is_alive():
+            return self.kill()
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _run_pool(tasks, num_workers, timeout, loader, retries, collect):
+    """
+    워커 num_workers개로 tasks를 처리하며 파일마다 collect(순번, 페이지 리스트, 오류)를 호출.
+    파일 하나가 timeout + PDF_KILL_GRACE초 안에 끝나지 않거나 워커가 죽으면 그 워커만 종료/교체하고,
+    해당 파일은 retries번까지 새 워커에서 다시 시도한 뒤 실패로 처리합니다. 나머지 파일은 계속 처리됩니다.
+    """
+    context = multiprocessing.get_context()
+    queue = deque(tasks)
+    attempts = {}
+    hard_timeout = timeout + PDF_KILL_GRACE if timeout else None
+    workers = [_PDFWorker(context, loader) for _ in range(min(num_workers, len(tasks)))]
+    try:
+        while True:
+            for worker in workers:
+                if worker.task is None and queue:
+                    worker.start(queue.popleft(), hard_timeout)
+            busy = [worker for worker in workers if worker.task is not None]
+            if not busy:
+                break
+
+            deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait([worker.conn for worker in busy] + [worker.process.sentinel for worker in busy], wait_for)
+
+            for i, worker in enumerate(workers):
+                if worker.task is None:
+                    continue
+                if worker.conn in ready or worker.process.sentinel in ready:
+                    try:
+                        result = worker.conn.recv()
+                    except (EOFError, OSError):
+                        reason = "워커 비정상 종료"
+                    else:
+                        worker.task = None
+                        collect(*result)
+                        continue
+                elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                    reason = f"시간 초과({timeout}초), 워커 강제 종료"
+                else:
+                    continue
+
+                # 멈추거나 죽은 워커는 새 워커로 교체하고, 이 파일만 다시 시도하거나 실패 처리
+                task = worker.task
+                worker.kill()
+                workers[i] = _PDFWorker(context, loader)
+                attempts[task[0]] = attempts.get(task[0], 0) + 1
+                if attempts[task[0]] <= retries:
+                    print(f"   [Retry] {task[2]} ({reason}), 새 워커에서 다시 시도 ({attempts[task[0]]}/{retries})")
+                    queue.append(task)
+                else:
+                    collect(task[0], [], reason)
+    finally:
+        for worker in workers:
+            worker.close()
+
+
+def list_pdf_files(pdf_folder):
+    # 실행할 때마다 문서 순서가 같도록 파일명으로 정렬
+    return sorted(f for f in os.listdir(pdf_folder) if f.endswith(".pdf"))
+
+
+def load_documents(pdf_folder, files, meta_df, num_workers=NUM_WORKERS, timeout=PDF_TIMEOUT,
+                   retries=PDF_RETRIES, loader=load_pdf):
+    """
+    주어진 PDF 파일들을 읽어 (페이지 Document 리스트, 실패한 파일 집합)을 반환합니다.
+    완료되는 순서와 상관없이 결과는 항상 files 순서로 합쳐집니다.
+    loader: PDF 1개를 읽는 함수 (테스트에서 교체 가능, 워커로 넘겨야 하므로 모듈 최상위 함수여야 함)
+    """
+    print(f"'{pdf_folder}' 폴더에서 PDF 로딩 시작... (워커 {num_workers}개)")
+    print(f" -> 대상 파일: {len(files)}개")
+
+    tasks = []
+    success_count = 0
+    for i, file in enumerate(files):
+        # 파일명에서 확장자 떼고 공백 제거 (CSV match_key와 똑같이 만듦)
+        file_id = os.path.splitext(file)[0].strip()
+        metadata = get_file_metadata(meta_df, file_id)
+
         # [디버깅] 처음 3개만 매칭 여부 확인
         if i < 3:
             print(f"[매칭 테스트 {i+1}] 파일명: '{file_id}'")
-            if file_id in meta_df.index:
+            if metadata is not None:
                 print(f" ▶ 결과 : ✅ 성공!")
             else:
                 print(f" ▶ 결과 : ❌ 실패 (CSV 키 예시: {list(meta_df.index[:1])})")
 
-        # 메타데이터 찾기
-        matched_row = None
-        if file_id in meta_df.index:
-            matched_row = meta_df.loc[file_id]
+        if metadata is not None:
             success_count += 1
-        
-        for doc in docs:
-            doc.page_content = clean_text(doc.page_content)
-            if "텍스트" in doc.metadata: del doc.metadata["텍스트"]
-            doc.metadata["source"] = file 
-            
-            # 메타데이터 주입
-            if matched_row is not None:
-                doc.metadata["notice_no"] = str(matched_row.get("공고 번호", "알수없음")).strip()
-                doc.metadata["project_name"] = str(matched_row.get("사업명", "알수없음")).strip()
-                doc.metadata["budget"] = str(matched_row.get("사업 금액", "0")).strip()
-                doc.metadata["agency"] = str(matched_row.get("발주 기관", "알수없음")).strip()
-                
-        documents.extend(docs)
-        
-        if (i + 1) % 10 == 0:
-            print(f"   [{i+1}/{len(files)}] 진행 중...")
-            
+
+        tasks.append((i, os.path.join(pdf_folder, file), file, metadata, timeout))
+
+    results = {}
+    failed = set()
+
+    def collect(index, docs, error):
+        results[index] = docs
+        if error is not None:
+            failed.add(files[index])
+            print(f"   [Skip] 오류: {files[index]} ({error})")
+        if len(results) % 10 == 0:
+            print(f"   [{len(results)}/{len(files)}] 진행 중...")
+
+    if num_workers <= 1:
+        for task in tasks:
+            collect(*_load_pdf_task(*task, loader=loader))
+    else:
+        # 끝나는 파일부터 바로 받아오고, 멈춘 파일은 그 워커만 종료 (다른 파일은 계속 처리)
+        _run_pool(tasks, num_workers, timeout, loader, retries, collect)
+
+    # 순번대로 다시 합쳐서 결정적인 순서 보장
+    documents = []
+    for i in range(len(files)):
+        documents.extend(results.get(i, []))
+
+    print(f"\n로드 완료! (메타데이터 매칭 성공: {success_count}/{len(files)})")
+    return documents, failed
+
+
+# 5. 증분 인덱싱용 매니페스트
+def file_hash(file_path, metadata):
+    """PDF 내용과 주입될 CSV 메타데이터를 함께 해싱 (CSV만 바뀌어도 다시 임베딩되도록)"""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    h.update(json.dumps(metadata, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def chunk_params():
+    return {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "separators": SEPARATORS,
+        "embedding_model": EMBEDDING_MODEL,
+        "add_start_index": True,
+    }
+
+
+def load_manifest(path):
+    """
+    {"params": 청킹 설정, "files": {파일명: {"hash": ..., "ids": [청크 ID...], "done": 모든 청크 저장 여부}}}
+    임베딩을 시작하기 전에 먼저 기록하고 진행하면서 갱신하므로, 중간에 끊긴 실행의 매니페스트도 그대로 이어서 씁니다.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    # 중간에 죽어도 매니페스트가 깨지지 않도록 임시 파일에 쓰고 교체
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def chunk_ids(split_docs, hashes):
+    """파일명 + 파일 해시 + 파일 안에서의 청크 순번으로 결정적인 청크 ID 생성"""
+    ids = []
+    counters = {}
+    for doc in split_docs:
+        source = doc.metadata["source"]
+        n = counters.get(source, 0)
+        counters[source] = n + 1
+        prefix = hashlib.sha256(f"{source}:{hashes[source]}".encode("utf-8")).hexdigest()[:16]
+        ids.append(f"{prefix}-{n}")
+    return ids
+
+
+def report_quantization(embedding_model, k=20):
+    """양자화 형식별 상주 메모리와 float32 대비 recall@k 출력 (평가 질문 임베딩은 캐시에서 재사용)"""
+    if not os.path.exists(TEST_DATA_PATH):
+        return
+    with open(TEST_DATA_PATH, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+    questions = raw_data["question"] if isinstance(raw_data, dict) else [item["question"] for item in raw_data]
+
+    report = quantization_report(DB_PATH, embedding_model.embed_documents(questions), k=k)
+    for name, row in report.items():
+        print(f"   [{name}] " + ", ".join(f"{key}={value}" for key, value in row.items()))
+
+
+def main():
+    try:
+        meta_df = load_metadata(CSV_PATH)
     except Exception as e:
-        print(f"   [Skip] 오류: {file}")
+        print(f"오류: CSV 파일을 읽을 수 없습니다. ({e})")
+        return
+
+    if not os.path.exists(PDF_FOLDER):
+        print(f"오류: PDF 폴더를 찾을 수 없습니다.")
+        return
+
+    files = list_pdf_files(PDF_FOLDER)
+    hashes = {
+        file: file_hash(os.path.join(PDF_FOLDER, file), get_file_metadata(meta_df, os.path.splitext(file)[0].strip()))
+        for file in files
+    }
+
+    # DB 폴더 초기화 (증분 모드가 아니거나, 저장된 청킹 설정이 지금과 다를 때만)
+    # 매니페스트가 없거나 중간에 끊긴 실행이 남긴 것이면 지우지 않고 이어서 진행 (이미 저장된 청크는 EmbeddingWriter가 건너뜀)
+    manifest = load_manifest(MANIFEST_PATH)
+    if not INCREMENTAL or (manifest is not None and manifest.get("params") != chunk_params()):
+        if os.path.exists(DB_PATH):
+            shutil.rmtree(DB_PATH)
+            print(f"기존 DB 폴더({DB_PATH})를 삭제하고 새로 만듭니다.")
+        manifest = None
+    if manifest is None:
+        manifest = {"params": chunk_params(), "files": {}}
+
+    indexed = manifest["files"]
+
+    def is_indexed(file):
+        entry = indexed.get(file)
+        # "done"이 없는 항목은 예전 형식(실행이 끝날 때만 기록)이므로 완료된 것으로 봄
+        return entry is not None and entry["hash"] == hashes[file] and entry.get("done", True)
+
+    to_add = [file for file in files if not is_indexed(file)]
+    # 같은 내용인데 저장이 덜 끝난 파일은 청크 ID가 그대로이므로 지우지 않고 남은 청크만 이어서 저장
+    to_remove = [file for file in indexed if file not in hashes or indexed[file]["hash"] != hashes[file]]
+    print(f" -> 증분 인덱싱: 추가/변경 {len(to_add)}개, 삭제/변경 {len(to_remove)}개, 유지 {len(files) - len(to_add)}개")
+
+    # 예전에 임베딩한 적 있는 청크(다른 청크 크기로 만든 DB 포함)는 캐시에서 바로 가져옴
+    embedding_model = CachedEmbeddings(
+        OpenAIEmbeddings(model=EMBEDDING_MODEL, **openai_http_clients()), EmbeddingCache(EMBEDDING_CACHE_DIR)
+    )
+    vectordb = Chroma(persist_directory=DB_PATH, embedding_function=embedding_model)
+
+    # 삭제되었거나 내용이 바뀐 파일의 청크 제거
+    stale_ids = [chunk_id for file in to_remove for chunk_id in indexed[file]["ids"]]
+    if stale_ids:
+        vectordb.delete(ids=stale_ids)
+    for file in to_remove:
+        del indexed[file]
+    if to_add or to_remove:
+        # 키워드/mmap 인덱스를 다시 만들기 전에 끊겨도 다음 실행이 변경 없음으로 보고 건너뛰지 않도록 표시
+        manifest["indexes_done"] = False
+    os.makedirs(DB_PATH, exist_ok=True)
+    save_manifest(MANIFEST_PATH, manifest)
+
+    if to_add:
+        documents, failed = load_documents(PDF_FOLDER, to_add, meta_df)
+
+        # 6. 청킹
+        print("텍스트 분할 시작...")
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, separators=SEPARATORS,
+            add_start_index=True,  # 생성 단계에서 겹치는 청크를 합칠 수 있도록 페이지 안 위치 저장
+        )
+        split_docs = text_splitter.split_documents(documents)
+        ids = chunk_ids(split_docs, hashes)
+        print(f" -> 총 {len(split_docs)}개의 청크 생성됨")
+
+        # 7. 저장
+        # 임베딩 전에 파일별 청크 ID를 "done": False로 먼저 기록 -> 중간에 죽어도 다음 실행이 남은 청크만 이어서 저장
+        # 실패한 파일은 매니페스트에 남기지 않아 다음 실행 때 다시 시도
+        owners = {chunk_id: doc.metadata["source"] for doc, chunk_id in zip(split_docs, ids)}
+        for file in to_add:
+            indexed.pop(file, None)
+            if file not in failed:
+                indexed[file] = {"hash": hashes[file], "ids": [], "done": False}
+        for chunk_id, file in owners.items():
+            indexed[file]["ids"].append(chunk_id)
+        remaining = {file: set(indexed[file]["ids"]) for file in to_add if file in indexed}
+        for file, chunk_set in remaining.items():
+            if not chunk_set:
+                indexed[file]["done"] = True  # 텍스트가 없는 파일
+        save_manifest(MANIFEST_PATH, manifest)
+
+        last_saved = [time.monotonic()]
+
+        def mark_written(batch_ids):
+            for chunk_id in batch_ids:
+                file = owners[chunk_id]
+                remaining[file].discard(chunk_id)
+                if not remaining[file]:
+                    indexed[file]["done"] = True
+            # 큰 매니페스트를 파일마다 다시 쓰지 않도록 몇 초에 한 번만 (기록이 늦어도 다음 실행이 해당 파일을 다시 읽을 뿐 청크는 건너뜀)
+            if time.monotonic() - last_saved[0] >= MANIFEST_SAVE_INTERVAL:
+                save_manifest(MANIFEST_PATH, manifest)
+                last_saved[0] = time.monotonic()
+
+        print("벡터 DB 저장 중...")
+        writer = EmbeddingWriter(
+            vectordb, embedding_model,
+            max_batch_tokens=EMBED_BATCH_TOKENS,
+            max_batch_size=EMBED_BATCH_SIZE,
+            max_concurrency=EMBED_CONCURRENCY,
+        )
+        try:
+            writer.write(split_docs, ids, on_written=mark_written)
+        finally:
+            save_manifest(MANIFEST_PATH, manifest)
+
+    # 매니페스트에 없는 청크 정리 (매니페스트 없이 만든 예전 DB, 끊긴 실행 뒤 실패/변경된 파일의 청크 등)
+    known_ids = {chunk_id for entry in indexed.values() for chunk_id in entry["ids"]}
+    orphan_ids = [chunk_id for chunk_id in vectordb._collection.get(include=[])["ids"] if chunk_id not in known_ids]
+    for start in range(0, len(orphan_ids), 5000):
+        vectordb.delete(ids=orphan_ids[start:start + 5000])
+    if orphan_ids:
+        print(f" -> 매니페스트에 없는 청크 {len(orphan_ids)}개 삭제")
+
+    # 추가/삭제/정리한 청크가 하나도 없고 지난 실행이 인덱스까지 만들고 끝났으면 이미 만든 인덱스 파일을 다시 쓰지 않음
+    unchanged = not orphan_ids and manifest.get("indexes_done", False)
+
+    # 8. 키워드(BM25) 인덱스: 증분 반영이 끝난 컬렉션 전체로 다시 만듦 (임베딩 호출 없음)
+    if unchanged and os.path.exists(LEXICAL_INDEX_PATH):
+        print("키워드 인덱스: 변경된 청크가 없어 기존 인덱스를 그대로 사용")
+    else:
+        print("키워드 인덱스 생성 중...")
+        lexical_index = build_from_collection(vectordb._collection)
+        lexical_index.save(LEXICAL_INDEX_PATH)
+        print(f" -> {len(lexical_index)}개 청크, 용어 {len(lexical_index.vocab)}개")
+
+    # 9. mmap 벡터 인덱스: Chroma에 저장된 임베딩을 정규화된 float32 행렬 파일로 내보냄
+    if MMAP_INDEX:
+        if unchanged and os.path.exists(os.path.join(DB_PATH, VECTOR_INDEX_DIR, "meta.npz")):
+            print("mmap 벡터 인덱스: 변경된 청크가 없어 기존 인덱스를 그대로 사용")
+        else:
+            print("mmap 벡터 인덱스 생성 중...")
+            print(f" -> {build_vector_index(vectordb._collection, DB_PATH)}개 청크")
+        if QUANT_REPORT:
+            report_quantization(embedding_model)
 
-print(f"\n로드 완료! (메타데이터 매칭 성공: {success_count}/{len(files)})")
+    manifest["indexes_done"] = True
+    save_manifest(MANIFEST_PATH, manifest)
+    print(f"\nDB 생성 완료! 경로: {DB_PATH} (파일 {len(indexed)}개)")
 
-# 5. 청킹
-print("텍스트 분할 시작...")
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=150, separators=["\n\n", "\n", " ", ""])
-split_docs = text_splitter.split_documents(documents)
-print(f" -> 총 {len(split_docs)}개의 청크 생성됨")
 
-# 6. 저장
-print("벡터 DB 저장 중...")
-embedding_model = OpenAIEmbeddings(model="text-embedding-3-small")
-vectordb = Chroma.from_documents(documents=split_docs, embedding=embedding_model, persist_directory=DB_PATH)
-print(f"\nDB 생성 완료! 경로: {DB_PATH}")
\ No newline at end of file
+# 워커 프로세스가 이 파일을 다시 import해도 인덱싱이 재실행되지 않도록 main 가드 사용
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_DIR = "./embedding_cache"
+DEFAULT_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_MB", 1024)) * 1024 * 1024
+TOUCH_INTERVAL = 3600     # 캐시 적중 시 last_used는 이 시간(초)보다 오래된 것만 갱신 (LRU에는 이 정도 해상도면 충분)
+TOUCH_FLUSH_SIZE = 1000   # 갱신할 last_used가 이만큼 쌓이면 한 번에 기록 (그 전에는 다음 put_many 트랜잭션에 같이 기록)
+
+
+class EmbeddingCache:
+    """
+    (모델명, 텍스트 해시)를 키로 하는 디스크 임베딩 캐시.
+    - index.sqlite3 : 키 -> 벡터 위치(offset), 바이트 수, 마지막 사용 시각
+    - vectors.f32   : float32 벡터를 이어 붙인 바이너리 파일
+    용량(max_bytes)을 넘으면 오래 안 쓴 벡터부터 지우고, 지운 자리는 같은 크기의 새 벡터가 재사용합니다.
+    읽기(get_many)는 쓰기 잠금을 잡지 않도록 last_used 갱신을 모아 두었다가 나중에 한 번에 기록합니다.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._touched = {}  # 키 -> 아직 기록하지 않은 last_used
+
+        # 트랜잭션은 직접 관리 (여러 프로세스가 같은 캐시를 써도 슬롯 할당이 겹치지 않도록)
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used);
+            CREATE TABLE IF NOT EXISTS free_slots (offset INTEGER PRIMARY KEY, nbytes INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_free_nbytes ON free_slots(nbytes);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta VALUES ('end', 0), ('live_bytes', 0);
+        """)
+
+        blob_path = os.path.join(cache_dir, "vectors.f32")
+        if not os.path.exists(blob_path):
+            open(blob_path, "wb").close()
+        self._blob = open(blob_path, "r+b")
+
+    @staticmethod
+    def make_key(model, text):
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model, texts) -> List[Optional[List[float]]]:
+        keys = [self.make_key(model, text) for text in texts]
+        found = {}
+        with self._lock:
+            # 읽는 동안 읽기 트랜잭션을 유지해서 다른 프로세스가 해당 슬롯을 비우고 재사용하지 못하게 함
+            self._db.execute("BEGIN")
+            try:
+                # SQLite 변수 개수 제한을 피하려고 나눠서 조회
+                for start in range(0, len(keys), 500):
+                    part = keys[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, offset, nbytes, last_used FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                    now = time.time()
+                    for key, offset, nbytes, last_used in rows:
+                        self._blob.seek(offset)
+                        found[key] = np.frombuffer(self._blob.read(nbytes), dtype=np.float32).tolist()
+                        if now - last_used >= TOUCH_INTERVAL:
+                            self._touched[key] = now
+            finally:
+                self._db.execute("COMMIT")
+
+            if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._flush_touched()
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+
+        return [found.get(key) for key in keys]
+
+    def _flush_touched(self):
+        # 쓰기 트랜잭션 안에서 호출 (이미 지워진 키는 UPDATE가 그냥 무시됨)
+        if self._touched:
+            self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [
+                (last_used, key) for key, last_used in self._touched.items()
+            ])
+            self._touched = {}
+
+    def put_many(self, model, texts, vectors):
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for text, vector in zip(texts, vectors):
+                    key = self.make_key(model, text)
+                    if self._db.execute("SELECT 1 FROM embeddings WHERE key = ?", (key,)).fetchone():
+                        continue
+                    data = np.asarray(vector, dtype=np.float32).tobytes()
+                    offset = self._allocate(len(data))
+                    self._blob.seek(offset)
+                    self._blob.write(data)
+                    self._db.execute("INSERT INTO embeddings VALUES (?, ?, ?, ?)", (key, offset, len(data), now))
+                    self._db.execute("UPDATE meta SET value = value + ? WHERE name = 'live_bytes'", (len(data),))
+                self._blob.flush()
+                self._flush_touched()
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _allocate(self, nbytes):
+        # 같은 크기의 빈 슬롯이 있으면 재사용, 없으면 파일 끝에 추가
+        slot = self._db.execute("SELECT offset FROM free_slots WHERE nbytes = ? LIMIT 1", (nbytes,)).fetchone()
+        if slot:
+            self._db.execute("DELETE FROM free_slots WHERE offset = ?", (slot[0],))
+            return slot[0]
+        offset = self._db.execute("SELECT value FROM meta WHERE name = 'end'").fetchone()[0]
+        self._db.execute("UPDATE meta SET value = ? WHERE name = 'end'", (offset + nbytes,))
+        return offset
+
+    def _evict(self):
+        live_bytes = self._db.execute("SELECT value FROM meta WHERE name = 'live_bytes'").fetchone()[0]
+        if live_bytes <= self.max_bytes:
+            return
+
+        # 용량의 90%까지 LRU 순서로 비움 (매번 조금씩 지우지 않도록 여유를 둠)
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, offset, nbytes in self._db.execute("SELECT key, offset, nbytes FROM embeddings ORDER BY last_used"):
+            if live_bytes - freed <= target:
+                break
+            victims.append((key, offset, nbytes))
+            freed += nbytes
+
+        self._db.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key, _, _ in victims])
+        self._db.executemany("INSERT INTO free_slots VALUES (?, ?)", [(offset, nbytes) for _, offset, nbytes in victims])
+        self._db.execute("UPDATE meta SET value = value - ? WHERE name = 'live_bytes'", (freed,))
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 모델 앞에 EmbeddingCache를 붙인 래퍼.
+    캐시에 있는 텍스트는 네트워크 요청 없이 바로 돌려주고, 없는 것만 원래 모델에 요청합니다.
+    비동기 메서드는 SQLite 조회/기록(다른 프로세스가 쓰는 중이면 잠금을 기다림)을 스레드에서 실행해 이벤트 루프를 막지 않습니다.
+    """
+
+    def __init__(self, embeddings, cache, model_name=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+
+    def _split_misses(self, texts):
+        cached = self.cache.get_many(self.model_name, texts)
+        # 같은 배치 안의 중복 텍스트는 한 번만 요청
+        misses = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        return cached, misses
+
+    def _merge(self, texts, cached, misses, miss_vectors):
+        if misses:
+            self.cache.put_many(self.model_name, misses, miss_vectors)
+        fresh = dict(zip(misses, miss_vectors))
+        return [vector if vector is not None else list(fresh[text]) for text, vector in zip(texts, cached)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached, misses = self._split_misses(texts)
+        miss_vectors = self.embeddings.embed_documents(misses) if misses else []
+        return self._merge(texts, cached, misses, miss_vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        cached = self.cache.get_many(self.model_name, [text])[0]
+        if cached is not None:
+            return cached
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many(self.model_name, [text], [vector])
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached, misses = await asyncio.to_thread(self._split_misses, texts)
+        miss_vectors = await self.embeddings.aembed_documents(misses) if misses else []
+        return await asyncio.to_thread(self._merge, texts, cached, misses, miss_vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        cached = (await asyncio.to_thread(self.cache.get_many, self.model_name, [text]))[0]
+        if cached is not None:
+            return cached
+        vector = await self.embeddings.aembed_query(text)
+        await asyncio.to_thread(self.cache.put_many, self.model_name, [text], [vector])
+        return vector
+
+
+class RecentQueryEmbeddings(Embeddings):
+    """
+    최근 질문 임베딩 몇 개를 메모리에 들고 있는 래퍼.
+    한 요청 안에서 답변 캐시 조회, 벡터 검색, 관련성 채점이 같은 질문을 따로 임베딩하지 않도록
+    (디스크 캐시를 꺼도) 질문당 한 번만 요청합니다. 문서 임베딩은 그대로 넘깁니다.
+    """
+
+    def __init__(self, embeddings, max_entries=256):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, text):
+        with self._lock:
+            vector = self._recent.get(text)
+            if vector is not None:
+                self._recent.move_to_end(text)
+            return vector
+
+    def _put(self, text, vector):
+        with self._lock:
+            self._recent[text] = vector
+            while len(self._recent) > self.max_entries:
+                self._recent.popitem(last=False)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self._get(text)
+        return vector if vector is not None else self._put(text, self.embeddings.embed_query(text))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self._get(text)
+        return vector if vector is not None else self._put(text, await self.embeddings.aembed_query(text))
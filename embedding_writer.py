@@ -0,0 +1,129 @@
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai
+
+# 재시도할 만한 오류 (요청 한도 초과, 일시적인 네트워크/서버 오류)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def _load_token_counter():
+    """tiktoken으로 토큰 수를 셉니다. 인코딩 파일을 받을 수 없는 환경에서는 UTF-8 바이트 수(항상 토큰 수 이상)로 대신합니다."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: len(text.encode("utf-8"))
+
+
+class EmbeddingWriter:
+    """
+    청크를 토큰 수 기준 배치로 묶어 동시에 임베딩하고, 끝난 배치부터 바로 Chroma에 기록합니다.
+    - 요청 한도(429)나 일시적 오류는 지수 백오프로 재시도
+    - 청크 ID가 결정적이므로 이미 DB에 있는 청크는 건너뜀 (중간에 죽어도 이어서 실행 가능)
+    """
+
+    def __init__(self, vectordb, embeddings, max_batch_tokens=200_000, max_batch_size=1000,
+                 max_concurrency=4, max_retries=8, base_delay=1.0, max_delay=60.0):
+        self.vectordb = vectordb
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.count_tokens = _load_token_counter()
+
+    def _existing_ids(self, ids, lookup_size=5000):
+        # SQLite 변수 개수 제한을 피하려고 나눠서 조회
+        existing = set()
+        for start in range(0, len(ids), lookup_size):
+            result = self.vectordb._collection.get(ids=ids[start:start + lookup_size], include=[])
+            existing.update(result["ids"])
+        return existing
+
+    def _make_batches(self, docs, ids):
+        batches = []
+        batch, batch_tokens = [], 0
+        for doc, chunk_id in zip(docs, ids):
+            tokens = self.count_tokens(doc.page_content)
+            if batch and (batch_tokens + tokens > self.max_batch_tokens or len(batch) >= self.max_batch_size):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append((doc, chunk_id))
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _retry_delay(self, error, attempt):
+        # 서버가 Retry-After를 알려주면 그만큼, 아니면 지수 백오프 + 지터
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.max_delay)
+        except ValueError:
+            pass
+        return min(self.base_delay * (2 ** attempt), self.max_delay) * (0.5 + random.random() / 2)
+
+    def _embed_batch(self, batch):
+        texts = [doc.page_content for doc, _ in batch]
+        for attempt in range(self.max_retries + 1):
+            try:
+                return batch, self.embeddings.embed_documents(texts)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                print(f"   [Retry] 임베딩 요청 실패 ({type(e).__name__}), {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    def _write_batch(self, batch, vectors):
+        self.vectordb._collection.upsert(
+            ids=[chunk_id for _, chunk_id in batch],
+            embeddings=vectors,
+            documents=[doc.page_content for doc, _ in batch],
+            metadatas=[doc.metadata for doc, _ in batch],
+        )
+
+    def write(self, docs, ids, on_written=None):
+        """on_written(청크 ID 리스트): 청크가 DB에 있다고 확인될 때마다 호출 (이미 있던 청크 포함, 진행 상황 기록용)"""
+        existing = self._existing_ids(ids)
+        if existing:
+            print(f" -> 이미 저장된 청크 {len(existing)}개는 건너뜁니다. (이전 실행 이어하기)")
+            if on_written is not None:
+                on_written(list(existing))
+        todo = [(doc, chunk_id) for doc, chunk_id in zip(docs, ids) if chunk_id not in existing]
+
+        batches = self._make_batches([doc for doc, _ in todo], [chunk_id for _, chunk_id in todo])
+        print(f" -> 임베딩 대상 {len(todo)}개 청크, {len(batches)}개 배치 (동시 요청 {self.max_concurrency}개)")
+
+        written = 0
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(self._embed_batch, batch) for batch in batches]
+            try:
+                # 끝난 배치부터 바로 DB에 기록 (쓰기는 메인 스레드에서만 해서 SQLite 잠금 경합 방지)
+                for future in as_completed(futures):
+                    batch, vectors = future.result()
+                    self._write_batch(batch, vectors)
+                    written += len(batch)
+                    if on_written is not None:
+                        on_written([chunk_id for _, chunk_id in batch])
+                    print(f"   [{written}/{len(todo)}] 저장 완료 ({time.time() - started:.1f}초)")
+            except BaseException:
+                # 재시도가 모두 실패하면 남은 배치는 취소 (이미 기록한 배치는 다음 실행 때 건너뜀)
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return written
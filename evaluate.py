@@ -1,21 +1,25 @@
 import os
 import json
+import asyncio
+import hashlib
+import importlib
+import threading
 from dotenv import load_dotenv
 from rag_core import BiddingAgent
-from datasets import Dataset
-from ragas import evaluate
-from ragas.metrics import (
-    faithfulness,
-    answer_relevancy,
-    context_precision,
-    context_recall,
-)
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from ragas.run_config import RunConfig
+from http_clients import openai_http_clients
 
 # 1. 환경변수 로드
 load_dotenv()
 
+# ragas/datasets는 임포트가 오래 걸리고 채점 단계(6번)에서만 쓰므로, 답변을 생성하는 동안 백그라운드에서 미리 임포트
+def _preload_ragas():
+    for name in ("datasets", "ragas", "ragas.metrics", "ragas.run_config"):
+        importlib.import_module(name)
+
+_ragas_import = threading.Thread(target=_preload_ragas, daemon=True)
+_ragas_import.start()
+
 # GPT-5 등 미래 모델명 대응을 위한 커스텀 클래스
 class GPT5ChatOpenAI(ChatOpenAI):
     def _generate(self, messages, stop=None, run_manager=None, **kwargs):
@@ -29,18 +33,72 @@ class GPT5ChatOpenAI(ChatOpenAI):
         return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
 
 # 2. RAG 시스템 불러오기
-rag_system = BiddingAgent()
+# 평가에서는 답변 캐시를 끄고 매 질문마다 파이프라인 전체를 실행
+rag_system = BiddingAgent(answer_cache=False)
 
 # 3. 채점관 설정 (온도 1로 초기화)
 judge_llm = GPT5ChatOpenAI(
     model="gpt-5",  # 실제 사용 가능한 모델명으로 변경 필요 (예: o1-preview, gpt-4o 등)
-    temperature=1   # 초기값도 1로 설정
+    temperature=1,  # 초기값도 1로 설정
+    **openai_http_clients()  # RAG 시스템과 같은 커넥션 풀 공유
 )
-judge_embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+judge_embeddings = OpenAIEmbeddings(model="text-embedding-3-small", **openai_http_clients())
 
 # 4. 테스트 데이터 로드 (JSON 파일 불러오기)
 json_file_path = "test_data.json"
 
+# 답변 생성 설정: 동시에 처리할 질문 수, 결과 저장 파일 (중간에 끊겨도 이어서 실행)
+GEN_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", 8))
+RESULTS_PATH = os.getenv("EVAL_RESULTS_PATH", "eval_results.jsonl")
+# Ragas 채점 동시 작업 수
+RAGAS_MAX_WORKERS = int(os.getenv("RAGAS_MAX_WORKERS", 16))
+
+
+def config_hash(agent):
+    """파이프라인 설정(모델, DB, 검색 파라미터, 인덱스 버전)이 같을 때만 저장된 결과를 재사용"""
+    config = json.dumps(agent.get_config(), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()[:16]
+
+
+def load_results(path, pipeline_hash):
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 중간에 끊겨서 깨진 마지막 줄은 무시
+            if record.get("config_hash") == pipeline_hash:
+                results[record["question"]] = record
+    return results
+
+
+async def generate_answers(items, pipeline_hash):
+    """저장된 결과가 없는 질문만 세마포어로 동시 실행 수를 제한해서 답변 생성"""
+    done = load_results(RESULTS_PATH, pipeline_hash)
+    todo = list(dict.fromkeys(q_text for q_text, _ in items if q_text not in done))
+    print(f" -> 저장된 결과 {len(items) - len(todo)}개 재사용, 새로 생성 {len(todo)}개 (동시 {GEN_CONCURRENCY}개)")
+
+    semaphore = asyncio.Semaphore(GEN_CONCURRENCY)
+    with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+        async def run(q_text):
+            async with semaphore:
+                # RAG 시스템에 질문 던지기
+                result = await rag_system.ask_with_context_async(q_text)
+            record = {"config_hash": pipeline_hash, **result}
+            # 끝나는 대로 바로 기록해서 중단되어도 다음 실행 때 이어서 진행
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            done[q_text] = record
+            print(f"   [{len(done)}/{len(items)}] {q_text[:30]}...")
+
+        await asyncio.gather(*(run(q_text) for q_text in todo))
+
+    return done
+
+
 questions = []
 answers = []
 contexts = []
@@ -57,31 +115,12 @@ try:
         print(f"'{json_file_path}'에서 {len(raw_data['question'])}개의 데이터를 불러옵니다. (Dict of Lists 구조)")
         
         # zip으로 묶어서 순회
-        target_questions = raw_data["question"]
-        target_gts = raw_data["ground_truth"]
-        
-        for q_text, gt_text in zip(target_questions, target_gts):
-            # RAG 시스템에 질문 던지기
-            result = rag_system.ask_with_context(q_text)
-            
-            questions.append(result["question"])
-            answers.append(result["answer"])
-            contexts.append(result["contexts"])
-            ground_truths.append(gt_text)
+        items = list(zip(raw_data["question"], raw_data["ground_truth"]))
 
     # Case B: [{"question": "...", "ground_truth": "..."}, ...] 형태 (List of Dicts)
     elif isinstance(raw_data, list):
         print(f"'{json_file_path}'에서 {len(raw_data)}개의 데이터를 불러옵니다. (List of Dicts 구조)")
-        for item in raw_data:
-            q_text = item.get("question")
-            gt_text = item.get("ground_truth")
-            
-            result = rag_system.ask_with_context(q_text)
-            
-            questions.append(result["question"])
-            answers.append(result["answer"])
-            contexts.append(result["contexts"])
-            ground_truths.append(gt_text)
+        items = [(item.get("question"), item.get("ground_truth")) for item in raw_data]
             
     else:
         print("지원하지 않는 데이터 형식입니다.")
@@ -94,7 +133,28 @@ except json.JSONDecodeError:
     print(f"오류: '{json_file_path}' 파일 형식이 올바르지 않습니다.")
     exit()
 
+results = asyncio.run(generate_answers(items, config_hash(rag_system)))
+
+# 원래 질문 순서대로 정리
+for q_text, gt_text in items:
+    result = results[q_text]
+    questions.append(result["question"])
+    answers.append(result["answer"])
+    contexts.append(result["contexts"])
+    ground_truths.append(gt_text)
+
 # 5. 데이터셋 변환
+_ragas_import.join()
+from datasets import Dataset
+from ragas import evaluate
+from ragas.metrics import (
+    faithfulness,
+    answer_relevancy,
+    context_precision,
+    context_recall,
+)
+from ragas.run_config import RunConfig
+
 data = {
     "question": questions,
     "answer": answers,
@@ -106,7 +166,7 @@ dataset = Dataset.from_dict(data)
 # 6. 채점 시작
 print("채점 중입니다...")
 
-my_run_config = RunConfig(timeout=360)
+my_run_config = RunConfig(timeout=360, max_workers=RAGAS_MAX_WORKERS)
 
 result = evaluate(
     dataset=dataset,
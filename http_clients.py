@@ -0,0 +1,207 @@
+"""
+OpenAI 호출용 httpx 클라이언트를 프로세스 안에서 공유.
+
+ChatOpenAI / OpenAIEmbeddings를 만들 때마다 각자 커넥션 풀을 열면 배포 직후 첫 질문이
+TLS 핸드셰이크와 연결 설정을 모델 수만큼 반복합니다. 여기서는
+- 프로세스당 커넥션 풀 하나(keep-alive, h2 패키지가 있으면 HTTP/2)를 모든 모델 클라이언트가 함께 쓰고
+- max_in_flight를 주면 그 클라이언트로 동시에 진행되는 요청 수를 제한하며 (HTTP/2는 커넥션 하나에 여러 요청이 실리므로 커넥션 수 대신 요청 수로 제한)
+- warm_up / awarm_up으로 미리 연결을 열어 둡니다.
+
+사용 예:
+    ChatOpenAI(model="gpt-5", **openai_http_clients())
+"""
+import os
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from tracing import logger
+
+try:
+    import h2  # noqa: F401  (httpx의 HTTP/2 지원에 필요)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+MAX_CONNECTIONS = int(os.getenv("BIDDING_HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("BIDDING_HTTP_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("BIDDING_HTTP_KEEPALIVE_EXPIRY", "120"))
+
+# openai SDK 기본값과 같은 타임아웃 (응답 대기 10분, 연결 5초)
+TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+
+def _pool_options():
+    return {
+        "http2": HTTP2,
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """응답 본문을 다 읽고 닫을 때 요청 슬롯을 반납 (스트리밍 응답은 본문이 끝나야 요청이 끝난 것)"""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _once(func):
+    done = []
+
+    def wrapper():
+        if not done:
+            done.append(True)
+            func()
+    return wrapper
+
+
+def _wrap_response(response, stream):
+    return httpx.Response(
+        status_code=response.status_code, headers=response.headers, stream=stream, extensions=response.extensions
+    )
+
+
+class LimitedTransport(httpx.BaseTransport):
+    """공유 커넥션 풀 위에서 동시에 진행되는 요청 수만 max_in_flight로 제한"""
+
+    def __init__(self, transport, max_in_flight):
+        self._transport = transport
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def handle_request(self, request):
+        self._slots.acquire()
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            self._slots.release()
+            raise
+        return _wrap_response(response, _ReleasingStream(response.stream, _once(self._slots.release)))
+
+    def close(self):
+        # 공유 풀은 다른 클라이언트도 쓰므로 닫지 않음
+        pass
+
+
+class SharedAsyncTransport(httpx.AsyncBaseTransport):
+    """
+    비동기 커넥션 풀을 이벤트 루프마다 하나씩 둠.
+    다른 루프에서 연 커넥션은 재사용할 수 없으므로 (asyncio.run을 여러 번 부르는 평가 스크립트 등) 루프별로 나눠 공유합니다.
+    max_in_flight를 주면 루프별로 동시 요청 수를 제한합니다.
+    """
+
+    def __init__(self, pools, max_in_flight=None):
+        self._pools = pools
+        self._max_in_flight = max_in_flight
+        self._slots = weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request):
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = httpx.AsyncHTTPTransport(**_pool_options())
+        if not self._max_in_flight:
+            return await pool.handle_async_request(request)
+
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.BoundedSemaphore(self._max_in_flight)
+        await slots.acquire()
+        try:
+            response = await pool.handle_async_request(request)
+        except BaseException:
+            slots.release()
+            raise
+        return _wrap_response(response, _AsyncReleasingStream(response.stream, _once(slots.release)))
+
+    async def aclose(self):
+        pass
+
+
+_lock = threading.Lock()
+_transport = None
+_async_pools = weakref.WeakKeyDictionary()  # 이벤트 루프 -> AsyncHTTPTransport
+_clients = {}                               # max_in_flight -> {"http_client", "http_async_client"}
+
+
+def _shared_transport():
+    global _transport
+    if _transport is None:
+        _transport = httpx.HTTPTransport(**_pool_options())
+    return _transport
+
+
+def openai_http_clients(max_in_flight=None):
+    """
+    ChatOpenAI / OpenAIEmbeddings에 그대로 넘길 {"http_client", "http_async_client"}.
+    같은 max_in_flight로 부르면 같은 클라이언트(같은 동시 요청 제한)를 돌려줌.
+    """
+    with _lock:
+        if max_in_flight not in _clients:
+            transport = _shared_transport()
+            if max_in_flight:
+                transport = LimitedTransport(transport, max_in_flight)
+            _clients[max_in_flight] = {
+                "http_client": httpx.Client(transport=transport, timeout=TIMEOUT),
+                "http_async_client": httpx.AsyncClient(
+                    transport=SharedAsyncTransport(_async_pools, max_in_flight), timeout=TIMEOUT
+                ),
+            }
+        return _clients[max_in_flight]
+
+
+def warm_up(connections=2):
+    """
+    동기 풀에 OpenAI 커넥션을 미리 열어 둠. 실패해도 경고만 남김.
+    인증 없이 가벼운 GET만 보내므로 토큰을 쓰지 않음 (401 응답이어도 연결은 풀에 남음)
+    """
+    client = openai_http_clients()["http_client"]
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="http-warm-up") as executor:
+        futures = [executor.submit(client.get, f"{OPENAI_BASE_URL}/models") for _ in range(connections)]
+    errors = [future.exception() for future in futures if future.exception() is not None]
+    if errors:
+        logger.warning(f"HTTP 워밍업 실패: {errors[0]}")
+
+
+async def awarm_up(connections=2):
+    """현재 이벤트 루프의 비동기 풀에 OpenAI 커넥션을 미리 열어 둠"""
+    client = openai_http_clients()["http_async_client"]
+    results = await asyncio.gather(
+        *(client.get(f"{OPENAI_BASE_URL}/models") for _ in range(connections)), return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        logger.warning(f"HTTP 워밍업 실패: {errors[0]}")
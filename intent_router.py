@@ -0,0 +1,86 @@
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from answer_cache import normalize_question
+
+# 이 단어가 들어가면 입찰 공고 질문으로 확정 (ROUTER_PROMPT의 'bid' 기준 1~4번)
+BID_KEYWORDS = [
+    "입찰", "공고", "발주", "낙찰", "용역", "과업", "제안서", "제안요청", "rfp",
+    "예산", "사업비", "사업 금액", "사업금액", "소요 금액", "추정 가격", "추정가격",
+    "사업 기간", "사업기간", "수행 기간", "계약 기간", "계약",
+    "평가 기준", "평가 방법", "배점", "기술 평가", "가격 평가",
+    "참가 자격", "입찰 자격", "자격 요건", "공동수급", "컨소시엄", "하도급", "분담이행",
+    "요구사항", "사업명", "사업 내용", "주요 사업", "브리핑", "구축 사업", "고도화 사업",
+    "유지보수", "기능개선", "기능 개선", "시스템 구축", "운영 사업",
+]
+
+# 질문 전체가 이 패턴과 일치하는 짧은 말(인사/잡담)만 not_relevant로 확정 (ROUTER_PROMPT의 'not_relevant' 기준)
+# 단어 일부만 걸려도 거절하면 "HIS 시스템", "감사 로그 기능", "메뉴 구조" 같은 실제 공고 질문까지 막히므로
+# 문장 전체 일치 + 길이 제한으로만 판정하고, 나머지는 LLM 라우터에 맡김
+# (질문과 같은 NFKC 정규화를 거쳐야 "ㅋㅋ" 같은 호환 자모도 일치함)
+CHITCHAT_MAX_CHARS = 20
+NOT_RELEVANT_PATTERNS = [re.compile(unicodedata.normalize("NFKC", pattern)) for pattern in [
+    r"^(안녕(하세요)?|하이|헬로|hello|hi|hey|반가워(요)?|반갑습니다|고마워(요)?|감사(합니다|해요)?|ㅎㅇ|ㅋ+|ㅎ+)$",
+    r"^((오늘|내일) )?(날씨|기온|미세먼지)( (어때|어때요|알려줘))?$",
+    r"^(점심|저녁)( 메뉴)?( (뭐 먹지|추천해 ?줘))?$",
+    r"^((너는|넌|너) 누구(야|니|세요)?|이름이 뭐야|무슨 모델이야|gpt야)$",
+]]
+
+# "OO 사업의/사업에서/사업은 ..." 처럼 특정 사업을 주어로 묻는 경우
+_BID_RE = re.compile("|".join(re.escape(keyword) for keyword in BID_KEYWORDS) + r"|사업(의|에서|은|을|이|과|에 )")
+
+
+class IntentRouter:
+    """
+    LLM 라우터 앞에서 먼저 도는 로컬 의도 분류기.
+    키워드/정규식 규칙과 CSV 메타데이터(사업명, 공고번호, 발주기관)로 확실한 질문만 바로 판정하고,
+    애매한 질문은 None을 돌려줘서 LLM 라우터에 넘깁니다.
+    """
+
+    def __init__(self, metadata_index=None):
+        self.metadata_index = metadata_index
+        self._stats = Counter()
+        self._lock = threading.Lock()
+
+    def classify(self, question):
+        decision, rule = self._classify(normalize_question(question), question)
+        with self._lock:
+            self._stats["total"] += 1
+            self._stats[f"local_{decision}" if decision else "llm"] += 1
+            if rule:
+                self._stats[f"rule_{rule}"] += 1
+        return decision
+
+    def _classify(self, normalized, question):
+        if not normalized:
+            return "not_relevant", "empty"
+
+        # 1) CSV에 있는 사업/공고/기관이 언급되면 bid
+        if self.metadata_index is not None and self.metadata_index.mentions(question):
+            return "bid", "metadata"
+
+        # 2) 입찰 관련 키워드가 있으면 bid
+        if _BID_RE.search(normalized):
+            return "bid", "keyword"
+
+        # 3) 짧은 인사/잡담 한마디면 not_relevant
+        if len(normalized) <= CHITCHAT_MAX_CHARS and any(pattern.match(normalized) for pattern in NOT_RELEVANT_PATTERNS):
+            return "not_relevant", "chitchat"
+
+        return None, None
+
+    def record_llm_decision(self, category):
+        with self._lock:
+            self._stats[f"llm_{category}"] += 1
+
+    def get_stats(self):
+        """판정 통계. llm_calls_saved_ratio = 로컬에서 끝나 LLM 라우터 호출을 아낀 비율"""
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats.get("total", 0)
+        saved = stats.get("local_bid", 0) + stats.get("local_not_relevant", 0)
+        stats["llm_calls_saved"] = saved
+        stats["llm_calls_saved_ratio"] = saved / total if total else 0.0
+        return stats
@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+LEXICAL_INDEX_FILE = "lexical_index.npz"
+
+# 키워드 검색에 같이 넣을 청크 메타데이터 (공고번호/사업명/발주기관으로 바로 찾을 수 있도록)
+INDEXED_FIELDS = ("notice_no", "project_name", "agency")
+
+_TOKEN_RE = re.compile(r"[가-힣]+|[0-9a-z]+")
+
+
+def tokenize(text):
+    """
+    한국어용 토큰화: 한글 어절은 글자 2-gram으로 쪼개고(조사/어미가 붙어도 겹치도록), 숫자·영문은 통째로 사용.
+    "한국철도공사의" -> ["한국", "국철", "철도", "도공", "공사", "사의"]
+    """
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    tokens = []
+    for word in _TOKEN_RE.findall(text):
+        if word[0] >= "가" and len(word) > 1:
+            tokens.extend(map(str.__add__, word, word[1:]))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def document_text(content, metadata):
+    fields = [str(metadata.get(field, "")) for field in INDEXED_FIELDS if metadata.get(field)]
+    return " ".join(fields + [content])
+
+
+class LexicalIndex:
+    """
+    청크 단위 BM25 역색인.
+    포스팅 리스트는 용어별로 이어 붙인 uint32(문서 번호) / uint16(빈도) 배열 하나씩에 담고
+    용어 -> (시작, 끝) 오프셋으로 잘라 쓰므로 파이썬 객체 없이 npz 파일 하나로 저장됩니다.
+    """
+
+    def __init__(self, ids, vocab, offsets, postings, freqs, doc_lens, k1=1.2, b=0.75):
+        self.ids = list(ids)
+        self.vocab = vocab            # 용어 -> 용어 번호
+        self.offsets = offsets        # 용어 번호 i의 포스팅 = postings[offsets[i]:offsets[i+1]]
+        self.postings = postings
+        self.freqs = freqs
+        self.doc_lens = doc_lens
+        self.k1 = k1
+        self.b = b
+
+        num_docs = len(self.ids)
+        df = np.diff(self.offsets).astype(np.float32)
+        self.idf = np.log1p((num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = float(doc_lens.mean()) if num_docs else 1.0
+        # 문서 길이 정규화 항은 질의와 무관하므로 미리 계산
+        self._norm = (self.k1 * (1 - self.b + self.b * doc_lens / (avg_len or 1.0))).astype(np.float32)
+
+    @classmethod
+    def build(cls, ids, texts, metadatas=None):
+        metadatas = metadatas or [{}] * len(texts)
+        vocab = {}
+        term_docs = []   # 용어 번호 -> [(문서 번호, 빈도)...]
+        doc_lens = np.zeros(len(texts), dtype=np.uint32)
+        for doc_no, (text, metadata) in enumerate(zip(texts, metadatas)):
+            counts = Counter(tokenize(document_text(text, metadata or {})))
+            doc_lens[doc_no] = sum(counts.values())
+            for term, count in counts.items():
+                term_no = vocab.setdefault(term, len(vocab))
+                if term_no == len(term_docs):
+                    term_docs.append([])
+                term_docs[term_no].append((doc_no, min(count, 65535)))
+
+        offsets = np.zeros(len(term_docs) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(docs) for docs in term_docs])
+        postings = np.empty(offsets[-1], dtype=np.uint32)
+        freqs = np.empty(offsets[-1], dtype=np.uint16)
+        for term_no, docs in enumerate(term_docs):
+            start, end = offsets[term_no], offsets[term_no + 1]
+            postings[start:end], freqs[start:end] = zip(*docs)
+        return cls(ids, vocab, offsets, postings, freqs, doc_lens)
+
+    def save(self, path):
+        # 중간에 죽어도 기존 인덱스가 깨지지 않도록 임시 파일에 쓰고 교체
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            vocab=np.array(json.dumps(self.vocab, ensure_ascii=False)),
+            offsets=self.offsets,
+            postings=self.postings,
+            freqs=self.freqs,
+            doc_lens=self.doc_lens,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["ids"].tolist(),
+                json.loads(str(data["vocab"])),
+                data["offsets"],
+                data["postings"],
+                data["freqs"],
+                data["doc_lens"],
+            )
+
+    @classmethod
+    def from_db(cls, db_path):
+        """db_path 안에 키워드 인덱스가 있으면 불러오고, 없으면 None"""
+        path = os.path.join(db_path, LEXICAL_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        return cls.load(path)
+
+    def search(self, query, k=20):
+        """BM25 상위 k개 (청크 ID, 점수) 리스트"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term, qf in Counter(tokenize(query)).items():
+            term_no = self.vocab.get(term)
+            if term_no is None:
+                continue
+            start, end = self.offsets[term_no], self.offsets[term_no + 1]
+            docs = self.postings[start:end]
+            tf = self.freqs[start:end].astype(np.float32)
+            scores[docs] += qf * self.idf[term_no] * tf * (self.k1 + 1) / (tf + self._norm[docs])
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in hits]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def build_from_collection(collection, batch_size=5000):
+    """Chroma 컬렉션에 저장된 모든 청크로 키워드 인덱스 생성"""
+    ids, texts, metadatas = [], [], []
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        ids.extend(batch["ids"])
+        texts.extend(batch["documents"])
+        metadatas.extend(batch["metadatas"])
+    return LexicalIndex.build(ids, texts, metadatas)
+
+
+def reciprocal_rank_fusion(rankings, k=60, limit=None):
+    """
+    여러 검색 결과(ID 순위 리스트)를 RRF로 합침: score(d) = sum 1 / (k + rank).
+    점수 스케일이 다른 BM25와 벡터 검색을 순위만으로 섞을 수 있음.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    fused = sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
+    return fused[:limit] if limit else fused
@@ -0,0 +1,278 @@
+import os
+import re
+import unicodedata
+
+import pandas as pd
+
+from tracing import logger
+
+CSV_PATH = "./data/raw/data_full.csv"
+
+# CSV 컬럼 -> 청크 메타데이터 키 (db_maker.py와 같은 이름 사용)
+FIELD_COLUMNS = {
+    "notice_no": "공고 번호",
+    "project_name": "사업명",
+    "budget": "사업 금액",
+    "agency": "발주 기관",
+}
+
+
+def normalize_name(text):
+    """이름 비교용 정규화: 유니코드 정규화 + 소문자 + 공백/문장부호 제거"""
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    return re.sub(r"[\s\W_]+", "", text)
+
+
+def _strip_note(text):
+    # "한국철도공사 (용역)" -> "한국철도공사"
+    return re.sub(r"\(.*?\)", "", str(text)).strip()
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)} or ({text} if text else set())
+
+
+def _core_name(record):
+    # "2024년 한국철도공사 차세대 ERP 구축 사업" -> "차세대erp구축사업"
+    name = re.sub(r"(19|20)\d{2}\s*(년도|년)?", "", record["project_name"])
+    agency = _strip_note(record["agency"])
+    if agency:
+        name = name.replace(agency, "")
+    return normalize_name(name) or normalize_name(record["project_name"])
+
+
+# 단순 필드 조회 질문 허용 목록: 사업명/공고번호를 뺀 나머지(정규화, 공백 없음)가 통째로 이 형태일 때만 템플릿으로 답함
+# "예산은 얼마야?", "의 발주기관은?", "공고 예산 알려줘" 처럼 필드 이름 + 조사 + 묻는 말만 있는 경우
+# ("예산 편성 근거는?", "예산은 부가세 포함이야?", "발주기관 주소는?" 같이 다른 말이 붙으면 전체 그래프로 넘김)
+_FIELD_LEAD = r"(공고)?(의|에서|에|은|는)?"
+_FIELD_PARTICLE = r"(은|는|이|가|을|를|이랑|좀)?"
+_FIELD_ASK = (
+    r"(얼마|얼마야|얼마예요|얼마에요|얼마인가요|얼마임|얼마지|얼마나돼|어떻게돼|어떻게되나요|어디|어디야|어디예요|어디에요|어디인가요"
+    r"|뭐야|뭐예요|뭐에요|뭔가요|뭐지|무엇인가요|무엇|몇번|몇번이야|이야|야|예요|에요|인가요|했어|했나요|했지|한거야"
+    r"|알려줘|알려주세요|알려줄래|확인|궁금해|궁금합니다)*"
+)
+FIELD_WORDS = {
+    "budget": r"예산|예산액|사업비|사업금액|사업예산|금액|소요금액|추정가격|계약금액",
+    "notice_no": r"공고번호|공고no",
+    "agency": r"발주기관|발주처|발주한곳|발주한기관|주관기관|수요기관|어느기관|어디서발주|어디에서발주",
+}
+FIELD_QUESTION_PATTERNS = {
+    field: re.compile(f"{_FIELD_LEAD}({words}){_FIELD_PARTICLE}{_FIELD_ASK}") for field, words in FIELD_WORDS.items()
+}
+
+# 질문에 나온 연도 ("2023년 OO 사업"): 사업명에 없는 연도면 다른 해의 공고를 묻는 것일 수 있음
+_YEAR_RE = re.compile(r"(?<!\d)(?:19|20)\d{2}(?!\d)")
+
+FIELD_ANSWER_TEMPLATES = {
+    "budget": "**{project_name}**의 사업 금액(예산)은 **{budget}**입니다.",
+    "notice_no": "**{project_name}**의 공고번호는 **{notice_no}**입니다.",
+    "agency": "**{project_name}**의 발주기관은 **{agency}**입니다.",
+}
+
+
+def format_budget(value):
+    """CSV의 사업 금액(130000000.0) -> "130,000,000원" """
+    try:
+        return f"{int(float(str(value).replace(',', ''))):,}원"
+    except ValueError:
+        return str(value) or "정보없음"
+
+
+class MetadataIndex:
+    """
+    data_full.csv의 공고 메타데이터(공고번호, 사업명, 발주기관, 사업금액)를 질문에서 바로 찾을 수 있게 만든 인덱스.
+    """
+
+    def __init__(self, records):
+        self.records = records
+
+        self.projects = []    # (정규화된 사업명, 레코드)
+        self.agencies = {}    # 정규화된 기관명 -> [레코드...]
+        self.notice_nos = {}  # 정규화된 공고번호 -> 레코드
+        for record in records:
+            if record["project_name"]:
+                self.projects.append((normalize_name(record["project_name"]), record))
+            agency = normalize_name(_strip_note(record["agency"]))
+            if agency:
+                self.agencies.setdefault(agency, []).append(record)
+            notice_no = normalize_name(record["notice_no"])
+            if notice_no:
+                self.notice_nos[notice_no] = record
+
+        # 긴 이름부터 비교해서 "A 시스템 고도화"가 "A 시스템"보다 먼저 잡히도록 정렬
+        self.projects.sort(key=lambda item: len(item[0]), reverse=True)
+
+        # 사업명 퍼지 매칭용: 글자 2-gram -> 사업 번호 역색인
+        # 질문에서 자주 생략되는 연도/발주기관명은 빼고 핵심 이름만 사용
+        self._project_bigrams = [_bigrams(_core_name(record)) for _, record in self.projects]
+        self._bigram_postings = {}
+        for project_no, bigrams in enumerate(self._project_bigrams):
+            for bigram in bigrams:
+                self._bigram_postings.setdefault(bigram, []).append(project_no)
+
+    @classmethod
+    def from_csv(cls, csv_path=CSV_PATH):
+        if not os.path.exists(csv_path):
+            logger.warning(f"메타데이터 CSV({csv_path})를 찾을 수 없습니다. 메타데이터 인덱스 없이 동작합니다.")
+            return cls([])
+
+        meta_df = pd.read_csv(csv_path, encoding='utf-8').fillna('')
+        records = []
+        for _, row in meta_df.iterrows():
+            record = {key: str(row.get(column, "")).strip() for key, column in FIELD_COLUMNS.items()}
+            record["source"] = str(row.get("파일명", "")).strip()
+            records.append(record)
+        return cls(records)
+
+    def find_projects(self, question):
+        normalized = normalize_name(question)
+        return [record for name, record in self.projects if name and name in normalized]
+
+    def find_agencies(self, question):
+        normalized = normalize_name(question)
+        return [record for name, records in self.agencies.items() if name in normalized for record in records]
+
+    def find_notice_nos(self, question):
+        tokens = re.findall(r"[0-9A-Za-z][0-9A-Za-z\-]{5,}", question)
+        return [self.notice_nos[key] for key in map(normalize_name, tokens) if key in self.notice_nos]
+
+    def match_projects(self, question, min_score=0.75):
+        """
+        사업명 퍼지 매칭: 사업명의 글자 2-gram 중 질문에 들어 있는 비율(0~1)이 min_score 이상인 사업을 점수 순으로 반환.
+        띄어쓰기/연도/조사가 조금 달라도 ("2024 OO시스템 고도화 사업의" 등) 같은 사업으로 잡힘.
+        """
+        normalized = normalize_name(question)
+        overlap = {}
+        for bigram in _bigrams(normalized):
+            for project_no in self._bigram_postings.get(bigram, ()):
+                overlap[project_no] = overlap.get(project_no, 0) + 1
+
+        matches = []
+        for project_no, count in overlap.items():
+            score = count / len(self._project_bigrams[project_no])
+            if score >= min_score:
+                matches.append((score, self.projects[project_no][1]))
+        matches.sort(key=lambda item: item[0], reverse=True)
+        return matches
+
+    def lookup_field(self, question, min_score=0.75, margin=0.1):
+        """
+        "X 사업의 예산은 얼마야?" 같은 단순 필드 조회 질문이면 (필드, 레코드)를 반환하고, 아니면 None.
+        사업이 하나로 특정되고, 사업명을 뺀 나머지가 FIELD_QUESTION_PATTERNS 중 하나와 통째로 일치할 때만 판정합니다.
+        """
+        normalized = normalize_name(question)
+        notice_matches = self.find_notice_nos(question)
+        exact_matches = self._exact_projects(question)
+        if len(notice_matches) == 1:
+            record = notice_matches[0]
+            rest = normalized.replace(normalize_name(record["notice_no"]), "")
+        elif notice_matches:
+            return None
+        elif exact_matches:
+            # 사업명 전체가 질문에 그대로 있으면 퍼지 점수(연도/기관명을 뺀 핵심 이름)로 애매한지 따지지 않음
+            if len(exact_matches) > 1:
+                return None
+            record = exact_matches[0]
+            rest = normalized.replace(normalize_name(record["project_name"]), "")
+        else:
+            # 기준 미달 후보까지 모두 보고 애매한지 판단
+            matches = self.match_projects(question, min_score=0)
+            if not matches or matches[0][0] < min_score:
+                return None
+            # 비슷한 점수의 다른 사업이 있으면 (여러 사업을 묻거나 애매한 경우) 포기
+            if len(matches) > 1 and matches[0][0] - matches[1][0] < margin \
+                    and matches[1][1]["notice_no"] != matches[0][1]["notice_no"]:
+                return None
+            record = matches[0][1]
+            rest = self._strip_name_words(question, record)
+
+        # 사업명/공고번호를 뺀 나머지에 다른 사업이 또 나오면 (정확히든 퍼지로든) 여러 사업을 묻는 질문
+        if any(other["notice_no"] != record["notice_no"] for other in self._exact_projects(rest)):
+            return None
+        if any(other["notice_no"] != record["notice_no"] for _, other in self.match_projects(rest, min_score)):
+            return None
+        # 사업명에 없는 연도를 물으면 (2023년 OO 사업인데 CSV에는 2024년 공고뿐인 경우) 같은 사업이라고 단정하지 않음
+        if set(_YEAR_RE.findall(question)) - set(_YEAR_RE.findall(record["project_name"])):
+            return None
+
+        fields = [field for field, pattern in FIELD_QUESTION_PATTERNS.items() if pattern.fullmatch(rest)]
+        if notice_matches:
+            # 공고번호로 사업을 특정한 경우 "공고번호"라는 말은 조회 대상이 아님
+            fields = [field for field in fields if field != "notice_no"]
+        if len(fields) != 1:
+            return None
+        return fields[0], record
+
+    @staticmethod
+    def _strip_name_words(question, record):
+        """퍼지 매칭한 사업명에 해당하는 어절을 뺀 나머지 (필드 이름이 든 "사업비" 같은 어절은 남김)"""
+        name_bigrams = _bigrams(normalize_name(record["project_name"]))
+        rest = []
+        for word in question.split():
+            word = normalize_name(word)
+            bigrams = _bigrams(word)
+            if not bigrams:
+                continue
+            is_field = any(re.search(words, word) for words in FIELD_WORDS.values())
+            if is_field or len(bigrams & name_bigrams) / len(bigrams) < 0.5:
+                rest.append(word)
+        return "".join(rest)
+
+    def _exact_projects(self, question):
+        """질문에 사업명 전체가 들어 있는 공고 (다른 사업명의 일부로만 걸린 짧은 이름은 뺌, 같은 공고는 하나로)"""
+        normalized = normalize_name(question)
+        names = [name for name, _ in self.projects if name and name in normalized]
+        records = {}
+        for name, record in self.projects:
+            if name in names and not any(name != other and name in other for other in names):
+                records.setdefault(record["notice_no"] or name, record)
+        return list(records.values())
+
+    def search_filter(self, question, min_score=0.75, max_values=10):
+        """
+        질문에 특정 공고/사업/발주기관이 나오면 Chroma where 필터를 만들어 반환 (없으면 None).
+        공고번호 > 사업명(정확/퍼지) > 발주기관 순으로 가장 구체적인 것 하나만 사용합니다.
+        """
+        records = self.find_notice_nos(question)
+        if records:
+            return self._in_filter("notice_no", [record["notice_no"] for record in records], max_values)
+
+        records = self.find_projects(question) or [record for _, record in self.match_projects(question, min_score)]
+        if records:
+            return self._in_filter("project_name", [record["project_name"] for record in records], max_values)
+
+        records = self.find_agencies(question)
+        if records:
+            return self._in_filter("agency", [record["agency"] for record in records], max_values)
+        return None
+
+    @staticmethod
+    def _in_filter(key, values, max_values):
+        values = list(dict.fromkeys(value for value in values if value))
+        # 너무 많이 걸리면 특정 대상을 묻는 질문이 아니므로 필터를 쓰지 않음
+        if not values or len(values) > max_values:
+            return None
+        if len(values) == 1:
+            return {key: values[0]}
+        return {key: {"$in": values}}
+
+    def answer_field(self, question):
+        """단순 필드 조회 질문이면 (템플릿 답변, 근거 레코드), 아니면 None"""
+        found = self.lookup_field(question)
+        if found is None:
+            return None
+        field, record = found
+        values = {**record, "budget": format_budget(record["budget"]), "agency": _strip_note(record["agency"])}
+        return FIELD_ANSWER_TEMPLATES[field].format(**values), record
+
+    def targets(self, question, min_score=0.75):
+        """질문이 가리키는 공고번호/발주기관 집합 (사업명은 정확/퍼지 매칭한 공고의 공고번호로 바꿔서 비교)"""
+        records = self.find_notice_nos(question) + self.find_projects(question)
+        records += [record for _, record in self.match_projects(question, min_score)]
+        keys = {("notice_no", record["notice_no"] or record["project_name"]) for record in records}
+        keys.update(("agency", normalize_name(_strip_note(record["agency"]))) for record in self.find_agencies(question))
+        return frozenset(keys)
+
+    def mentions(self, question):
+        """질문에 CSV에 있는 사업명/공고번호/발주기관이 하나라도 나오는지"""
+        return bool(self.find_notice_nos(question) or self.find_projects(question) or self.find_agencies(question))
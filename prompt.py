@@ -59,4 +59,51 @@ generator_template_str = """
 질문: {question}
 답변:
 """
-GENERATOR_PROMPT = ChatPromptTemplate.from_template(generator_template_str)
\ No newline at end of file
+GENERATOR_PROMPT = ChatPromptTemplate.from_template(generator_template_str)
+
+# 4. 리랭크 (Rerank) 프롬프트
+# 문서 1개의 관련도를 0~10점으로 평가 (문서마다 동시에 호출)
+rerank_template_str = """
+너는 공고문 검색 결과를 재정렬하는 평가자다.
+
+아래 [문서]가 사용자의 질문에 얼마나 관련 있는지
+0점부터 10점 사이의 숫자로만 평가하라.
+다른 텍스트 금지.
+
+[평가 기준]
+- 0점: 거의 무관함
+- 5점: 부분적으로 관련 있음
+- 10점: 질문에 직접적으로 답이 됨
+
+[문서]
+{context}
+
+질문: {question}
+
+출력 형식:
+숫자 하나만 출력 (예: 7.5)
+"""
+RERANK_PROMPT = ChatPromptTemplate.from_template(rerank_template_str)
+
+# 5. 리스트 방식 리랭크 프롬프트
+# 번호 붙은 문서 여러 개를 한 번의 호출로 평가
+listwise_rerank_template_str = """
+너는 공고문 검색 결과를 재정렬하는 평가자다.
+
+아래 번호가 붙은 [문서]들이 각각 사용자의 질문에 얼마나 관련 있는지
+0점부터 10점 사이의 숫자로 평가하라.
+
+[평가 기준]
+- 0점: 거의 무관함
+- 5점: 부분적으로 관련 있음
+- 10점: 질문에 직접적으로 답이 됨
+
+[문서]
+{context}
+
+질문: {question}
+
+출력 형식:
+문서마다 한 줄씩 "번호: 점수"만 출력 (예: 1: 7.5)
+"""
+LISTWISE_RERANK_PROMPT = ChatPromptTemplate.from_template(listwise_rerank_template_str)
@@ -1,12 +1,30 @@
 import os
+import time
+import queue
+import asyncio
+import threading
+import numpy as np
 from typing import TypedDict, List, Dict, Any
 from dotenv import load_dotenv
 
 # LangChain 관련 임포트
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_chroma import Chroma
+# (langchain_openai, langchain_chroma, langgraph는 임포트만 수 초가 걸려서 BiddingAgent를 만들 때 임포트함)
+from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
-from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
+
+from embedding_cache import EmbeddingCache, CachedEmbeddings, RecentQueryEmbeddings, DEFAULT_CACHE_DIR
+from answer_cache import SemanticAnswerCache, get_index_version, normalize_question
+from metadata_index import MetadataIndex, CSV_PATH
+from intent_router import IntentRouter
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+from vector_index import MmapVectorIndex, MmapRetriever
+from context_packer import ContextPacker, DEFAULT_CONTEXT_TOKENS
+from relevance_gate import RelevanceGate
+from singleflight import SingleFlight
+from http_clients import openai_http_clients, warm_up as warm_up_http, awarm_up as awarm_up_http
+from reranker import LLMReranker, ListwiseReranker, LexicalReranker, arerank
+from tracing import Tracer, DEFAULT_TRACE_PATH, annotate, logger, setup_logging
 
 # 분리한 prompt.py에서 프롬프트 객체들 임포트
 from prompt import ROUTER_PROMPT, GRADER_PROMPT, GENERATOR_PROMPT
@@ -15,32 +33,165 @@ from prompt import ROUTER_PROMPT, GRADER_PROMPT, GENERATOR_PROMPT
 load_dotenv()
 
 class BiddingAgent:
-    def __init__(self, db_path="./chroma_db_chunk500", model_heavy="gpt-5", model_light="gpt-5-mini"):
+    def __init__(self, db_path="./chroma_db_chunk500", model_heavy="gpt-5", model_light="gpt-5-mini", csv_path=CSV_PATH,
+                 embedding_cache_dir=DEFAULT_CACHE_DIR, answer_cache=True,
+                 answer_cache_threshold=0.95, answer_cache_ttl=3600, answer_cache_size=1000,
+                 speculative_retrieval=True, llm_heavy=None, llm_light=None, embeddings=None,
+                 trace_path=DEFAULT_TRACE_PATH, log_level=None,
+                 hybrid_retrieval=True, lexical_k=20, rrf_k=60, final_k=8, metadata_fast_lane=True,
+                 metadata_filter=True, min_filtered_hits=5, vector_backend="chroma",
+                 vector_quantization=None, context_token_budget=DEFAULT_CONTEXT_TOKENS,
+                 relevance_gate=True, rerank=None, rerank_candidates=20, rerank_keep=10, rerank_timeout=10.0,
+                 max_llm_calls=None, coalesce_requests=True, warm_up=False):
         """
         초기화: DB 로드, LLM 설정(Heavy & Light), 그래프(Workflow) 빌드
+        llm_heavy / llm_light / embeddings에 모델 객체를 넘기면 OpenAI 대신 그대로 사용 (벤치마크용 가짜 모델 등)
         """
+        # 진행 로그 + 요청별 트레이스(JSONL) + Prometheus 메트릭
+        setup_logging(log_level)
+        self.tracer = Tracer(trace_path)
+        
+        from langchain_chroma import Chroma
+        if llm_heavy is None or llm_light is None or embeddings is None:
+            from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+        # 모든 OpenAI 모델 클라이언트가 프로세스 공유 커넥션 풀(keep-alive, 가능하면 HTTP/2)을 함께 씀
+        # max_llm_calls: 두 LLM을 합쳐 동시에 진행되는 호출 수 상한 (넘으면 슬롯이 빌 때까지 대기, None이면 제한 없음)
+        self.max_llm_calls = max_llm_calls
+        llm_http_clients = openai_http_clients(max_llm_calls)
+
         # 모델 이원화
-        self.llm_heavy = ChatOpenAI(model=model_heavy, temperature=0)
-        self.llm_light = ChatOpenAI(model=model_light, temperature=0)
+        self.llm_heavy = llm_heavy or ChatOpenAI(model=model_heavy, temperature=0, **llm_http_clients)
+        self.llm_light = llm_light or ChatOpenAI(model=model_light, temperature=0, **llm_http_clients)
         
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.embeddings = embeddings or OpenAIEmbeddings(model="text-embedding-3-small", **openai_http_clients())
+        # 같은 질문은 다시 임베딩하지 않도록 db_maker.py와 같은 디스크 캐시 사용 (None이면 캐시 끔)
+        if embedding_cache_dir:
+            self.embeddings = CachedEmbeddings(self.embeddings, EmbeddingCache(embedding_cache_dir))
+        # 답변 캐시 조회와 검색이 같은 질문 임베딩을 나눠 씀 (요청당 질문 임베딩 1번)
+        self.embeddings = RecentQueryEmbeddings(self.embeddings)
         
+        # 질문에 나온 사업/공고/기관 (답변 캐시가 다른 사업 질문의 답을 돌려주지 않도록 비교에 사용)
+        self.metadata_index = MetadataIndex.from_csv(csv_path)
+        
+        # 답변 캐시: 표현만 다른 같은 질문은 그래프를 다시 돌리지 않음 (인덱스가 바뀌면 자동으로 비워짐)
+        self.db_path = db_path
+        self.answer_cache = None
+        if answer_cache:
+            self.answer_cache = SemanticAnswerCache(
+                self.embeddings,
+                threshold=answer_cache_threshold,
+                ttl=answer_cache_ttl,
+                max_entries=answer_cache_size,
+                scope=self.metadata_index.targets,
+            )
+
+        # 요청 합치기: 같은 질문(정규화 기준, 같은 인덱스 버전)이 처리 중이면 그래프를 다시 돌리지 않고 그 결과/토큰을 함께 받음
+        self.single_flight = SingleFlight() if coalesce_requests else None
+
+        # 로컬 의도 분류기: 확실한 질문은 LLM 라우터 호출 없이 바로 판정
+        self.intent_router = IntentRouter(self.metadata_index)
+        # 메타데이터 패스트 레인: "X 사업 예산은?" 같은 단순 조회는 그래프/LLM 없이 CSV 값으로 바로 답변
+        self.metadata_fast_lane = metadata_fast_lane
+
         # DB 연결
         if not os.path.exists(db_path):
-            print(f"경고: {db_path}를 찾을 수 없습니다. 현재 위치: {os.getcwd()}")
+            logger.warning(f"경고: {db_path}를 찾을 수 없습니다. 현재 위치: {os.getcwd()}")
             
         self.vectorstore = Chroma(persist_directory=db_path, embedding_function=self.embeddings)
-        self.retriever = self.vectorstore.as_retriever(
-            search_type="mmr",
-            search_kwargs={
-                "k": 20,
-                "fetch_k" : 50,
-                "lambda_mult": 0.85 
-            } 
-        )
+        search_kwargs = {
+            "k": 20,
+            "fetch_k" : 50,
+            "lambda_mult": 0.85 
+        }
+        
+        # 검색 백엔드: "chroma"(기본) 또는 "mmap"(db_maker.py가 내보낸 NumPy 메모리 매핑 행렬 + 행렬 연산 MMR)
+        # mmap은 vector_quantization="float16"/"int8"로 양자화 행렬에서 후보를 찾고 fetch_k개만 float32로 재채점
+        vector_index = None
+        if vector_backend == "mmap":
+            vector_index = MmapVectorIndex.from_db(db_path, vector_quantization, rescore_k=search_kwargs["fetch_k"])
+        if vector_backend == "mmap" and vector_index is None:
+            logger.warning(f"경고: {db_path}에 mmap 벡터 인덱스가 없습니다. Chroma 검색을 사용합니다. (db_maker.py를 다시 실행하세요)")
+        if vector_index is not None:
+            self.retriever = MmapRetriever(
+                index=vector_index, embeddings=self.embeddings, search_type="mmr", search_kwargs=search_kwargs
+            )
+        else:
+            self.retriever = self.vectorstore.as_retriever(search_type="mmr", search_kwargs=search_kwargs)
+        self.vector_backend = "mmap" if vector_index is not None else "chroma"
+        
+        # 하이브리드 검색: db_maker.py가 만든 BM25 키워드 인덱스 결과를 벡터 검색 결과와 RRF로 합침
+        # (공고번호/기관명/사업명처럼 정확히 일치해야 하는 질문을 벡터 검색이 놓치는 경우 보완)
+        self.lexical_index = LexicalIndex.from_db(db_path) if hybrid_retrieval else None
+        if hybrid_retrieval and self.lexical_index is None:
+            logger.warning(f"경고: {db_path}에 키워드 인덱스가 없습니다. 벡터 검색만 사용합니다. (db_maker.py를 다시 실행하세요)")
+        self.lexical_k = lexical_k
+        self.rrf_k = rrf_k
+        
+        # 최종 청크 수: 벡터(k=20) + 키워드 후보를 합친 뒤 상위 final_k개만 채점/생성 모델에 넘김
+        # (리랭크를 쓰면 리랭커가 고를 후보 rerank_candidates개를 넘기고, 생성에는 rerank_keep개만 들어감)
+        self.final_k = final_k
+        
+        # 메타데이터 필터: 질문에 특정 공고/사업/기관이 나오면 해당 청크 안에서만 검색
+        # (필터 검색 결과가 min_filtered_hits개 미만이면 전체 검색으로 되돌아감)
+        self.metadata_filter = metadata_filter
+        self.min_filtered_hits = min_filtered_hits
+        
+        # 투기적 검색: 라우터 판정을 기다리지 않고 검색을 동시에 시작 (bid가 아니면 검색 태스크를 취소)
+        self.speculative_retrieval = speculative_retrieval
+        
+        # 관련성 게이트: 검색 유사도가 확실히 높거나 낮으면 채점 LLM 호출 없이 판정
+        # (relevance_gate.py로 학습한 임계값이 DB 폴더에 없으면 항상 LLM 채점)
+        self.relevance_gate = RelevanceGate.from_db(db_path) if relevance_gate else None
+        # 검색 결과의 유사도 점수는 게이트가 있을 때만 계산 (relevance_gate.py 학습 때는 게이트 없이 켬)
+        self.score_retrieval = self.relevance_gate is not None
+        
+        # 리랭크(선택): grade와 generate 사이에서 후보를 다시 채점해 상위 rerank_keep개만 남김
+        # "llm"(문서별 동시 호출), "listwise"(한 번의 호출), "lexical"(로컬 토큰 일치도, 네트워크 없음)
+        self.reranker = self._make_reranker(rerank, rerank_timeout)
+        self.rerank_mode = rerank
+        self.rerank_candidates = rerank_candidates
+        self.rerank_keep = rerank_keep
+        self.retrieve_k = max(final_k, rerank_candidates) if self.reranker is not None else final_k
+        
+        # 컨텍스트 패킹: 겹치는 청크를 합치고 공고별 머리말을 한 번만 넣어 토큰 예산 안으로 압축 (None이면 청크를 그대로)
+        self.context_packer = ContextPacker(max_tokens=context_token_budget) if context_token_budget else None
         
         self.app_workflow = self._build_graph()
 
+        # 동기 API(get_answer, stream_answer 등)가 비동기 구현을 실행할 전용 이벤트 루프 (처음 쓸 때 만듦)
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+        # 워밍업(선택): 첫 질문이 커넥션 설정/인덱스 로딩 비용을 내지 않도록 미리 한 번 실행
+        if warm_up:
+            self.warm_up()
+
+    def warm_up(self, query="입찰 공고 사업 예산"):
+        """OpenAI 커넥션을 미리 열고, 벡터/키워드 인덱스를 한 번 검색해 메모리(페이지 캐시)에 올림. 실패해도 경고만 남김"""
+        started = time.time()
+        warm_up_http()
+        # 동기 API의 LLM 호출은 전용 루프의 비동기 커넥션 풀을 쓰므로 그쪽도 열어 둠
+        self._run(awarm_up_http())
+        try:
+            self.retriever.invoke(query)
+            if self.lexical_index is not None:
+                self.lexical_index.search(query, 1)
+        except Exception as e:
+            logger.warning(f"인덱스 워밍업 실패: {e}")
+        logger.info(f"---워밍업 완료 ({time.time() - started:.2f}초)---")
+
+    def _make_reranker(self, mode, timeout):
+        if mode is None:
+            return None
+        if mode == "llm":
+            return LLMReranker(self.llm_light, self._format_docs, timeout=timeout)
+        if mode == "listwise":
+            return ListwiseReranker(self.llm_light, self._format_docs, timeout=timeout * 2)
+        if mode == "lexical":
+            return LexicalReranker(self.lexical_index)
+        raise ValueError(f"지원하지 않는 rerank 방식입니다: {mode} (llm, listwise, lexical 중 선택)")
+
     class GraphState(TypedDict):
         question: str
         context: List[Dict[str, Any]]
@@ -72,20 +223,73 @@ class BiddingAgent:
             
         return "\n\n".join(formatted_docs)
 
-    def _route_question(self, state):
-        print(f"---[1] 의도 파악 중 (Light Model): {state['question']}---")
+    async def _aroute_question(self, state):
+        decision = self.intent_router.classify(state['question'])
+        if decision is not None:
+            logger.info(f"---[1] 의도 파악 완료 (로컬 규칙): {decision}---")
+            return {"router_ok": decision == "bid"}
+            
+        return {"router_ok": await self._allm_route(state['question'])}
+
+    async def _allm_route(self, question):
+        logger.info(f"---[1] 의도 파악 중 (Light Model): {question}---")
         
         chain = ROUTER_PROMPT | self.llm_light | StrOutputParser()
-        category = chain.invoke({"question": state['question']}).lower()
+        category = (await chain.ainvoke({"question": question})).lower().strip()
+        self.intent_router.record_llm_decision(category)
         
-        return {"router_ok": category.strip() == "bid"}
+        return category == "bid"
 
-    def _retrieve(self, state):
-        print(f"---[2] 문서 검색 중: {state['question']}---")
-        docs = self.retriever.invoke(state['question'])
+    async def _aroute_and_retrieve(self, state):
+        # 로컬 규칙으로 바로 판정되면 기다릴 LLM 호출이 없으므로 순서대로 처리
+        decision = self.intent_router.classify(state['question'])
+        if decision is not None:
+            logger.info(f"---[1] 의도 파악 완료 (로컬 규칙): {decision}---")
+            if decision != "bid":
+                return {"router_ok": False}
+            return {"router_ok": True, **(await self._atraced_retrieve(state))}
+            
+        # 애매한 질문: 검색은 라우터 결과와 무관하므로 먼저 태스크로 시작해 두고 LLM 라우터 판정을 기다림
+        # (태스크는 현재 컨텍스트를 복사하므로 트레이스가 이어짐, 라우터가 거절하면 검색을 실제로 취소)
+        task = asyncio.create_task(self._atraced_retrieve(state))
+        try:
+            router_ok = await self._allm_route(state['question'])
+        except BaseException:
+            task.cancel()
+            raise
         
-        context = []
+        if not router_ok:
+            task.cancel()
+            return {"router_ok": False}
+            
+        return {"router_ok": True, **(await task)}
+
+    async def _atraced_retrieve(self, state):
+        # 라우터 노드 안에서 검색하므로 로컬 판정/선행 검색 어느 경로든 retrieve 스팬을 따로 남김
+        with self.tracer.span("retrieve"):
+            return await self._aretrieve(state)
+
+    def _similarity_scores(self, query_vector, docs):
+        """질문과 각 청크 임베딩의 코사인 유사도 (청크 임베딩은 Chroma에서 ID로 가져옴)"""
+        if not docs:
+            return []
+        found = self.vectorstore._collection.get(ids=[doc.id for doc in docs], include=["embeddings"])
+        vectors = dict(zip(found["ids"], found["embeddings"]))
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = []
         for doc in docs:
+            vector = vectors.get(doc.id)
+            if vector is None:
+                scores.append(None)
+                continue
+            vector = np.asarray(vector, dtype=np.float32)
+            scores.append(round(float(vector @ query / (np.linalg.norm(vector) or 1.0)), 4))
+        return scores
+
+    def _docs_to_context(self, docs, scores=None):
+        context = []
+        for doc, score in zip(docs, scores or [None] * len(docs)):
             # DB에서 꺼낼 때 메타데이터도 함께 딕셔너리에 담기
             context.append({
                 "content": doc.page_content,
@@ -93,96 +297,473 @@ class BiddingAgent:
                 "project_name": doc.metadata.get("project_name", "정보없음"),
                 "budget": doc.metadata.get("budget", "정보없음"),
                 "notice_no": doc.metadata.get("notice_no", "정보없음"),
-                "agency": doc.metadata.get("agency", "정보없음")
+                "agency": doc.metadata.get("agency", "정보없음"),
+                "page": doc.metadata.get("page"),
+                "start_index": doc.metadata.get("start_index"),
+                "score": score,
             })
-            
-        return {"context": context}
+        return context
 
-    def _grade_documents(self, state):
-        print(f"---[3] 문서 품질 채점 중 (Light Model)---")
-        
-        question = state['question']
-        docs = state['context']
+    def _lexical_search(self, question):
+        if self.lexical_index is None:
+            return []
+        return [doc_id for doc_id, _ in self.lexical_index.search(question, k=self.lexical_k)]
+
+    def _search_filter(self, question):
+        if not self.metadata_filter:
+            return None
+        return self.metadata_index.search_filter(question)
+
+    def _filtered_docs(self, where, docs):
+        """필터 검색 결과가 충분하면 그대로 쓰고, 부족하면 None (전체 검색으로 대체)"""
+        if len(docs) >= self.min_filtered_hits:
+            logger.info(f" -> 메타데이터 필터 적용: {where} ({len(docs)}개)")
+            annotate("metadata_filter", where)
+            return docs
+        logger.info(f" -> 메타데이터 필터 결과 부족({len(docs)}개), 전체 검색으로 대체")
+        return None
+
+    async def _avector_search(self, question):
+        where = self._search_filter(question)
+        if where is not None:
+            docs = self._filtered_docs(where, await self.retriever.ainvoke(question, filter=where))
+            if docs is not None:
+                return docs, where
+        return await self.retriever.ainvoke(question), None
+
+    def _fuse(self, vector_docs, lexical_ids, where=None):
+        """벡터 검색(MMR) 순위와 BM25 순위를 RRF로 합쳐 상위 retrieve_k개만 남김"""
+        if not lexical_ids:
+            # MMR은 앞에서부터 하나씩 고르므로 앞부분만 잘라도 k를 줄여 검색한 것과 같음
+            return vector_docs[:self.retrieve_k]
         
-        if not docs:
-            return {"doc_ok": False}
+        by_id = {doc.id: doc for doc in vector_docs}
+        if where is not None:
+            # 메타데이터 필터를 쓴 경우 키워드 검색 결과도 같은 조건을 만족하는 청크만 남김
+            found = self.vectorstore._collection.get(ids=lexical_ids, where=where, include=["documents", "metadatas"])
+            for doc_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+                by_id.setdefault(doc_id, Document(page_content=text, metadata=metadata or {}, id=doc_id))
+            allowed = set(found["ids"])
+            lexical_ids = [doc_id for doc_id in lexical_ids if doc_id in allowed]
         
-        # 단순 텍스트 결합 대신 _format_docs 사용하여 메타데이터 포함
-        # 상위 10개만 검사
-        doc_sample = self._format_docs(docs[:10])
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc in vector_docs], lexical_ids], k=self.rrf_k, limit=self.retrieve_k
+        )
         
-        chain = GRADER_PROMPT | self.llm_light | StrOutputParser()
-        score = chain.invoke({"question": question, "context": doc_sample}).lower()
+        # 키워드 검색에만 걸린 청크는 본문/메타데이터를 Chroma에서 ID로 가져옴
+        missing = [doc_id for doc_id in fused if doc_id not in by_id]
+        if missing:
+            found = self.vectorstore._collection.get(ids=missing, include=["documents", "metadatas"])
+            for doc_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+                by_id[doc_id] = Document(page_content=text, metadata=metadata or {}, id=doc_id)
         
-        is_relevant = "yes" in score
+        annotate("lexical_only_docs", len(missing))
+        return [by_id[doc_id] for doc_id in fused if doc_id in by_id]
+
+    async def _aretrieve(self, state):
+        logger.info(f"---[2] 문서 검색 중: {state['question']}---")
+        # 벡터 검색과 키워드 검색(CPU)을 동시에 수행
+        (docs, where), lexical_ids = await asyncio.gather(
+            self._avector_search(state['question']),
+            asyncio.to_thread(self._lexical_search, state['question']),
+        )
+        docs = await asyncio.to_thread(self._fuse, docs, lexical_ids, where)
+        annotate("retrieved_docs", len(docs))
+        if not self.score_retrieval:
+            return {"context": self._docs_to_context(docs)}
+        # 질문 벡터는 검색할 때 임베딩한 것을 메모리(RecentQueryEmbeddings)에서 다시 꺼냄
+        query_vector = await self.embeddings.aembed_query(state['question'])
+        scores = await asyncio.to_thread(self._similarity_scores, query_vector, docs)
+        return {"context": self._docs_to_context(docs, scores)}
+
+    def _grade_result(self, score):
+        is_relevant = "yes" in score.lower()
         
         if is_relevant:
-            print(" -> 관련성 있음 (통과)")
+            logger.info(" -> 관련성 있음 (통과)")
         else:
-            print(" -> 관련성 없음 (탈락)")
+            logger.info(" -> 관련성 없음 (탈락)")
             
         return {"doc_ok": is_relevant}
 
-    def _generate(self, state):
-        print(f"---[4] 최종 답변 생성 중 (Heavy Model)---")
+    def _gate(self, docs):
+        """관련성 게이트 판정: True/False면 LLM 채점 생략, None이면 LLM 채점"""
+        if self.relevance_gate is None:
+            return None
+        decision = self.relevance_gate.decide([doc["score"] for doc in docs if doc.get("score") is not None])
+        label = {True: "accept", False: "reject", None: "llm"}[decision]
+        annotate("relevance_gate", label)
+        self.tracer.metrics.inc("bidding_relevance_gate_total", decision=label)
+        if decision is not None:
+            logger.info(f"---[3] 문서 품질 판정 (유사도 게이트): {label}---")
+        return decision
+
+    async def _allm_grade(self, state):
+        # 단순 텍스트 결합 대신 _format_docs 사용하여 메타데이터 포함
+        # 상위 10개만 검사
+        doc_sample = self._format_docs(state['context'][:10])
+        
+        chain = GRADER_PROMPT | self.llm_light | StrOutputParser()
+        score = await chain.ainvoke({"question": state['question'], "context": doc_sample})
+        
+        return self._grade_result(score)["doc_ok"]
+
+    async def _agrade_documents(self, state):
+        docs = state['context']
+        
+        if not docs:
+            return {"doc_ok": False}
+        
+        decision = self._gate(docs)
+        if decision is not None:
+            return {"doc_ok": decision}
+        
+        logger.info(f"---[3] 문서 품질 채점 중 (Light Model)---")
+        return {"doc_ok": await self._allm_grade(state)}
+
+    def _rerank_result(self, docs, scores):
+        context = [{**doc, "rerank_score": score} for doc, score in zip(docs, scores)]
+        annotate("rerank_scored", sum(score is not None for score in scores))
+        logger.info(f" -> 리랭크 완료: {len(context)}개 선택")
+        return {"context": context}
+
+    async def _arerank_documents(self, state):
+        logger.info(f"---[3.5] 문서 rerank 중 ({self.rerank_mode})---")
+        docs, scores = await arerank(self.reranker, state['question'], state['context'], self.rerank_candidates, self.rerank_keep)
+        return self._rerank_result(docs, scores)
+
+    def _context_text(self, docs):
+        """생성 모델에 넣을 참고문서 텍스트 (패킹 사용 시 토큰 예산 안으로 압축)"""
+        if self.context_packer is None:
+            return self._format_docs(docs)
+        
+        text, tokens, segments = self.context_packer.pack(docs)
+        logger.info(f" -> 컨텍스트 패킹: 청크 {len(docs)}개 -> 구간 {segments}개, {tokens} 토큰")
+        annotate("context_tokens", tokens)
+        return text
+
+    async def _agenerate(self, state):
+        logger.info(f"---[4] 최종 답변 생성 중 (Heavy Model)---")
         question = state['question']
         
-        # _format_docs 사용하여 예산/사업명 정보가 포함된 텍스트 전달
-        context_text = self._format_docs(state['context'])
+        # 예산/사업명 정보가 포함된 텍스트 전달 (겹치는 청크는 합치고 토큰 예산 안으로)
+        context_text = self._context_text(state['context'])
+        annotate("context_chars", len(context_text))
         
         chain = GENERATOR_PROMPT | self.llm_heavy | StrOutputParser()
-        response = chain.invoke({"context": context_text, "question": question})
+        response = await chain.ainvoke({"context": context_text, "question": question})
         
         return {"answer": response}
 
-    def _rewrite_query(self, state):
+    async def _arewrite_query(self, state):
         return {"answer": "죄송합니다. 저는 공고문 분석 전문가로서 사업 및 입찰과 관련된 질문에만 답변을 드릴 수 있습니다.\n(또는 관련 문서를 찾지 못했습니다.)"}
 
+    def _node(self, name, afunc):
+        # 노드별 소요 시간을 기록. 그래프는 항상 ainvoke/astream으로 실행하고, 동기 API는 이를 전용 루프에서 돌림
+        async def traced(state):
+            with self.tracer.span(name):
+                return await afunc(state)
+
+        return RunnableLambda(traced, name=name)
+
     def _build_graph(self):
+        from langgraph.graph import StateGraph, END
+
         workflow = StateGraph(self.GraphState)
         
-        workflow.add_node("router", self._route_question) 
-        workflow.add_node("retrieve", self._retrieve)
-        workflow.add_node("grade", self._grade_documents)
-        workflow.add_node("generate", self._generate)
-        workflow.add_node("fallback", self._rewrite_query)
+        if self.speculative_retrieval:
+            # router 노드가 검색까지 동시에 수행하므로 retrieve 노드 없이 바로 grade로 감
+            workflow.add_node("router", self._node("router", self._aroute_and_retrieve))
+        else:
+            workflow.add_node("router", self._node("router", self._aroute_question))
+            workflow.add_node("retrieve", self._node("retrieve", self._aretrieve))
+        workflow.add_node("grade", self._node("grade", self._agrade_documents))
+        if self.reranker is not None:
+            workflow.add_node("rerank", self._node("rerank", self._arerank_documents))
+        workflow.add_node("generate", self._node("generate", self._agenerate))
+        workflow.add_node("fallback", self._node("fallback", self._arewrite_query))
         
         workflow.set_entry_point("router")
         
-        workflow.add_conditional_edges(
-            "router",
-            lambda x: "retrieve" if x["router_ok"] else "fallback",
-            {"retrieve": "retrieve", "fallback": "fallback"}
-        )
-        
-        workflow.add_edge("retrieve", "grade")
+        if self.speculative_retrieval:
+            workflow.add_conditional_edges(
+                "router",
+                lambda x: "grade" if x["router_ok"] else "fallback",
+                {"grade": "grade", "fallback": "fallback"}
+            )
+        else:
+            workflow.add_conditional_edges(
+                "router",
+                lambda x: "retrieve" if x["router_ok"] else "fallback",
+                {"retrieve": "retrieve", "fallback": "fallback"}
+            )
+            
+            workflow.add_edge("retrieve", "grade")
         
+        # 리랭크를 쓰면 grade 통과 후 rerank를 거쳐 generate로 감
+        after_grade = "rerank" if self.reranker is not None else "generate"
         workflow.add_conditional_edges(
             "grade", 
-            lambda x: "generate" if x["doc_ok"] else "fallback", 
-            {"generate": "generate", "fallback": "fallback"}
+            lambda x: after_grade if x["doc_ok"] else "fallback", 
+            {after_grade: after_grade, "fallback": "fallback"}
         )
+        if self.reranker is not None:
+            workflow.add_edge("rerank", "generate")
         
         workflow.add_edge("generate", END)
         workflow.add_edge("fallback", END)
         
         return workflow.compile()
 
-    def get_answer(self, question: str):
-        inputs = {"question": question}
-        result = self.app_workflow.invoke(inputs)
+    def _run_config(self):
+        # 그래프 안의 모든 LLM 호출 토큰 사용량을 트레이스에 기록
+        return {"callbacks": [self.tracer.callback]}
+
+    def _metadata_answer(self, question):
+        """단순 필드 조회(예산/공고번호/발주기관) 질문이면 CSV 값으로 만든 (답변, 참고 문서), 아니면 None"""
+        if not self.metadata_fast_lane:
+            return None
+        found = self.metadata_index.answer_field(question)
+        if found is None:
+            return None
         
+        answer, record = found
+        logger.info(f"---[0] 메타데이터 바로 답변: {record['project_name']}---")
+        context = [{
+            "content": (
+                f"공고번호: {record['notice_no']}\n사업명: {record['project_name']}\n"
+                f"사업 금액: {record['budget']}\n발주기관: {record['agency']}"
+            ),
+            "source": record["source"] or "data_full.csv",
+            "project_name": record["project_name"],
+            "budget": record["budget"],
+            "notice_no": record["notice_no"],
+            "agency": record["agency"],
+        }]
+        return answer, context
+
+    def _flight_key(self, kind, question, index_version):
+        return (kind, normalize_question(question), index_version)
+
+    def _mark_coalesced(self, trace, coalesced):
+        if coalesced:
+            logger.info(f"---[0] 같은 질문이 처리 중이라 그 결과를 함께 받습니다: {trace.question}---")
+            trace.set("coalesced", True)
+            self.tracer.metrics.inc("bidding_coalesced_requests_total")
+
+    async def _ainvoke_graph(self, trace, question, index_version):
+        run = lambda: self.app_workflow.ainvoke({"question": question}, config=self._run_config())
+        if self.single_flight is None:
+            return await run()
+        result, coalesced = await self.single_flight.ado(self._flight_key("invoke", question, index_version), run)
+        self._mark_coalesced(trace, coalesced)
+        return result
+
+    def _astream_graph(self, trace, question, index_version):
+        """(mode, payload) 그래프 스트림 이벤트. 합쳐진 요청은 리더 실행의 이벤트를 처음부터 그대로 받음"""
+        run = lambda: self.app_workflow.astream(
+            {"question": question}, config=self._run_config(), stream_mode=["messages", "updates"]
+        )
+        if self.single_flight is None:
+            return run()
+        events, coalesced = self.single_flight.astream(self._flight_key("stream", question, index_version), run)
+        self._mark_coalesced(trace, coalesced)
+        return events
+
+    def _finish_result(self, trace, result):
         answer = result.get('answer', '')
-        
+        context = self._result_context(result, answer)
+        trace.set("outcome", "answered" if context else "fallback")
+        return answer, context
+
+    # 동기 API: 비동기 구현을 전용 이벤트 루프(스레드 하나)에서 실행
+    # 루프를 계속 재사용하므로 OpenAI 비동기 커넥션 풀과 동시 호출 제한(max_llm_calls)도 모든 동기 호출이 함께 씀
+    def _sync_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="bidding-agent-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _run(self, coro):
+        """코루틴을 전용 루프에서 실행하고 결과를 기다림 (호출한 쪽이 중단되면 코루틴도 취소)"""
+        loop = self._sync_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("에이전트 이벤트 루프 안에서는 비동기 API(aget_answer 등)를 사용하세요.")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result()
+        finally:
+            future.cancel()
+
+    def _iterate(self, agen):
+        """async generator를 전용 루프의 태스크 하나에서 끝까지 돌리며 항목을 동기 이터레이터로 전달"""
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(("item", item))
+            except BaseException as e:
+                items.put(("error", e))
+                raise
+            items.put(("done", None))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._sync_loop())
+        try:
+            while True:
+                kind, value = items.get()
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+        finally:
+            # 소비자가 중간에 멈추면 생성 중인 그래프 실행도 취소
+            future.cancel()
+
+    def get_answer(self, question: str):
+        return self._run(self.aget_answer(question))
+
+    async def aget_answer(self, question: str):
+        """질문 1건 처리: 메타데이터 바로 답변 -> 답변 캐시 -> 그래프. (답변, 참고 문서 리스트)를 반환"""
+        with self.tracer.request(question) as trace:
+            fast = self._metadata_answer(question)
+            if fast is not None:
+                trace.set("outcome", "metadata")
+                return fast
+
+            index_version = get_index_version(self.db_path)
+            if self.answer_cache is not None:
+                cached = await self.answer_cache.alookup(question, index_version)
+                if cached is not None:
+                    logger.info(f"---[0] 답변 캐시 히트: {question}---")
+                    trace.set("outcome", "cache_hit")
+                    return cached
+
+            result = await self._ainvoke_graph(trace, question, index_version)
+            answer, context = self._finish_result(trace, result)
+
+            if self.answer_cache is not None:
+                await self.answer_cache.astore(question, index_version, answer, context)
+
+            return answer, context
+
+    def _result_context(self, result, answer):
+        # 라우터/채점에서 탈락했거나 안내 문구로 끝난 경우 참고 문서는 보여주지 않음
         if (not result.get("router_ok", True)) or \
            (not result.get("doc_ok", True)) or \
            "죄송합니다" in answer:
-            return answer, [] 
-            
-        return answer, result.get('context', [])
-    
+            return []
+        return result.get('context', [])
+
+    def stream_answer(self, question: str):
+        """
+        get_answer의 스트리밍 버전.
+        generate 노드의 답변 토큰(str)을 생성되는 대로 yield하고, 마지막에 참고 문서 리스트(list)를 한 번 yield합니다.
+        """
+        return self._iterate(self.astream_answer(question))
+
+    async def astream_answer(self, question: str):
+        """stream_answer의 비동기 버전 (async generator, 답변 토큰들 -> 참고 문서 리스트)"""
+        with self.tracer.request(question) as trace:
+            fast = self._metadata_answer(question)
+            if fast is not None:
+                trace.set("outcome", "metadata")
+                yield fast[0]
+                yield fast[1]
+                return
+
+            index_version = get_index_version(self.db_path)
+            if self.answer_cache is not None:
+                cached = await self.answer_cache.alookup(question, index_version)
+                if cached is not None:
+                    logger.info(f"---[0] 답변 캐시 히트: {question}---")
+                    trace.set("outcome", "cache_hit")
+                    yield cached[0]
+                    yield cached[1]
+                    return
+
+            result = {}
+            streamed = []
+            async for mode, payload in self._astream_graph(trace, question, index_version):
+                token = self._stream_event(mode, payload, result)
+                if token:
+                    if not streamed:
+                        trace.set("first_token_ms", round((time.time() - trace.started) * 1000, 2))
+                    streamed.append(token)
+                    yield token
+
+            answer, context = self._finish_result(trace, result)
+            if not streamed:
+                # fallback 안내 문구처럼 LLM이 만들지 않은 답변은 한 번에 내보냄
+                yield answer
+
+            if self.answer_cache is not None:
+                await self.answer_cache.astore(question, index_version, answer, context)
+
+            yield context
+
+    def _stream_event(self, mode, payload, result):
+        """스트림 이벤트 1개 처리: 노드 결과는 result에 모으고, 답변 토큰이면 반환"""
+        if mode == "messages":
+            # 라우터/채점 LLM 토큰은 빼고 최종 답변(generate 노드) 토큰만 내보냄
+            chunk, metadata = payload
+            if metadata.get("langgraph_node") == "generate" and isinstance(chunk.content, str):
+                return chunk.content
+            return None
+        
+        for update in payload.values():
+            if update:
+                result.update(update)
+        return None
+
+    def get_metrics_text(self):
+        """Prometheus 텍스트 형식 메트릭 (요청 수, 노드별 지연 히스토그램, 토큰 사용량 등)"""
+        return self.tracer.metrics.render()
+
+    def get_config(self):
+        """답변에 영향을 주는 파이프라인 설정 (평가 결과 재사용 여부 판단 등에 사용)"""
+        return {
+            "db_path": self.db_path,
+            "index_version": get_index_version(self.db_path),
+            "model_heavy": self.llm_heavy.model_name,
+            "model_light": self.llm_light.model_name,
+            "vector_backend": self.vector_backend,
+            "vector_quantization": getattr(self.retriever, "index", None) and self.retriever.index.quantization,
+            "search_type": self.retriever.search_type,
+            "search_kwargs": self.retriever.search_kwargs,
+            "speculative_retrieval": self.speculative_retrieval,
+            "hybrid_retrieval": self.lexical_index is not None,
+            "lexical_k": self.lexical_k,
+            "rrf_k": self.rrf_k,
+            "final_k": self.final_k,
+            "metadata_fast_lane": self.metadata_fast_lane,
+            "context_token_budget": self.context_packer.max_tokens if self.context_packer else None,
+            "relevance_gate": self.relevance_gate.to_dict() if self.relevance_gate else None,
+            "rerank": self.rerank_mode,
+            "rerank_candidates": self.rerank_candidates,
+            "rerank_keep": self.rerank_keep,
+            "metadata_filter": self.metadata_filter,
+            "min_filtered_hits": self.min_filtered_hits,
+            "prompts": [p.messages[0].prompt.template for p in (ROUTER_PROMPT, GRADER_PROMPT, GENERATOR_PROMPT)],
+        }
+
+    def get_router_stats(self):
+        """로컬 의도 분류기 판정 통계 (LLM 라우터 호출을 얼마나 아꼈는지)"""
+        return self.intent_router.get_stats()
+
     def ask_with_context(self, question):
-        answer, contexts = self.get_answer(question)
+        return self._run(self.ask_with_context_async(question))
+
+    async def ask_with_context_async(self, question):
+        answer, contexts = await self.aget_answer(question)
         # API 반환용으로는 content만 간략히 리스트로 줌
         context_texts = [doc['content'] for doc in contexts] if contexts else []
         return {
@@ -0,0 +1,140 @@
+import os
+import json
+import argparse
+
+import numpy as np
+
+from tracing import logger, setup_logging
+
+GATE_FILE = "relevance_gate.json"
+# 관련 없는 질문(relevant: false) 예시: test_data.json에는 관련 있는 질문만 있으므로 학습 때 함께 사용
+NEGATIVES_FILE = "relevance_negatives.json"
+
+
+class RelevanceGate:
+    """
+    검색 유사도 점수로 문서 채점(grade) LLM 호출을 건너뛰는 로컬 게이트.
+    - 1위 문서 코사인 유사도 >= accept_above: 관련 있음으로 바로 통과
+    - 1위 문서 코사인 유사도 <  reject_below: 관련 없음으로 바로 탈락
+    - 그 사이(애매한 구간)만 기존 LLM 채점기에 넘김 (None 반환)
+    임계값은 calibrate()로 라벨 파일(test_data.json 등)에서 학습해 DB 폴더에 저장합니다.
+    학습 데이터에는 관련 없는 질문(relevant: false, 공고와 무관한 질문 등)이 반드시 있어야 하며,
+    기본으로 NEGATIVES_FILE의 예시를 함께 씁니다.
+    """
+
+    def __init__(self, reject_below, accept_above):
+        self.reject_below = reject_below
+        self.accept_above = accept_above
+
+    def decide(self, scores):
+        """True(통과) / False(탈락) / None(LLM 채점 필요)"""
+        if not scores:
+            return False
+        top = max(scores)
+        if top >= self.accept_above:
+            return True
+        if top < self.reject_below:
+            return False
+        return None
+
+    @classmethod
+    def fit(cls, top_scores, labels, tolerance=0.02):
+        """
+        라벨(관련 있음/없음)이 붙은 질문들의 1위 유사도로 임계값 학습.
+        관련 있는 질문이 잘못 탈락하는 비율, 관련 없는 질문이 잘못 통과하는 비율이 각각 tolerance 이하가 되도록 잡습니다.
+        관련 없는 예시가 없으면 관련 없는 질문의 점수 분포를 알 수 없어 두 임계값 모두 정할 수 없으므로 학습하지 않습니다.
+        """
+        top_scores = np.asarray(top_scores, dtype=np.float64)
+        labels = np.asarray(labels, dtype=bool)
+        positives, negatives = top_scores[labels], top_scores[~labels]
+        if len(positives) == 0:
+            raise ValueError("관련 있는(relevant) 예시가 하나 이상 필요합니다.")
+        if len(negatives) == 0:
+            raise ValueError("관련 없는(relevant: false) 예시가 하나 이상 필요합니다. 공고와 무관한 질문에 라벨을 붙여 추가하세요.")
+
+        reject_below = float(np.quantile(positives, tolerance))
+        accept_above = float(np.quantile(negatives, 1 - tolerance)) + 1e-4
+        reject_below, accept_above = sorted((round(reject_below, 4), round(accept_above, 4)))
+        return cls(reject_below=reject_below, accept_above=accept_above)
+
+    def to_dict(self):
+        return {"reject_below": self.reject_below, "accept_above": self.accept_above}
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def from_db(cls, db_path):
+        """db_path 안에 학습된 임계값이 있으면 불러오고, 없으면 None (항상 LLM 채점)"""
+        path = os.path.join(db_path, GATE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def load_labeled(path):
+    """
+    라벨 파일을 (질문 리스트, 라벨 리스트)로 읽음. 두 형식을 받습니다.
+    - test_data.json 형식: {"question": [...], "relevant": [...]} ("relevant"는 생략 가능, 다른 키는 무시)
+    - 목록 형식: [{"question": "...", "relevant": true/false}, ...] ("relevant"는 생략 가능)
+    relevant가 없는 질문은 None (LLM 채점기 판정을 라벨로 사용)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+    if isinstance(raw_data, dict):
+        questions = raw_data["question"]
+        labels = raw_data.get("relevant") or [None] * len(questions)
+    else:
+        questions = [item["question"] for item in raw_data]
+        labels = [item.get("relevant") for item in raw_data]
+    return questions, labels
+
+
+def calibrate(agent, questions, labels, tolerance=0.02):
+    """질문마다 검색 -> 1위 유사도 계산, 라벨이 없으면 LLM 채점기로 라벨링한 뒤 임계값 학습"""
+    # 게이트 없이 만든 에이전트도 검색 결과에 유사도를 붙이도록 함
+    agent.score_retrieval = True
+    top_scores, final_labels = [], []
+    for question, label in zip(questions, labels):
+        state = {"question": question, **agent._run(agent._aretrieve({"question": question}))}
+        scores = [doc["score"] for doc in state["context"] if doc.get("score") is not None]
+        if label is None:
+            label = agent._run(agent._allm_grade(state))
+        top_scores.append(max(scores) if scores else 0.0)
+        final_labels.append(bool(label))
+        logger.info(f" -> [{'관련' if label else '무관'}] 1위 유사도 {top_scores[-1]:.4f}: {question}")
+
+    gate = RelevanceGate.fit(top_scores, final_labels, tolerance)
+    decisions = [gate.decide([score]) for score in top_scores]
+    skipped = sum(decision is not None for decision in decisions)
+    wrong = sum(decision is not None and decision != label for decision, label in zip(decisions, final_labels))
+    logger.info(f"임계값: {gate.to_dict()}")
+    logger.info(f"학습 데이터 기준 LLM 채점 생략 {skipped}/{len(questions)}건, 라벨과 다른 판정 {wrong}건")
+    return gate
+
+
+def main():
+    from rag_core import BiddingAgent
+
+    parser = argparse.ArgumentParser(description="검색 유사도 기반 관련성 게이트 임계값 학습")
+    parser.add_argument("--data", default="test_data.json", help="라벨 파일 (relevant 필드가 없으면 LLM 채점기로 라벨링, 형식은 load_labeled 참고)")
+    parser.add_argument("--negatives", default=NEGATIVES_FILE, help="함께 학습할 관련 없는 질문 파일 (빈 문자열이면 사용 안 함)")
+    parser.add_argument("--db-path", default="./chroma_db_chunk500")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="허용 오판정 비율")
+    args = parser.parse_args()
+
+    setup_logging()
+    agent = BiddingAgent(db_path=args.db_path, answer_cache=False, relevance_gate=False)
+    questions, labels = load_labeled(args.data)
+    if args.negatives:
+        negative_questions, negative_labels = load_labeled(args.negatives)
+        questions, labels = questions + negative_questions, labels + negative_labels
+    gate = calibrate(agent, questions, labels, args.tolerance)
+    gate.save(os.path.join(args.db_path, GATE_FILE))
+    logger.info(f"저장 완료: {os.path.join(args.db_path, GATE_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import re
+import asyncio
+
+from langchain_core.output_parsers import StrOutputParser
+
+from lexical_index import tokenize, document_text
+from prompt import RERANK_PROMPT, LISTWISE_RERANK_PROMPT
+
+_NUMBER_RE = re.compile(r"[-+]?\d*\.?\d+")
+_LISTWISE_RE = re.compile(r"(\d+)\s*[:：.)]\s*([-+]?\d*\.?\d+)")
+
+
+def _order(docs, scores, keep):
+    """
+    점수 내림차순으로 keep개 선택. 점수가 없는 문서(시간 초과/파싱 실패)는 점수 있는 문서 뒤에 원래 순서대로 둠.
+    """
+    ranked = sorted(
+        range(len(docs)),
+        key=lambda i: (scores[i] is None, -(scores[i] or 0.0), i),
+    )[:keep]
+    return [docs[i] for i in ranked], [scores[i] for i in ranked]
+
+
+class LLMReranker:
+    """
+    archive/cjh의 _rerank_documents를 옮긴 것. 문서마다 0~10점을 매기되 순차 호출 대신 동시에 호출하고,
+    호출마다 timeout을 걸어 느린 응답 하나가 전체를 붙잡지 않도록 합니다.
+    동시 호출 수(max_concurrency)는 요청마다 따로 제한하므로, 슬롯을 기다리는 두 번째 묶음도 자기 차례부터 timeout을 잽니다.
+    """
+
+    def __init__(self, llm, format_docs, timeout=10.0, max_concurrency=10):
+        self.chain = RERANK_PROMPT | llm | StrOutputParser()
+        self.format_docs = format_docs
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+
+    @staticmethod
+    def _parse(raw):
+        match = _NUMBER_RE.search(raw or "")
+        return float(match.group()) if match else None
+
+    def _inputs(self, question, docs):
+        return [{"question": question, "context": self.format_docs([doc])} for doc in docs]
+
+    def score(self, question, docs):
+        # 동기 호출도 같은 비동기 구현으로 처리 (이벤트 루프가 없는 스크립트용, 에이전트는 ascore를 씀)
+        return asyncio.run(self.ascore(question, docs))
+
+    async def ascore(self, question, docs):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(value):
+            async with semaphore:
+                # timeout은 슬롯을 얻은 뒤 호출 1건에만 적용
+                try:
+                    return self._parse(await asyncio.wait_for(self.chain.ainvoke(value), self.timeout))
+                except Exception:
+                    return None
+        return list(await asyncio.gather(*(one(value) for value in self._inputs(question, docs))))
+
+
+class ListwiseReranker:
+    """번호 붙인 후보 전체를 한 번의 LLM 호출로 평가 (호출 1번, 대신 프롬프트가 길어짐)"""
+
+    def __init__(self, llm, format_docs, timeout=20.0):
+        self.chain = LISTWISE_RERANK_PROMPT | llm | StrOutputParser()
+        self.format_docs = format_docs
+        self.timeout = timeout
+
+    def _input(self, question, docs):
+        # _format_docs가 붙이는 [참고문서 N] 번호를 그대로 점수 번호로 사용
+        return {"question": question, "context": self.format_docs(docs)}
+
+    @staticmethod
+    def _parse(raw, count):
+        scores = [None] * count
+        for number, value in _LISTWISE_RE.findall(raw or ""):
+            index = int(number) - 1
+            if 0 <= index < count:
+                scores[index] = float(value)
+        return scores
+
+    def score(self, question, docs):
+        return asyncio.run(self.ascore(question, docs))
+
+    async def ascore(self, question, docs):
+        try:
+            raw = await asyncio.wait_for(self.chain.ainvoke(self._input(question, docs)), self.timeout)
+        except Exception:
+            return [None] * len(docs)
+        return self._parse(raw, len(docs))
+
+
+class LexicalReranker:
+    """
+    네트워크 없이 도는 로컬 리랭커.
+    질문 토큰(한글 2-gram, 숫자/영문)이 청크 본문+메타데이터에 얼마나 들어 있는지(IDF 가중 비율)와
+    검색 유사도 점수를 섞어 0~10점으로 평가합니다.
+    """
+
+    def __init__(self, lexical_index=None, similarity_weight=0.3):
+        self.lexical_index = lexical_index
+        self.similarity_weight = similarity_weight
+
+    def _idf(self, term):
+        if self.lexical_index is None:
+            return 1.0
+        term_no = self.lexical_index.vocab.get(term)
+        # 인덱스에 없는 용어는 가장 드문 용어로 취급
+        return float(self.lexical_index.idf[term_no]) if term_no is not None else float(self.lexical_index.idf.max(initial=1.0))
+
+    def score(self, question, docs):
+        weights = {term: self._idf(term) for term in set(tokenize(question))}
+        total = sum(weights.values())
+        scores = []
+        for doc in docs:
+            if not total:
+                scores.append(None)
+                continue
+            terms = set(tokenize(document_text(doc.get("content", ""), doc)))
+            coverage = sum(weight for term, weight in weights.items() if term in terms) / total
+            similarity = doc.get("score") or 0.0
+            scores.append(round(10 * ((1 - self.similarity_weight) * coverage + self.similarity_weight * similarity), 4))
+        return scores
+
+    async def ascore(self, question, docs):
+        return self.score(question, docs)
+
+
+def rerank(reranker, question, docs, candidates=20, keep=10):
+    """상위 candidates개를 다시 채점해 keep개만 남김. (문서 리스트, 점수 리스트) 반환"""
+    docs = docs[:candidates]
+    return _order(docs, reranker.score(question, docs), keep)
+
+
+async def arerank(reranker, question, docs, candidates=20, keep=10):
+    docs = docs[:candidates]
+    return _order(docs, await reranker.ascore(question, docs), keep)
@@ -0,0 +1,211 @@
+"""
+BiddingAgent HTTP API 서버 (FastAPI + uvicorn).
+
+Streamlit(app.py) 없이 다른 서비스/로드밸런서 뒤에서 호출할 수 있는 서빙 모드입니다.
+- POST /answer         {"question": ...} -> {"answer", "context"} (get_answer)
+- POST /ask            {"question": ...} -> {"question", "answer", "contexts"} (ask_with_context)
+- POST /answer/stream  답변 토큰을 NDJSON 한 줄씩 {"token": ...}, 마지막 줄에 {"context": [...]}
+- GET  /healthz, GET /metrics (Prometheus 텍스트 형식)
+
+동시 처리 제어 (프로세스별):
+- BIDDING_API_MAX_CONCURRENCY개 요청만 동시에 에이전트를 실행하고, 나머지는 대기열에서 기다림
+- 대기열이 BIDDING_API_MAX_QUEUE개를 넘거나 BIDDING_API_QUEUE_TIMEOUT초 안에 차례가 오지 않으면 429 반환
+- BIDDING_API_MAX_LLM_CALLS: 동시에 진행되는 OpenAI LLM 호출 수 상한
+- BIDDING_API_WARM_UP=1(기본): 시작할 때 OpenAI 커넥션을 열고 인덱스를 한 번 읽어 둠
+
+멀티 프로세스: BIDDING_API_WORKERS개 uvicorn 워커가 각자 에이전트를 띄우고 같은 읽기 전용 DB 폴더를 씀
+(BIDDING_VECTOR_BACKEND=mmap이면 벡터 행렬이 OS 페이지 캐시로 워커 간에 공유됨)
+
+실행 예 (프로젝트 루트에서):
+    python server.py
+    uvicorn server:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import os
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from http_clients import awarm_up
+from tracing import logger
+
+DB_PATH = os.getenv("BIDDING_DB_PATH", "./chroma_db_chunk500")
+VECTOR_BACKEND = os.getenv("BIDDING_VECTOR_BACKEND", "chroma")
+HOST = os.getenv("BIDDING_API_HOST", "0.0.0.0")
+PORT = int(os.getenv("BIDDING_API_PORT", "8000"))
+WORKERS = int(os.getenv("BIDDING_API_WORKERS", "1"))
+MAX_CONCURRENCY = int(os.getenv("BIDDING_API_MAX_CONCURRENCY", "8"))
+MAX_QUEUE = int(os.getenv("BIDDING_API_MAX_QUEUE", "32"))
+QUEUE_TIMEOUT = float(os.getenv("BIDDING_API_QUEUE_TIMEOUT", "30"))
+MAX_LLM_CALLS = int(os.getenv("BIDDING_API_MAX_LLM_CALLS", "16"))
+WARM_UP = os.getenv("BIDDING_API_WARM_UP", "1") == "1"
+
+
+class Overloaded(Exception):
+    """대기열이 가득 찼거나 대기 시간이 초과된 경우"""
+
+
+class AdmissionController:
+    """
+    동시에 실행되는 요청 수(max_concurrency)와 대기 중인 요청 수(max_queue)를 제한.
+    자리가 날 때까지 queue_timeout초 기다리고, 대기열이 가득 찼거나 시간이 지나면 Overloaded를 던집니다.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self.running = 0
+        self._semaphore = None
+
+    async def acquire(self, metrics=None):
+        # 세마포어는 이벤트 루프 안에서 만들어야 하므로 첫 요청 때 생성
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise Overloaded("대기열이 가득 찼습니다.")
+
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded("대기 시간이 초과되었습니다.")
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        if metrics is not None:
+            metrics.observe("bidding_api_queue_seconds", time.perf_counter() - started)
+
+    def release(self):
+        self.running -= 1
+        self._semaphore.release()
+
+    def render(self):
+        return "\n".join([
+            f"bidding_api_running {self.running}",
+            f"bidding_api_waiting {self.waiting}",
+            f"bidding_api_max_concurrency {self.max_concurrency}",
+            f"bidding_api_max_queue {self.max_queue}",
+        ]) + "\n"
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    대기열 자리를 잡은 채로 보내는 스트리밍 응답. 응답을 다 보냈을 때뿐 아니라
+    헤더를 보내다 연결이 끊기거나(본문 제너레이터가 시작도 안 한 경우) 중간에 오류가 나도 자리를 한 번만 반납합니다.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._release()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
+class Question(BaseModel):
+    question: str
+
+
+def load_agent():
+    from rag_core import BiddingAgent
+    return BiddingAgent(
+        db_path=DB_PATH, vector_backend=VECTOR_BACKEND, max_llm_calls=MAX_LLM_CALLS, warm_up=WARM_UP
+    )
+
+
+def create_app(agent_factory=load_agent, admission=None, warm_up=WARM_UP):
+    """agent_factory: 워커 프로세스마다 한 번 호출되어 BiddingAgent를 만드는 함수 (테스트/벤치마크에서 교체 가능)"""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        logger.info(f"---API 서버: 에이전트 로딩 (pid={os.getpid()})---")
+        app.state.agent = await asyncio.to_thread(agent_factory)
+        if warm_up:
+            # 요청을 처리할 이벤트 루프의 비동기 커넥션 풀도 미리 열어 둠
+            await awarm_up()
+        yield
+
+    app = FastAPI(title="Bidding Mate API", lifespan=lifespan)
+    app.state.admission = admission or AdmissionController()
+
+    @app.exception_handler(Overloaded)
+    async def overloaded_handler(request: Request, exc: Overloaded):
+        request.app.state.agent.tracer.metrics.inc("bidding_api_rejected_total", path=request.url.path)
+        return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+    async def admit(request):
+        await request.app.state.admission.acquire(request.app.state.agent.tracer.metrics)
+
+    def check_question(body):
+        if not body.question.strip():
+            raise HTTPException(status_code=422, detail="질문이 비어 있습니다.")
+
+    @app.post("/answer")
+    async def answer(body: Question, request: Request):
+        check_question(body)
+        await admit(request)
+        try:
+            answer, context = await request.app.state.agent.aget_answer(body.question)
+        finally:
+            request.app.state.admission.release()
+        return {"answer": answer, "context": context}
+
+    @app.post("/ask")
+    async def ask(body: Question, request: Request):
+        check_question(body)
+        await admit(request)
+        try:
+            return await request.app.state.agent.ask_with_context_async(body.question)
+        finally:
+            request.app.state.admission.release()
+
+    @app.post("/answer/stream")
+    async def answer_stream(body: Question, request: Request):
+        check_question(body)
+        await admit(request)
+
+        async def events():
+            async for item in request.app.state.agent.astream_answer(body.question):
+                key = "context" if isinstance(item, list) else "token"
+                yield json.dumps({key: item}, ensure_ascii=False) + "\n"
+
+        # 스트림이 끝나거나 클라이언트가 끊을 때까지 자리를 잡고 있음 (반납은 응답 쪽에서 한 번만)
+        return AdmittedStreamingResponse(
+            events(), request.app.state.admission.release, media_type="application/x-ndjson"
+        )
+
+    @app.get("/healthz")
+    async def healthz(request: Request):
+        return {"status": "ok", "pid": os.getpid()}
+
+    @app.get("/metrics")
+    async def metrics(request: Request):
+        text = request.app.state.agent.get_metrics_text() + request.app.state.admission.render()
+        return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    # workers > 1이면 uvicorn이 프로세스를 나눠 띄우므로 앱을 "모듈:변수" 문자열로 넘겨야 함
+    uvicorn.run("server:app", host=HOST, port=PORT, workers=WORKERS)
@@ -0,0 +1,98 @@
+import asyncio
+
+
+class _Call:
+    """진행 중인 실행 1건. 결과(또는 예외)와 스트림 이벤트 버퍼를 구독자들이 함께 읽음"""
+
+    def __init__(self):
+        self.items = []
+        self.result = None
+        self.error = None
+        self.done = False
+        self.task = None
+        self.subscribers = 0  # astream: 아직 읽고 있는 구독자 수
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 요청을 실행 1건으로 합침 (single-flight).
+    먼저 들어온 요청(리더)만 실제로 실행하고, 실행이 끝나기 전에 같은 키로 들어온 요청은 그 결과를 함께 받습니다.
+    실행이 끝나면 키를 지우므로 결과를 보관하지는 않습니다 (보관은 답변 캐시 담당).
+    같은 이벤트 루프 안의 요청끼리만 합칩니다.
+    - ado: 코루틴 결과 공유
+    - astream: async 이터레이터가 내보내는 항목을 처음부터 모든 구독자에게 그대로 전달
+    """
+
+    def __init__(self):
+        self._acalls = {}  # (이벤트 루프, 키) -> (_Call, asyncio.Event)
+
+    def _ajoin(self, key):
+        key = (asyncio.get_running_loop(), key)
+        entry = self._acalls.get(key)
+        if entry is not None:
+            return key, entry, False
+        entry = self._acalls[key] = (_Call(), asyncio.Event())
+        return key, entry, True
+
+    async def ado(self, key, make_coroutine):
+        """(결과, 합쳐졌는지 여부). 리더 요청이 취소돼도 실행은 태스크로 계속되어 다른 구독자가 결과를 받음"""
+        key, (call, _), leader = self._ajoin(key)
+        if leader:
+            call.task = asyncio.ensure_future(make_coroutine())
+            call.task.add_done_callback(lambda task: self._aforget(key, call))
+        return await asyncio.shield(call.task), not leader
+
+    def astream(self, key, make_iterator):
+        """
+        (async 이터레이터, 합쳐졌는지 여부). 구독자 하나가 중간에 떠나도 다른 구독자의 스트림은 계속되고,
+        마지막 구독자까지 떠나면 실행을 취소함 (받아 간 이터레이터는 바로 읽거나 aclose()해야 함)
+        """
+        key, (call, changed), leader = self._ajoin(key)
+        if leader:
+            call.task = asyncio.ensure_future(self._aproduce(key, call, changed, make_iterator))
+        call.subscribers += 1
+        return self._asubscribe(key, call, changed), not leader
+
+    def _aforget(self, key, call):
+        """키가 아직 이 실행을 가리킬 때만 지움 (끝난 뒤 같은 키로 새로 시작한 실행은 남김)"""
+        entry = self._acalls.get(key)
+        if entry is not None and entry[0] is call:
+            del self._acalls[key]
+
+    async def _aproduce(self, key, call, changed, make_iterator):
+        try:
+            async for item in make_iterator():
+                call.items.append(item)
+                changed.set()
+                changed.clear()
+        except Exception as error:
+            call.error = error
+        except BaseException as error:
+            # 실행 태스크가 취소되거나 종료 신호를 받아도 구독자가 영원히 기다리지 않도록 오류로 알리고 그대로 전파
+            call.error = RuntimeError(f"같은 요청을 처리하던 실행이 중단되었습니다: {type(error).__name__}")
+            call.error.__cause__ = error
+            raise
+        finally:
+            call.done = True
+            self._aforget(key, call)
+            changed.set()
+
+    async def _asubscribe(self, key, call, changed):
+        position = 0
+        try:
+            while True:
+                while position < len(call.items):
+                    position += 1
+                    yield call.items[position - 1]
+                if call.done:
+                    if call.error is not None:
+                        raise call.error
+                    return
+                await changed.wait()
+        finally:
+            call.subscribers -= 1
+            # 연결이 끊기거나 close()로 마지막 구독자까지 떠나면 아무도 받지 않을 실행(LLM 호출)을 멈춤
+            # 취소가 처리되기 전에 같은 키로 들어온 요청이 이 실행에 합쳐지지 않도록 키부터 지움
+            if call.subscribers == 0 and not call.done:
+                self._aforget(key, call)
+                call.task.cancel()
@@ -0,0 +1,64 @@
+from answer_cache import SemanticAnswerCache
+from embedding_cache import RecentQueryEmbeddings
+from metadata_index import MetadataIndex
+from benchmarks.fakes import FakeEmbeddings
+
+RECORDS = [
+    {"notice_no": "20240101", "project_name": "서울특별시 정보시스템 고도화 사업", "budget": "100", "agency": "서울특별시", "source": ""},
+    {"notice_no": "20240202", "project_name": "부산광역시 정보시스템 고도화 사업", "budget": "200", "agency": "부산광역시", "source": ""},
+]
+
+
+class NameBlindEmbeddings(FakeEmbeddings):
+    """
+    정해진 단어가 들어 있는지만 보는 임베딩 -> 조사/어미가 달라도, 기관명이나 연도가 달라도 유사도 1.0
+    (임베딩이 고유명사 차이를 못 보는 경우 흉내)
+    """
+
+    VOCABULARY = ["정보시스템", "고도화", "사업", "예산"]
+
+    def __init__(self):
+        super().__init__(size=len(self.VOCABULARY))
+        self.calls = []
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return [1.0 if word in text else 0.0 for word in self.VOCABULARY]
+
+
+def _cache(embeddings):
+    return SemanticAnswerCache(embeddings, threshold=0.95, scope=MetadataIndex(RECORDS).targets)
+
+
+def test_similar_question_about_other_project_is_a_miss():
+    cache = _cache(NameBlindEmbeddings())
+    cache.store("서울특별시 정보시스템 고도화 사업 예산은?", "v1", "서울 답변", [])
+
+    assert cache.lookup("부산광역시 정보시스템 고도화 사업 예산은?", "v1") is None
+    assert cache.lookup("서울특별시 정보시스템 고도화 사업의 예산은?", "v1") == ("서울 답변", [])
+
+
+def test_identifier_guard_without_metadata():
+    cache = SemanticAnswerCache(NameBlindEmbeddings(), threshold=0.95)
+    cache.store("2024년 사업 예산은?", "v1", "2024 답변", [])
+    assert cache.lookup("2023년 사업 예산은?", "v1") is None
+
+
+def test_lookup_embeds_the_same_text_as_retrieval_once():
+    embeddings = NameBlindEmbeddings()
+    shared = RecentQueryEmbeddings(embeddings)
+    cache = _cache(shared)
+    cache.store("서울특별시 정보시스템 고도화 사업 예산은?", "v1", "서울 답변", [])
+    embeddings.calls.clear()
+
+    question = "서울특별시 정보시스템 고도화 사업 예산 알려줘"
+    assert cache.lookup(question, "v1") == ("서울 답변", [])
+    # 캐시 미스 후 검색이 같은 질문을 임베딩해도 다시 요청하지 않음
+    shared.embed_query(question)
+    assert embeddings.calls == [question]
+
+
+def test_index_version_change_clears_entries():
+    cache = _cache(NameBlindEmbeddings())
+    cache.store("서울특별시 정보시스템 고도화 사업 예산은?", "v1", "서울 답변", [])
+    assert cache.lookup("서울특별시 정보시스템 고도화 사업 예산은?", "v2") is None
@@ -0,0 +1,66 @@
+from context_packer import ContextPacker
+
+# 어느 위치를 잘라도 겹침이 한 곳에서만 일치하도록 숫자를 이어 붙인 페이지 본문
+PAGE = "".join(f"{i:03d}," for i in range(200))
+
+
+def _packer(max_tokens=0):
+    packer = ContextPacker(max_tokens=max_tokens)
+    packer.count_tokens = len  # 토큰 수 = 글자 수로 고정
+    return packer
+
+
+def _doc(start, end, source="a.pdf", page=1, with_index=True, **metadata):
+    doc = {"content": PAGE[start:end], "source": source, "page": page, **metadata}
+    if with_index:
+        doc["start_index"] = start
+    return doc
+
+
+def test_merges_overlapping_and_adjacent_chunks_by_start_index():
+    docs = [_doc(100, 200), _doc(0, 120), _doc(200, 260), _doc(400, 480)]
+    segments = _packer()._segments(docs)
+
+    # 0~260은 겹치거나 바로 이어지므로 한 구간, 400~480은 떨어져 있어 따로
+    assert [(segment["text"], segment["rank"]) for segment in segments] == [(PAGE[0:260], 0), (PAGE[400:480], 3)]
+
+
+def test_falls_back_to_text_overlap_without_start_index():
+    docs = [
+        _doc(0, 100, with_index=False),
+        _doc(70, 160, with_index=False),   # 30자 겹침 -> 합침
+        _doc(20, 60, with_index=False),    # 이미 들어 있는 부분 -> 버림
+        _doc(150, 220, with_index=False),  # 10자만 겹침(min_overlap 미만) -> 따로
+    ]
+    segments = _packer()._segments(docs)
+    assert [segment["text"] for segment in segments] == [PAGE[0:160], PAGE[150:220]]
+
+
+def test_chunks_from_other_pages_are_not_merged():
+    segments = _packer()._segments([_doc(0, 100, page=1), _doc(50, 150, page=2)])
+    assert len(segments) == 2
+
+
+def test_header_is_printed_once_per_source():
+    docs = [_doc(0, 50, notice_no="20240101"), _doc(300, 350), _doc(0, 50, source="b.pdf")]
+    text, tokens, count = _packer().pack(docs)
+
+    assert count == 3 and tokens == len(text)
+    assert text.count("[참고문서") == 2 and text.count("20240101") == 1
+    assert text.index("[참고문서 1]") < text.index(PAGE[300:350]) < text.index("[참고문서 2]")
+
+
+def test_stops_at_the_token_budget_keeping_higher_ranks():
+    docs = [_doc(0, 100), _doc(0, 100, source="b.pdf"), _doc(0, 100, source="c.pdf")]
+    full_text, full_tokens, _ = _packer().pack(docs)
+    budget = full_tokens - 50
+
+    text, tokens, count = _packer(budget).pack(docs)
+    assert count == 2 and tokens <= budget
+    assert "[참고문서 3]" not in text
+    assert text == full_text[:len(text)]  # 순위가 가장 낮은 c.pdf 구간만 빠짐
+
+    # 예산보다 큰 구간은 건너뛰고 그 뒤의 작은 구간은 담음
+    docs = [_doc(0, 800), _doc(0, 40, source="b.pdf")]
+    text, tokens, count = _packer(400).pack(docs)
+    assert count == 1 and PAGE[0:40] in text and tokens <= 400
@@ -0,0 +1,202 @@
+import os
+import time
+import signal
+import functools
+
+import pytest
+from chromadb.api.client import SharedSystemClient
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+import db_maker
+
+
+def _fake_loader(file_path, file, metadata):
+    if file.startswith("hang"):
+        # C 코드 안에서 멈춘 것처럼 SIGALRM도 무시 -> 메인 프로세스가 워커를 강제 종료해야 함
+        if hasattr(signal, "SIGALRM"):
+            signal.signal(signal.SIGALRM, signal.SIG_IGN)
+        time.sleep(60)
+    if file.startswith("broken"):
+        raise ValueError("깨진 파일")
+    return [Document(page_content=f"{file} 본문", metadata={"source": file})]
+
+
+def _load(files, num_workers, monkeypatch, timeout=1, retries=1):
+    monkeypatch.setattr(db_maker, "PDF_KILL_GRACE", 0.5)
+    meta_df = db_maker.pd.DataFrame(index=[])
+    return db_maker.load_documents(
+        "pdfs", files, meta_df, num_workers=num_workers, timeout=timeout, retries=retries, loader=_fake_loader
+    )
+
+
+def test_pool_keeps_file_order_and_reports_errors(monkeypatch):
+    files = [f"doc{i}.pdf" for i in range(8)] + ["broken.pdf"]
+    sequential, failed_sequential = _load(files, 1, monkeypatch)
+    parallel, failed_parallel = _load(files, 3, monkeypatch)
+
+    assert [doc.page_content for doc in parallel] == [doc.page_content for doc in sequential]
+    assert [doc.metadata["source"] for doc in parallel] == [f for f in files if f != "broken.pdf"]
+    assert failed_parallel == failed_sequential == {"broken.pdf"}
+
+
+def test_hung_worker_is_killed_and_only_its_file_fails(monkeypatch):
+    files = ["doc0.pdf", "hang.pdf", "doc1.pdf", "doc2.pdf", "doc3.pdf"]
+    started = time.monotonic()
+    documents, failed = _load(files, 2, monkeypatch, timeout=1, retries=1)
+
+    # 멈춘 파일은 한 번 다시 시도한 뒤 실패, 나머지 파일은 모두 처리
+    assert failed == {"hang.pdf"}
+    assert [doc.metadata["source"] for doc in documents] == ["doc0.pdf", "doc1.pdf", "doc2.pdf", "doc3.pdf"]
+    assert time.monotonic() - started < 10
+
+
+class _FlakyEmbeddings:
+    """embed_documents를 fail_after번 부른 뒤부터 실패 (임베딩 도중 죽은 빌드 흉내)"""
+
+    def __init__(self, fail_after=None, **kwargs):
+        from benchmarks.fakes import FakeEmbeddings
+        self.fake = FakeEmbeddings(size=8)
+        self.fail_after = fail_after
+        self.calls = 0
+        self.model = "fake"
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise RuntimeError("임베딩 중단")
+        return self.fake.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.fake.embed_query(text)
+
+
+class _NoCache:
+    """이전 실행에서 캐시된 임베딩을 쓰지 않도록 (실제 임베딩 호출 수를 세기 위해)"""
+
+    def get_many(self, model, texts):
+        return [None] * len(texts)
+
+    def put_many(self, model, texts, vectors):
+        pass
+
+
+def _page_loader(file_path, file, metadata):
+    with open(file_path, encoding="utf-8") as f:
+        text = f.read()
+    return [Document(page_content=text, metadata={"source": file})]
+
+
+def _setup_build(tmp_path, monkeypatch, files=6):
+    pdf_folder = tmp_path / "pdf"
+    pdf_folder.mkdir()
+    for i in range(files):
+        # 청크 크기(500자)보다 길게 -> 파일마다 여러 청크
+        (pdf_folder / f"doc{i}.pdf").write_text(f"문서{i} " + " ".join(f"단어{i}_{j}" for j in range(300)), encoding="utf-8")
+    csv_path = tmp_path / "meta.csv"
+    csv_path.write_text("파일명,사업명\n" + "".join(f"doc{i}.pdf,사업{i}\n" for i in range(files)), encoding="utf-8")
+
+    db_path = str(tmp_path / "db")
+    monkeypatch.setattr(db_maker, "PDF_FOLDER", str(pdf_folder))
+    monkeypatch.setattr(db_maker, "CSV_PATH", str(csv_path))
+    monkeypatch.setattr(db_maker, "DB_PATH", db_path)
+    monkeypatch.setattr(db_maker, "MANIFEST_PATH", os.path.join(db_path, "manifest.json"))
+    monkeypatch.setattr(db_maker, "LEXICAL_INDEX_PATH", os.path.join(db_path, "lexical.pkl"))
+    monkeypatch.setattr(db_maker, "EMBEDDING_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(db_maker, "MMAP_INDEX", False)
+    monkeypatch.setattr(db_maker, "INCREMENTAL", True)
+    monkeypatch.setattr(db_maker, "EMBED_BATCH_SIZE", 2)
+    monkeypatch.setattr(db_maker, "EMBED_CONCURRENCY", 1)
+    monkeypatch.setattr(db_maker, "MANIFEST_SAVE_INTERVAL", 0)
+    monkeypatch.setattr(db_maker, "load_documents", functools.partial(
+        db_maker.load_documents, num_workers=1, loader=_page_loader
+    ))
+    return db_path
+
+
+def _run_main():
+    # 실제로는 실행마다 새 프로세스이므로, 같은 프로세스 안에 캐시된 Chroma 클라이언트를 비우고 실행
+    SharedSystemClient.clear_system_cache()
+    db_maker.main()
+
+
+def _collection_ids(db_path):
+    SharedSystemClient.clear_system_cache()
+    return set(Chroma(persist_directory=db_path)._collection.get(include=[])["ids"])
+
+
+def _manifest_ids(db_path):
+    manifest = db_maker.load_manifest(os.path.join(db_path, "manifest.json"))
+    return {chunk_id for entry in manifest["files"].values() for chunk_id in entry["ids"]}
+
+
+def test_crashed_first_build_resumes_without_deleting_chunks(tmp_path, monkeypatch):
+    db_path = _setup_build(tmp_path, monkeypatch)
+
+    # 1) 첫 빌드가 임베딩 도중 죽음
+    monkeypatch.setattr(db_maker, "OpenAIEmbeddings", lambda **kwargs: _FlakyEmbeddings(fail_after=3))
+    with pytest.raises(RuntimeError):
+        _run_main()
+    written = _collection_ids(db_path)
+    manifest = db_maker.load_manifest(os.path.join(db_path, "manifest.json"))
+    assert manifest["params"] == db_maker.chunk_params()
+    assert written and len(written) < sum(len(entry["ids"]) for entry in manifest["files"].values())
+    assert not all(entry["done"] for entry in manifest["files"].values())
+
+    # 2) 다시 실행하면 DB를 지우지 않고 남은 청크만 임베딩
+    def no_rmtree(path):
+        raise AssertionError("중간에 끊긴 빌드를 지우면 안 됨")
+    monkeypatch.setattr(db_maker.shutil, "rmtree", no_rmtree)
+    embeddings = _FlakyEmbeddings()
+    monkeypatch.setattr(db_maker, "OpenAIEmbeddings", lambda **kwargs: embeddings)
+    monkeypatch.setattr(db_maker, "EmbeddingCache", lambda *args, **kwargs: _NoCache())
+    _run_main()
+
+    manifest = db_maker.load_manifest(os.path.join(db_path, "manifest.json"))
+    expected = _manifest_ids(db_path)
+    assert all(entry["done"] for entry in manifest["files"].values())
+    assert _collection_ids(db_path) == expected
+    assert embeddings.calls == -(-(len(expected) - len(written)) // 2)  # 남은 청크만 배치 2개씩
+
+
+def test_rebuilds_only_when_chunk_params_change(tmp_path, monkeypatch):
+    db_path = _setup_build(tmp_path, monkeypatch, files=2)
+    monkeypatch.setattr(db_maker, "OpenAIEmbeddings", lambda **kwargs: _FlakyEmbeddings())
+    _run_main()
+    before = _collection_ids(db_path)
+
+    removed = []
+    real_rmtree = db_maker.shutil.rmtree
+    monkeypatch.setattr(db_maker.shutil, "rmtree", lambda path: (removed.append(path), real_rmtree(path)))
+    _run_main()
+    assert removed == [] and _collection_ids(db_path) == before
+
+    monkeypatch.setattr(db_maker, "CHUNK_SIZE", 300)
+    _run_main()
+    assert removed == [db_path]
+    after = _collection_ids(db_path)
+    assert after == _manifest_ids(db_path) and len(after) > len(before)
+
+
+def test_unchanged_run_skips_index_rebuild(tmp_path, monkeypatch):
+    db_path = _setup_build(tmp_path, monkeypatch, files=2)
+    monkeypatch.setattr(db_maker, "OpenAIEmbeddings", lambda **kwargs: _FlakyEmbeddings())
+    monkeypatch.setattr(db_maker, "MMAP_INDEX", True)
+    builds = []
+    for name in ("build_from_collection", "build_vector_index"):
+        real = getattr(db_maker, name)
+        monkeypatch.setattr(db_maker, name, lambda *args, _name=name, _real=real: (builds.append(_name), _real(*args))[1])
+    # 양자화 리포트는 DB_MAKER_QUANT_REPORT=1일 때만
+    monkeypatch.setattr(db_maker, "report_quantization", lambda *args: pytest.fail("리포트는 기본으로 끔"))
+
+    _run_main()
+    assert builds == ["build_from_collection", "build_vector_index"]
+
+    # 추가/삭제/정리할 청크가 없으면 인덱스 파일을 다시 만들지 않음
+    _run_main()
+    assert len(builds) == 2
+
+    (tmp_path / "pdf" / "doc0.pdf").write_text("바뀐 문서 " * 50, encoding="utf-8")
+    _run_main()
+    assert builds[2:] == ["build_from_collection", "build_vector_index"]
+    assert os.path.exists(os.path.join(db_path, db_maker.VECTOR_INDEX_DIR, "meta.npz"))
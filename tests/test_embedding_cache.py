@@ -0,0 +1,68 @@
+import time
+import asyncio
+import threading
+
+import embedding_cache
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from benchmarks.fakes import FakeEmbeddings
+
+
+def test_cached_embeddings_only_requests_misses(tmp_path):
+    calls = []
+
+    class CountingEmbeddings(FakeEmbeddings):
+        def embed_documents(self, texts):
+            calls.append(list(texts))
+            return super().embed_documents(texts)
+
+    embeddings = CachedEmbeddings(CountingEmbeddings(size=4), EmbeddingCache(str(tmp_path)))
+    first = embeddings.embed_documents(["가", "나", "가"])
+    second = embeddings.embed_documents(["나", "다"])
+
+    assert calls == [["가", "나"], ["다"]]
+    assert first[1] == second[0]
+
+
+def test_hits_do_not_take_write_lock_until_flush(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "TOUCH_INTERVAL", 0)
+    monkeypatch.setattr(embedding_cache, "TOUCH_FLUSH_SIZE", 3)
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many("m", ["a", "b", "c"], [[1.0], [2.0], [3.0]])
+
+    statements = []
+    cache._db.set_trace_callback(statements.append)
+    assert cache.get_many("m", ["a", "b"]) == [[1.0], [2.0]]
+    assert not any("UPDATE" in sql or "IMMEDIATE" in sql for sql in statements)
+
+    # 쌓인 갱신이 TOUCH_FLUSH_SIZE에 닿으면 쓰기 트랜잭션 한 번으로 기록
+    cache.get_many("m", ["c"])
+    assert sum("BEGIN IMMEDIATE" in sql for sql in statements) == 1
+    assert sum("UPDATE embeddings" in sql for sql in statements) == 3
+    assert cache._touched == {}
+
+
+def test_async_lookup_does_not_block_event_loop(tmp_path):
+    embeddings = CachedEmbeddings(FakeEmbeddings(size=4), EmbeddingCache(str(tmp_path)))
+    embeddings.embed_query("질문")
+
+    async def scenario():
+        # 다른 스레드가 캐시를 잡고 있는 동안에도 이벤트 루프의 다른 작업은 계속 진행되어야 함
+        embeddings.cache._lock.acquire()
+        threading.Timer(0.3, embeddings.cache._lock.release).start()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        vector = await embeddings.aembed_query("질문")
+        ticking.cancel()
+        return vector, ticks, time.perf_counter() - started
+
+    vector, ticks, elapsed = asyncio.run(scenario())
+    assert vector == embeddings.embed_query("질문")
+    assert elapsed >= 0.25 and ticks >= 10
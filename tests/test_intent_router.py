@@ -0,0 +1,53 @@
+import pytest
+
+from intent_router import IntentRouter
+from metadata_index import MetadataIndex
+
+RECORDS = [
+    {"notice_no": "20240101", "project_name": "서울특별시 교통정보 시스템 고도화 사업", "budget": "100",
+     "agency": "서울특별시", "source": ""},
+]
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(MetadataIndex(RECORDS))
+
+
+@pytest.mark.parametrize("question", [
+    "HIS 시스템 구성은?",
+    "hi-pass 연계 방안은?",
+    "주식회사 참여 조건은?",
+    "메뉴 구조는?",
+    "감사 로그 기능이 필요한가요?",
+    "영화진흥위원회 통합전산망 구축은 언제 끝나?",
+    "프롬프트 관리 기능 요구사항이 있나요?",
+    "코드 관리 방식은?",
+    "안녕하세요 서버 이중화 구성은 어떻게 돼?",
+])
+def test_words_inside_bid_questions_are_not_rejected(router, question):
+    # 잡담 단어가 들어 있어도 확실하지 않으면 LLM 라우터가 판정
+    assert router.classify(question) != "not_relevant"
+
+
+@pytest.mark.parametrize("question", [
+    "안녕", "안녕하세요!", "hi", "Hello~", "감사합니다", "ㅋㅋㅋ", "오늘 날씨 어때?", "점심 뭐 먹지", "너 누구야?", "",
+])
+def test_short_chitchat_is_rejected_locally(router, question):
+    assert router.classify(question) == "not_relevant"
+
+
+@pytest.mark.parametrize("question", [
+    "서울특별시 교통정보 시스템 고도화 사업 예산은?",
+    "입찰 참가 자격이 뭐야?",
+    "이 사업의 수행 기간은?",
+])
+def test_bid_questions_are_accepted_locally(router, question):
+    assert router.classify(question) == "bid"
+
+
+def test_stats_count_llm_fallbacks(router):
+    router.classify("메뉴 구조는?")
+    router.classify("안녕")
+    stats = router.get_stats()
+    assert stats["llm"] == 1 and stats["local_not_relevant"] == 1 and stats["rule_chitchat"] == 1
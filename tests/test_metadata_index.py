@@ -0,0 +1,72 @@
+import pytest
+
+from metadata_index import MetadataIndex
+
+RECORDS = [
+    {"notice_no": "20240101", "project_name": "2024년 한국철도공사 차세대 ERP 구축 사업", "budget": "5000000000.0",
+     "agency": "한국철도공사 (용역)", "source": "erp.pdf"},
+    {"notice_no": "20240202", "project_name": "서울특별시 교통정보 시스템 고도화 사업", "budget": "100000000",
+     "agency": "서울특별시", "source": "seoul.pdf"},
+    {"notice_no": "20240303", "project_name": "부산광역시 교통정보 시스템 고도화 사업", "budget": "200000000",
+     "agency": "부산광역시", "source": "busan.pdf"},
+]
+
+ERP = "차세대 ERP 구축 사업"
+
+
+@pytest.fixture
+def index():
+    return MetadataIndex(RECORDS)
+
+
+@pytest.mark.parametrize("question, field, notice_no", [
+    (f"{ERP} 예산은 얼마야?", "budget", "20240101"),
+    (f"{ERP}의 발주기관은?", "agency", "20240101"),
+    ("20240101 공고 예산은?", "budget", "20240101"),
+    # 연도/기관명을 뺀 핵심 이름이 같은 사업이 있어도 사업명 전체가 나오면 그 사업
+    ("서울특별시 교통정보 시스템 고도화 사업 예산?", "budget", "20240202"),
+    ("부산광역시 교통정보 시스템 고도화 사업 발주처는?", "agency", "20240303"),
+    (f"2024년 {ERP} 예산은 어떻게 돼?", "budget", "20240101"),
+    # "사업비"가 사업명의 "사업"과 겹쳐도 필드 이름으로 남음
+    (f"{ERP} 사업비 알려줘", "budget", "20240101"),
+])
+def test_simple_field_lookup(index, question, field, notice_no):
+    found = index.lookup_field(question)
+    assert found is not None
+    assert (found[0], found[1]["notice_no"]) == (field, notice_no)
+
+
+@pytest.mark.parametrize("question", [
+    f"{ERP} 지체상금은 얼마야?",
+    f"{ERP} 입찰보증금 얼마?",
+    f"{ERP} 투입 인력은 얼마나 돼?",
+    f"{ERP} 하자보수 금액은?",
+    f"{ERP} 예산이 1억 넘어?",
+    f"{ERP} 예산 중 SW 비용은 얼마야?",
+    f"{ERP} 예산과 평가 기준 알려줘",
+    # 핵심 이름만으로는 어느 지역 사업인지 알 수 없음
+    "교통정보 시스템 고도화 사업 예산?",
+    "서울특별시 교통정보 시스템 고도화 사업과 부산광역시 교통정보 시스템 고도화 사업 예산?",
+    # 필드 이름 뒤에 다른 말이 붙으면 단순 조회가 아님
+    f"{ERP} 예산 편성 근거는?",
+    f"{ERP} 예산 산출 내역",
+    f"{ERP} 예산은 부가세 포함이야?",
+    f"{ERP} 예산에 유지보수비 포함돼?",
+    f"{ERP} 발주기관 담당자 연락처는?",
+    f"{ERP} 발주기관 주소는?",
+    # 한 사업은 이름 전체, 다른 사업은 핵심 이름만 나온 경우
+    f"{ERP}이랑 서울특별시 교통정보 시스템 고도화 사업 예산",
+    # CSV의 공고는 2024년 사업
+    f"2023년 한국철도공사 {ERP} 예산은?",
+    f"2023년 {ERP} 예산은 얼마야?",
+])
+def test_other_questions_fall_back_to_rag(index, question):
+    assert index.lookup_field(question) is None
+
+
+def test_answer_field_formats_csv_values(index):
+    answer, record = index.answer_field(f"{ERP} 예산은 얼마야?")
+    assert "5,000,000,000원" in answer and record["source"] == "erp.pdf"
+
+    answer, _ = index.answer_field(f"{ERP} 발주기관은?")
+    assert "**한국철도공사**" in answer
@@ -0,0 +1,115 @@
+import json
+import asyncio
+
+import pytest
+from chromadb.api.shared_system_client import SharedSystemClient
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from benchmarks.bench_pipeline import build_index
+from rag_core import BiddingAgent
+
+DIM = 32
+QUESTION = "공고 사업의 제안서 평가 배점 기준은?"
+
+
+@pytest.fixture
+def agent(tmp_path):
+    db_path = str(tmp_path / "db")
+    SharedSystemClient.clear_system_cache()
+    build_index(db_path, 200, DIM)
+    llm = FakeChatModel(answer_tokens=20)
+    return BiddingAgent(
+        db_path=db_path,
+        csv_path=str(tmp_path / "no_metadata.csv"),
+        embedding_cache_dir=None,
+        answer_cache=False,
+        coalesce_requests=False,
+        llm_heavy=llm,
+        llm_light=llm,
+        embeddings=FakeEmbeddings(size=DIM),
+        trace_path=str(tmp_path / "trace.jsonl"),
+        log_level="WARNING",
+    )
+
+
+def _traces(agent):
+    with open(agent.tracer.trace_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_sync_api_runs_the_async_pipeline(agent):
+    answer, context = agent.get_answer(QUESTION)
+    async_answer, async_context = asyncio.run(agent.aget_answer(QUESTION))
+
+    assert answer == async_answer and answer.startswith("토큰0")
+    assert [doc["content"] for doc in context] == [doc["content"] for doc in async_context]
+    assert agent.ask_with_context(QUESTION)["answer"] == answer
+
+    # 동기 호출도 같은 노드(비동기 구현)를 지나며 스팬이 요청 trace에 기록됨
+    sync_trace, async_trace = _traces(agent)[:2]
+    assert [span["node"] for span in sync_trace["spans"]] == [span["node"] for span in async_trace["spans"]]
+    assert {"router", "grade", "generate"} <= {span["node"] for span in sync_trace["spans"]}
+
+
+def test_stream_answer_yields_tokens_then_context(agent):
+    items = list(agent.stream_answer(QUESTION))
+    answer, context = agent.get_answer(QUESTION)
+
+    assert all(isinstance(item, str) for item in items[:-1]) and len(items) > 2
+    assert "".join(items[:-1]) == answer
+    assert [doc["content"] for doc in items[-1]] == [doc["content"] for doc in context]
+    assert "first_token_ms" in _traces(agent)[0]
+
+
+def test_closing_stream_early_finishes_the_request(agent):
+    stream = agent.stream_answer(QUESTION)
+    assert isinstance(next(stream), str)
+    stream.close()
+
+    # 그래프 실행이 취소되고 다음 요청도 정상 처리됨
+    assert agent.get_answer(QUESTION)[0].startswith("토큰0")
+
+
+def test_retrieval_keeps_only_final_k_chunks(agent):
+    state = agent._run(agent._aretrieve({"question": QUESTION}))
+    assert len(state["context"]) == agent.final_k == 8
+    assert agent.get_config()["final_k"] == 8
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self, size):
+        super().__init__(size=size)
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+    async def aembed_query(self, text):
+        self.queries.append(text)
+        return await super().aembed_query(text)
+
+
+def test_similarity_scores_only_with_a_gate(agent, monkeypatch):
+    assert agent.relevance_gate is None and not agent.score_retrieval
+    monkeypatch.setattr(agent, "_similarity_scores", lambda *args: pytest.fail("게이트 없이 유사도 계산"))
+    state = agent._run(agent._aretrieve({"question": QUESTION}))
+    assert all(doc["score"] is None for doc in state["context"])
+
+
+def test_scoring_reuses_the_retrieval_query_vector(agent):
+    counting = CountingEmbeddings(DIM)
+    agent.embeddings.embeddings = counting
+    agent.score_retrieval = True
+
+    state = agent._run(agent._aretrieve({"question": "새 질문: 사업 예산과 기간"}))
+    assert all(isinstance(doc["score"], float) for doc in state["context"])
+    assert counting.queries == ["새 질문: 사업 예산과 기간"]
+
+
+def test_locally_routed_question_records_retrieve_span(agent):
+    # 입찰 키워드가 있어 로컬 규칙으로 bid 판정 -> LLM 라우터 없이 검색해도 retrieve 스팬이 남아야 함
+    agent.get_answer("입찰 참가 자격은?")
+    spans = [span["node"] for span in _traces(agent)[0]["spans"]]
+    assert "retrieve" in spans
+    assert agent.intent_router.get_stats()["local_bid"] == 1
@@ -0,0 +1,31 @@
+import pytest
+
+from relevance_gate import NEGATIVES_FILE, RelevanceGate, load_labeled
+
+
+def test_fit_requires_irrelevant_examples():
+    with pytest.raises(ValueError, match="관련 없는"):
+        RelevanceGate.fit([0.8, 0.7, 0.6, 0.55], [True] * 4)
+    with pytest.raises(ValueError, match="관련 있는"):
+        RelevanceGate.fit([0.2, 0.3], [False] * 2)
+
+
+def test_fit_separates_labeled_scores():
+    positives = [0.62, 0.66, 0.7, 0.74, 0.8]
+    negatives = [0.2, 0.25, 0.3, 0.35, 0.64]
+    gate = RelevanceGate.fit(positives + negatives, [True] * 5 + [False] * 5, tolerance=0.0)
+
+    # 관련 없는 질문 중 가장 높은 점수보다 높아야 바로 통과, 관련 있는 질문 중 가장 낮은 점수보다 낮아야 바로 탈락
+    assert gate.decide([0.75]) is True
+    assert gate.decide([0.1]) is False
+    assert gate.decide([0.63]) is None
+    assert gate.decide([]) is False
+
+
+def test_shipped_negatives_and_test_data_formats_load():
+    questions, labels = load_labeled(NEGATIVES_FILE)
+    assert questions and all(label is False for label in labels)
+
+    # test_data.json(relevant 없음) -> LLM 채점기로 라벨링할 질문
+    questions, labels = load_labeled("test_data.json")
+    assert questions and labels == [None] * len(questions)
@@ -0,0 +1,48 @@
+import re
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+
+from reranker import LLMReranker, ListwiseReranker, arerank
+
+
+def _fake_llm(delays, reply=str):
+    """프롬프트 안의 문서 번호(<<번호>>)를 보고 delays[번호]초 뒤에 답하는 가짜 LLM"""
+    async def call(prompt):
+        number = int(re.search(r"<<(\d+)>>", prompt.to_string()).group(1))
+        await asyncio.sleep(delays[number])
+        return reply(number)
+
+    return RunnableLambda(call)
+
+
+def _reranker(delays, timeout, max_concurrency):
+    return LLMReranker(_fake_llm(delays), lambda docs: docs[0]["content"], timeout=timeout, max_concurrency=max_concurrency)
+
+
+def _docs(count):
+    return [{"content": f"<<{i}>>"} for i in range(count)]
+
+
+def test_timeout_applies_per_call_not_per_batch():
+    # 동시 호출 10개 제한 -> 두 번째 묶음은 첫 묶음이 끝난 뒤(0.15초) 시작해 전체로는 timeout을 넘기지만 호출 1건은 timeout 안에 끝남
+    delays = [0.15] * 20
+    delays[3] = 1.0
+    reranker = _reranker(delays, timeout=0.25, max_concurrency=10)
+
+    scores = asyncio.run(reranker.ascore("질문", _docs(20)))
+    assert scores[3] is None
+    assert scores[:3] + scores[4:] == [float(i) for i in range(20) if i != 3]
+
+
+def test_sync_score_and_rerank_order():
+    reranker = _reranker([0.0] * 5, timeout=1.0, max_concurrency=2)
+    assert reranker.score("질문", _docs(5)) == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    docs, scores = asyncio.run(arerank(reranker, "질문", _docs(5), candidates=4, keep=2))
+    assert [doc["content"] for doc in docs] == ["<<3>>", "<<2>>"] and scores == [3.0, 2.0]
+
+
+def test_listwise_timeout_leaves_scores_empty():
+    reranker = ListwiseReranker(_fake_llm([1.0], reply=lambda number: "1: 10"), lambda docs: "<<0>>", timeout=0.05)
+    assert reranker.score("질문", _docs(3)) == [None, None, None]
@@ -0,0 +1,93 @@
+import json
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server import AdmissionController, create_app
+from tracing import Metrics
+
+
+class FakeAgent:
+    """BiddingAgent 대신 쓰는 가짜 에이전트 (fail_after개 토큰을 보낸 뒤 오류)"""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.tracer = type("Tracer", (), {"metrics": Metrics()})()
+
+    async def aget_answer(self, question):
+        if self.fail_after is not None:
+            raise RuntimeError("에이전트 오류")
+        return "답변", []
+
+    async def ask_with_context_async(self, question):
+        answer, _ = await self.aget_answer(question)
+        return {"question": question, "answer": answer, "contexts": []}
+
+    async def astream_answer(self, question):
+        for i, token in enumerate(["예산은 ", "1억원", "입니다."]):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise RuntimeError("스트림 오류")
+            yield token
+        yield []
+
+    def get_metrics_text(self):
+        return self.tracer.metrics.render()
+
+
+def _app(agent, max_concurrency=1):
+    admission = AdmissionController(max_concurrency=max_concurrency, max_queue=0, queue_timeout=0.1)
+    return create_app(agent_factory=lambda: agent, admission=admission, warm_up=False), admission
+
+
+def _assert_released(admission):
+    assert admission.running == 0 and admission.waiting == 0
+    assert not admission._semaphore.locked()
+
+
+def test_stream_releases_slot_after_completion():
+    app, admission = _app(FakeAgent())
+    with TestClient(app) as client:
+        for _ in range(3):
+            response = client.post("/answer/stream", json={"question": "예산?"})
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert lines[-1] == {"context": []}
+            assert "".join(line["token"] for line in lines[:-1]) == "예산은 1억원입니다."
+    _assert_released(admission)
+
+
+def test_slot_released_when_agent_fails():
+    app, admission = _app(FakeAgent(fail_after=1))
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert client.post("/answer", json={"question": "예산?"}).status_code == 500
+        assert client.post("/ask", json={"question": "예산?"}).status_code == 500
+        # 토큰 1개를 보낸 뒤 스트림 중간에 오류
+        client.post("/answer/stream", json={"question": "예산?"})
+    _assert_released(admission)
+
+
+def test_stream_slot_released_when_client_drops_before_body():
+    app, admission = _app(FakeAgent())
+    app.state.agent = FakeAgent()  # lifespan 없이 앱을 직접 호출
+    body = json.dumps({"question": "예산?"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/answer/stream", "raw_path": b"/answer/stream",
+        "root_path": "", "query_string": b"", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        # 응답 헤더를 보내는 순간 연결이 끊김 -> 본문 제너레이터는 시작도 하지 않음
+        if message["type"] == "http.response.start":
+            raise OSError("connection reset")
+
+    async def run():
+        with pytest.raises(Exception):
+            await app(scope, receive, send)
+
+    asyncio.run(run())
+    _assert_released(admission)
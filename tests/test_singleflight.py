@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_astream_replays_items_and_errors_to_every_subscriber():
+    async def produce():
+        yield "a"
+        await asyncio.sleep(0.01)
+        yield "b"
+        raise ValueError("실패")
+
+    async def collect(events):
+        items = []
+        with pytest.raises(ValueError):
+            async for item in events:
+                items.append(item)
+        return items
+
+    async def main():
+        flight = SingleFlight()
+        first, coalesced_first = flight.astream("q", produce)
+        second, coalesced_second = flight.astream("q", produce)
+        assert (coalesced_first, coalesced_second) == (False, True)
+        return await asyncio.gather(collect(first), collect(second))
+
+    assert asyncio.run(main()) == [["a", "b"], ["a", "b"]]
+
+
+def test_cancelled_producer_fails_waiters_instead_of_hanging():
+    async def produce():
+        yield "a"
+        await asyncio.sleep(10)
+        yield "b"
+
+    async def main():
+        flight = SingleFlight()
+        events, _ = flight.astream("q", produce)
+        waiter = asyncio.ensure_future(_drain(events))
+        await asyncio.sleep(0.01)
+
+        producer = next(iter(flight._acalls.values()))[0].task
+        producer.cancel()
+        with pytest.raises(RuntimeError, match="CancelledError"):
+            await asyncio.wait_for(waiter, 1)
+        assert producer.cancelled()
+        assert flight._acalls == {}
+
+        # 같은 키로 다시 요청하면 새로 실행
+        _, coalesced = flight.astream("q", produce)
+        assert coalesced is False
+
+    asyncio.run(main())
+
+
+def test_producer_is_cancelled_when_the_last_subscriber_leaves():
+    finished = []
+
+    async def produce():
+        try:
+            for i in range(100):
+                yield i
+                await asyncio.sleep(0.01)
+        finally:
+            finished.append("stopped")
+
+    async def main():
+        flight = SingleFlight()
+        first, _ = flight.astream("q", produce)
+        second, _ = flight.astream("q", produce)
+        producer = next(iter(flight._acalls.values()))[0].task
+
+        # 한 구독자가 떠나도(연결 끊김) 다른 구독자는 계속 받음
+        assert await first.__anext__() == 0
+        await first.aclose()
+        assert [await second.__anext__() for _ in range(3)] == [0, 1, 2]
+        assert not producer.done()
+
+        # 마지막 구독자까지 떠나면 실행 취소, 같은 키의 다음 요청은 새로 실행
+        await second.aclose()
+        assert flight._acalls == {}
+        _, coalesced = flight.astream("q", produce)
+        assert coalesced is False
+        await asyncio.sleep(0.05)
+        assert producer.cancelled() and finished[:1] == ["stopped"]
+
+    asyncio.run(main())
+
+
+async def _drain(events):
+    return [item async for item in events]
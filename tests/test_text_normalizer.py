@@ -0,0 +1,53 @@
+import re
+import time
+import random
+
+import pytest
+
+from text_normalizer import LONG_RUN, clean_text, collapse_repeated_units
+from benchmarks.bench_clean_text import legacy_clean_text, fuzz_cases
+
+_LEGACY_UNIT_RE = re.compile(r'(\w{2,})(\1){2,}')
+
+ADVERSARIAL = [
+    "",
+    "가나다",
+    "abababab",
+    "ab" * 200,
+    "abc" * 40 + "ab" * 40,
+    "aab" * 30 + "a" * 70,
+    "0" * 300,
+    "1212" * 20 + "12" * 40 + "3",
+    "가나가나가나다라다라다라" * 10,
+    "항목1금액1370원" * 30,
+    "".join(f"항목{i}금액{i * 1370 % 9973}원" for i in range(60)),
+    "성명성명성명생년월일주소주소주소연락처□□□□□\t" * 20,
+    "합계 합계 합계 소계 소계 소계 금액 " * 10,
+    "ab ab abc ab ab ab",
+    "제출서류 ---------- 확인 ====== ____\n\n\n" * 5,
+    "a_" * 100 + " " + "xyz" * 30,
+    "x" * (LONG_RUN - 1) + " " + "x" * LONG_RUN + "\r\n\t" + "xy" * LONG_RUN,
+    "abcabcab" * 16 + "c",
+]
+
+
+@pytest.mark.parametrize("text", ADVERSARIAL, ids=lambda text: f"{len(text)}chars")
+def test_same_result_as_legacy_regex(text):
+    assert clean_text(text) == legacy_clean_text(text)
+    assert collapse_repeated_units(text) == _LEGACY_UNIT_RE.sub(r'\1', text)
+
+
+def test_seeded_fuzz_matches_legacy_regex():
+    rng = random.Random(20261016)
+    for text in fuzz_cases(1000, rng):
+        assert collapse_repeated_units(text) == _LEGACY_UNIT_RE.sub(r'\1', text), text
+        assert clean_text(text) == legacy_clean_text(text), text
+
+
+def test_long_unspaced_run_is_not_quadratic():
+    # 기존 정규식은 5000자에서도 1초 가까이 걸리고 길이의 제곱 이상으로 늘어남 (bench_clean_text의 small_alphabet_run 유형)
+    rng = random.Random(0)
+    text = "".join(rng.choice("가나다라") for _ in range(20000))
+    started = time.perf_counter()
+    clean_text(text)
+    assert time.perf_counter() - started < 2.0
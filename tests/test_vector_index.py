@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from chromadb.api.shared_system_client import SharedSystemClient
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from benchmarks.bench_pipeline import build_index
+from vector_index import MmapVectorIndex, quantization_report
+
+DIM = 32
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db"))
+    SharedSystemClient.clear_system_cache()
+    build_index(path, 1000, DIM)
+    return path
+
+
+def _queries(n, seed=100):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+@pytest.mark.parametrize("lambda_mult", [0.0, 0.3, 0.5, 1.0])
+def test_mmr_matches_langchain(db_path, lambda_mult):
+    # 무작위 벡터끼리는 유사도가 음수인 경우가 많아 redundancy 초깃값(-inf/0) 차이가 그대로 드러남
+    index = MmapVectorIndex.from_db(db_path)
+    for query in _queries(20):
+        top, _ = index.top_k(query, 50)
+        candidates = top[0]
+        expected = maximal_marginal_relevance(
+            query / np.linalg.norm(query), np.asarray(index.vectors[candidates]).tolist(), lambda_mult=lambda_mult, k=10,
+        )
+        assert index.mmr(query, k=10, fetch_k=50, lambda_mult=lambda_mult) == candidates[expected].tolist()
+
+
+def test_quantized_copies_keep_recall(db_path):
+    report = quantization_report(db_path, _queries(50, seed=101), k=10, rescore_k=50)
+    assert report["float32"]["recall@10"] == 1.0
+    # 상위 50개 후보를 float32로 재채점하므로 양자화 오차가 있어도 상위 10개는 거의 그대로
+    assert report["float16"]["recall@10"] >= 0.99
+    assert report["int8"]["recall@10"] >= 0.97
+    assert report["int8"]["memory_mb"] < report["float16"]["memory_mb"] < report["float32"]["memory_mb"]
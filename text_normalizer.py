@@ -0,0 +1,162 @@
+"""
+PDF 페이지 텍스트 정리 (db_maker.py의 clean_text).
+
+예전 clean_text는 페이지마다 r'(\\w{2,})(\\1){2,}'를 돌렸는데, 이 패턴은 시작 위치마다 반복 단위 길이를 전부 시도하므로
+띄어쓰기 없이 길게 이어진 단어(표 셀이 붙어서 추출된 텍스트, 긴 숫자열 등)에서 길이의 제곱 이상으로 느려집니다.
+여기서는 결과는 그대로 두고 계산 방법만 바꿉니다.
+- 모든 패턴은 미리 컴파일
+- LONG_RUN자 미만인 단어 안에서는 백트래킹 비용이 단어 길이로 묶이므로 기존 패턴을 그대로 사용
+- LONG_RUN자 이상인 단어는 _collapse_run이 주기별 블록을 찾아 O(m log m)으로 같은 결과를 계산
+  (정규식과 똑같이 "각 위치에서 가장 왼쪽, 가장 긴 반복 단위"를 고르려면 모든 반복 구간(run)이 필요한데,
+  이를 O(m)에 구하는 알고리즘은 접미사 배열/LZ 분해가 필요해 순수 파이썬에서는 오히려 느림. 페이지 전체로는 O(n log n))
+r'(\\b\\w+\\b)( \\1){2,}'는 \\b 때문에 단어 시작에서만 시도되어 이미 선형 시간이므로 그대로 둡니다.
+"""
+import re
+import heapq
+
+_SEPARATOR_RE = re.compile(r'[\.\-\=_]{3,}')
+_REPEATED_WORD_RE = re.compile(r'(\b\w+\b)( \1){2,}')
+_REPEATED_UNIT_RE = re.compile(r'(\w{2,})(\1){2,}')
+_SPACES_RE = re.compile(r' {2,}')  # r' +'와 결과는 같고, 공백 한 칸짜리는 건드리지 않아 일반 문장에서 빠름
+_NEWLINES_RE = re.compile(r'\n+')
+
+# 이 길이 이상인 단어만 _collapse_run으로 처리 (앞 글자가 \w가 아닌 곳에서만 시도하므로 찾는 비용도 선형)
+LONG_RUN = 64
+_LONG_RUN_RE = re.compile(r'(?<!\w)\w{%d,}' % LONG_RUN)
+
+
+def _common_prefix(s, a, b, limit):
+    """s[a:]와 s[b:]가 앞에서부터 몇 글자 같은지 (limit 이하). 2배씩 늘려 본 뒤 이분 탐색"""
+    if limit <= 0 or s[a] != s[b]:
+        return 0
+    low, step = 1, 1
+    while low < limit:
+        high = min(low + step, limit)
+        if s[a + low:a + high] != s[b + low:b + high]:
+            limit = high - 1
+            break
+        low = high
+        step *= 2
+    while low < limit:
+        mid = (low + limit + 1) // 2
+        if s[a + low:a + mid] == s[b + low:b + mid]:
+            low = mid
+        else:
+            limit = mid - 1
+    return low
+
+
+def _common_suffix(s, a, b, limit):
+    """s[:a]와 s[:b]가 뒤에서부터 몇 글자 같은지 (limit 이하)"""
+    if limit <= 0 or s[a - 1] != s[b - 1]:
+        return 0
+    low, step = 1, 1
+    while low < limit:
+        high = min(low + step, limit)
+        if s[a - high:a - low] != s[b - high:b - low]:
+            limit = high - 1
+            break
+        low = high
+        step *= 2
+    while low < limit:
+        mid = (low + limit + 1) // 2
+        if s[a - mid:a - low] == s[b - mid:b - low]:
+            low = mid
+        else:
+            limit = mid - 1
+    return low
+
+
+def _cube_blocks(s):
+    """
+    주기 L마다 s[j] == s[j + L]이 성립하는 최대 구간 [a, b) 중 길이가 2L 이상인 것(= 세 번 이상 반복이 가능한 구간)을 모두 찾음.
+    위치 i에서 길이 L 단위가 두 번 이상 더 반복되는 것은 i가 어떤 블록 (a, L, b)의 [a, b - 2L]에 들어가는 것과 같습니다.
+    길이 2L 이상인 블록은 L의 배수 위치(체크포인트) 두 개를 포함하므로 체크포인트만 검사하면 되고(전체 Σ m/L = O(m log m)),
+    작은 주기 p의 블록 안에서 L이 p의 배수이면 블록 경계에서부터만 늘려 봅니다.
+    """
+    m = len(s)
+    blocks = []          # (a, L, b)
+    cover = [None] * m   # 위치 -> 그 위치를 덮는 가장 긴 블록 (p, a, b)
+    for period in range(1, m // 3 + 1):
+        last = m - period
+        half = period // 2
+        c = 0
+        while c < last:
+            run = cover[c]
+            if run is not None and period % run[0] == 0 and c < run[2] + run[0] - period:
+                # 주기 p로 반복되는 구간은 p의 배수 주기로도 반복되므로 알려진 경계 밖만 비교
+                p, run_start, run_end = run
+                forward = run_end + p - period
+                end = forward + _common_prefix(s, forward, forward + period, last - forward)
+                start = run_start - _common_suffix(s, run_start, run_start + period, run_start)
+            elif (c + period >= last or s[c] != s[c + period] or s[c + period] != s[c + 2 * period]
+                  or s[c + half] != s[c + period + half]):
+                # 길이 2L 이상 블록이라면 c ~ c + L 전체가 같아야 하므로 몇 글자만 보고 거름
+                c += period
+                continue
+            else:
+                end = c + _common_prefix(s, c, c + period, last - c)
+                start = c - _common_suffix(s, c, c + period, c)
+            if end - start >= 2 * period:
+                if period >= 2:
+                    blocks.append((start, period, end))
+                if cover[start] is None or cover[start][2] - cover[start][1] < end - start:
+                    cover[start:end] = [(period, start, end)] * (end - start)
+            c = (end // period + 1) * period
+    return blocks
+
+
+def _collapse_run(s):
+    """
+    공백 없이 이어진 단어 하나에 대해 _REPEATED_UNIT_RE.sub(r'\\1', s)와 같은 결과.
+    정규식처럼 앞에서부터 보면서 각 위치에서 가장 긴 반복 단위(L)를 고르고, 반복된 만큼 건너뜁니다.
+    """
+    blocks = sorted(_cube_blocks(s))
+    pieces = []
+    active = []  # (-L, b): 현재 위치를 덮을 수 있는 블록 중 L이 가장 큰 것이 맨 앞
+    next_block = 0
+    i = start = 0
+    while i < len(s):
+        while next_block < len(blocks) and blocks[next_block][0] <= i:
+            _, period, end = blocks[next_block]
+            heapq.heappush(active, (-period, end))
+            next_block += 1
+        # 현재 위치가 [a, b - 2L] 밖으로 벗어난 블록은 버림
+        while active and active[0][1] + 2 * active[0][0] < i:
+            heapq.heappop(active)
+        if active:
+            period, end = -active[0][0], active[0][1]
+            pieces.append(s[start:i + period])
+            i += period * (1 + (end - i) // period)
+            start = i
+        else:
+            i += 1
+    pieces.append(s[start:])
+    return "".join(pieces)
+
+
+def collapse_repeated_units(text):
+    """re.sub(r'(\\w{2,})(\\1){2,}', r'\\1', text)와 같은 결과 (반복은 항상 한 단어 안에서만 일어나므로 단어별로 처리)"""
+    # 긴 단어가 없는 일반 페이지는 기존 정규식 한 번으로 끝냄
+    # (\w에는 공백이 없으므로 공백으로 나눈 토큰이 모두 짧으면 긴 단어도 없음, str.split이 정규식 검색보다 빠름)
+    if max(map(len, text.split()), default=0) < LONG_RUN:
+        return _REPEATED_UNIT_RE.sub(r'\1', text)
+    pieces = []
+    pos = 0
+    for match in _LONG_RUN_RE.finditer(text):
+        pieces.append(_REPEATED_UNIT_RE.sub(r'\1', text[pos:match.start()]))
+        pieces.append(_collapse_run(match.group()))
+        pos = match.end()
+    pieces.append(_REPEATED_UNIT_RE.sub(r'\1', text[pos:]))
+    return "".join(pieces)
+
+
+def clean_text(text):
+    if not text: return ""
+    text = text.replace('\r\n', '\n').replace('\t', ' ')
+    text = _SEPARATOR_RE.sub('', text)
+    text = _REPEATED_WORD_RE.sub(r'\1', text)
+    text = collapse_repeated_units(text)
+    text = _SPACES_RE.sub(' ', text)
+    text = _NEWLINES_RE.sub('\n\n', text)
+    return text.strip()
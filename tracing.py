@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# 파이프라인 공용 로거 (BIDDING_LOG_LEVEL=WARNING 등으로 진행 로그를 끌 수 있음)
+logger = logging.getLogger("bidding_mate")
+
+DEFAULT_TRACE_PATH = os.getenv("BIDDING_TRACE_PATH", "./logs/traces.jsonl")
+
+# 지연시간(초) / 개수 히스토그램 구간
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 50, 100)
+CHARS_BUCKETS = (1000, 5000, 10000, 20000, 50000, 100000)
+
+_current_trace = contextvars.ContextVar("bidding_trace", default=None)
+
+
+def setup_logging(level=None):
+    """bidding_mate 로거에 콘솔 핸들러를 한 번만 붙임 (기존 print 출력과 같은 형태)"""
+    level = level or os.getenv("BIDDING_LOG_LEVEL", "INFO")
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def annotate(key, value):
+    """현재 요청의 trace에 값 기록 (트레이싱 중이 아니면 무시)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.set(key, value)
+
+
+class RequestTrace:
+    """요청 1건의 기록: 노드별 소요 시간, 토큰 수, 검색 문서 수, 컨텍스트 길이"""
+
+    def __init__(self, question):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.question = question
+        self.started = time.time()
+        self.spans = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+        self.attrs = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, node, seconds):
+        with self._lock:
+            self.spans.append({"node": node, "ms": round(seconds * 1000, 2)})
+
+    def add_usage(self, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.llm_calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    def to_dict(self, total_seconds):
+        return {
+            "request_id": self.request_id,
+            "timestamp": self.started,
+            "question": self.question,
+            "total_ms": round(total_seconds * 1000, 2),
+            "spans": self.spans,
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            **self.attrs,
+        }
+
+
+class Metrics:
+    """Prometheus 텍스트 형식으로 내보낼 수 있는 간단한 카운터/히스토그램 모음"""
+
+    def __init__(self):
+        self._counters = defaultdict(float)   # (이름, 라벨) -> 값
+        self._histograms = {}                 # (이름, 라벨) -> [구간별 개수, 합계, 개수]
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._buckets.setdefault(name, buckets)
+            counts, total, count = self._histograms.get(key, ([0] * len(buckets), 0.0, 0))
+            for i, bound in enumerate(self._buckets[name]):
+                if value <= bound:
+                    counts[i] += 1
+            self._histograms[key] = (counts, total + value, count + 1)
+
+    @staticmethod
+    def _labels(labels, extra=None):
+        items = list(labels) + (extra or [])
+        if not items:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{self._labels(labels)} {value:g}")
+            for (name, labels), (counts, total, count) in sorted(self._histograms.items()):
+                for bound, bucket_count in zip(self._buckets[name], counts):
+                    lines.append(f"{name}_bucket{self._labels(labels, [('le', f'{bound:g}')])} {bucket_count}")
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{self._labels(labels)} {total:g}")
+                lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """LLM 호출이 끝날 때마다 토큰 사용량을 현재 요청의 trace와 메트릭에 기록"""
+
+    # 비동기 실행에서도 요청 컨텍스트(trace) 안에서 바로 호출되도록
+    run_inline = True
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def on_llm_end(self, response, **kwargs):
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        if not (prompt_tokens or completion_tokens):
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = token_usage.get("prompt_tokens", 0)
+            completion_tokens = token_usage.get("completion_tokens", 0)
+
+        trace = current_trace()
+        if trace is not None:
+            trace.add_usage(prompt_tokens, completion_tokens)
+        self.metrics.inc("bidding_llm_calls_total")
+        self.metrics.inc("bidding_llm_tokens_total", prompt_tokens, type="prompt")
+        self.metrics.inc("bidding_llm_tokens_total", completion_tokens, type="completion")
+
+
+class Tracer:
+    """
+    요청 단위 트레이싱.
+    - request(): 요청 1건을 감싸 전체 시간과 결과를 기록하고 trace_path(JSONL)에 한 줄씩 추가
+    - span(): 노드 1개의 소요 시간을 기록
+    - metrics: Prometheus 형식 카운터/히스토그램 (render()로 출력)
+    """
+
+    def __init__(self, trace_path=DEFAULT_TRACE_PATH):
+        self.trace_path = trace_path
+        self.metrics = Metrics()
+        self.callback = TokenUsageHandler(self.metrics)
+        self._write_lock = threading.Lock()
+        if trace_path:
+            os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+
+    @contextmanager
+    def request(self, question):
+        trace = RequestTrace(question)
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+        try:
+            yield trace
+        except BaseException as e:
+            trace.set("error", type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            try:
+                _current_trace.reset(token)
+            except ValueError:
+                # 제너레이터가 다른 컨텍스트에서 닫힌 경우
+                _current_trace.set(None)
+            self._finish(trace, elapsed)
+
+    @contextmanager
+    def span(self, node):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            trace = current_trace()
+            if trace is not None:
+                trace.add_span(node, elapsed)
+            self.metrics.observe("bidding_node_seconds", elapsed, node=node)
+
+    def _finish(self, trace, elapsed):
+        outcome = trace.attrs.get("outcome", "error" if "error" in trace.attrs else "unknown")
+        self.metrics.inc("bidding_requests_total", outcome=outcome)
+        self.metrics.observe("bidding_request_seconds", elapsed)
+        if "retrieved_docs" in trace.attrs:
+            self.metrics.observe("bidding_retrieved_docs", trace.attrs["retrieved_docs"], buckets=COUNT_BUCKETS)
+        if "context_chars" in trace.attrs:
+            self.metrics.observe("bidding_context_chars", trace.attrs["context_chars"], buckets=CHARS_BUCKETS)
+
+        if self.trace_path:
+            line = json.dumps(trace.to_dict(elapsed), ensure_ascii=False)
+            with self._write_lock:
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
@@ -0,0 +1,313 @@
+import os
+import json
+import shutil
+import asyncio
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+VECTOR_INDEX_DIR = "vector_index"
+
+# where 필터를 걸 수 있는 청크 메타데이터 (rag_core의 메타데이터 필터와 같은 키)
+FILTER_FIELDS = ("notice_no", "project_name", "agency")
+
+# 양자화 저장 형식: None(float32 그대로), "float16", "int8"(벡터별 스케일)
+QUANTIZATIONS = (None, "float16", "int8")
+SCAN_BLOCK_ROWS = 16384  # 양자화 행렬을 float32로 풀어 계산할 때 한 번에 처리할 행 수 (임시 메모리 제한)
+
+
+def quantize_int8(vectors):
+    """벡터별 스케일(최대 절댓값 / 127)로 int8 양자화. (코드, 스케일) 반환"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class MmapVectorIndex:
+    """
+    정규화된 float32 임베딩 행렬을 .npy 파일로 두고 np.load(mmap_mode="r")로 매핑해서 쓰는 벡터 인덱스.
+    - vectors.npy: (청크 수 x 차원) 행렬. 시작할 때 읽지 않고 검색 시 필요한 페이지만 OS가 올림
+    - chunks.bin: 청크별 {"content", "metadata"} JSON을 이어 붙인 파일 (offsets로 잘라 읽음)
+    - meta.npz: 청크 ID, offsets, 필터용 메타데이터 코드 배열
+    - vectors_f16.npy / vectors_i8.npy + scales_i8.npy: 양자화 사본
+
+    quantization을 주면 전체 후보 검색은 작은 양자화 행렬로 하고, 상위 rescore_k개만 float32 행렬로
+    정확한 점수를 다시 계산합니다. float32 파일은 그 행들만 읽히므로 상주 메모리는 양자화 행렬 크기가 됩니다.
+    """
+
+    def __init__(self, path, quantization=None, rescore_k=50):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"지원하지 않는 양자화 형식입니다: {quantization} (가능: {QUANTIZATIONS})")
+        self.path = path
+        self.quantization = quantization
+        self.rescore_k = rescore_k
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.scales = None
+        if quantization == "float16":
+            self.scan_vectors = np.load(os.path.join(path, "vectors_f16.npy"), mmap_mode="r")
+        elif quantization == "int8":
+            self.scan_vectors = np.load(os.path.join(path, "vectors_i8.npy"), mmap_mode="r")
+            self.scales = np.load(os.path.join(path, "scales_i8.npy"))
+        else:
+            self.scan_vectors = self.vectors
+        self._chunks = np.memmap(os.path.join(path, "chunks.bin"), dtype=np.uint8, mode="r") \
+            if os.path.getsize(os.path.join(path, "chunks.bin")) else np.zeros(0, dtype=np.uint8)
+        with np.load(os.path.join(path, "meta.npz"), allow_pickle=False) as meta:
+            self.ids = meta["ids"].tolist()
+            self.offsets = meta["offsets"]
+            self.codes = {field: meta[f"code_{field}"] for field in FILTER_FIELDS}
+            self.values = json.loads(str(meta["values"]))  # 필드 -> 값 리스트 (코드 = 리스트 위치)
+        self._value_codes = {
+            field: {value: code for code, value in enumerate(values)} for field, values in self.values.items()
+        }
+
+    @classmethod
+    def from_db(cls, db_path, quantization=None, rescore_k=50):
+        """db_path 안에 벡터 인덱스가 있으면 매핑해서 반환, 없으면 None"""
+        path = os.path.join(db_path, VECTOR_INDEX_DIR)
+        if not os.path.exists(os.path.join(path, "meta.npz")):
+            return None
+        return cls(path, quantization, rescore_k)
+
+    def memory_bytes(self):
+        """검색 때 전체를 훑는(상주해야 하는) 행렬 크기"""
+        size = self.scan_vectors.nbytes
+        if self.scales is not None:
+            size += self.scales.nbytes
+        return size
+
+    def __len__(self):
+        return len(self.ids)
+
+    def document(self, row):
+        start, end = self.offsets[row], self.offsets[row + 1]
+        record = json.loads(self._chunks[start:end].tobytes().decode("utf-8"))
+        return Document(page_content=record["content"], metadata=record["metadata"], id=self.ids[row])
+
+    def _mask(self, where):
+        """Chroma 형식 where 필터({"필드": 값} 또는 {"필드": {"$in": [...]}})를 행 마스크로 변환"""
+        if not where:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, condition in where.items():
+            if field not in self.codes:
+                raise ValueError(f"필터를 지원하지 않는 메타데이터 필드입니다: {field}")
+            values = condition["$in"] if isinstance(condition, dict) else [condition]
+            codes = [self._value_codes[field][value] for value in values if value in self._value_codes[field]]
+            mask &= np.isin(self.codes[field], codes)
+        return mask
+
+    def top_k(self, query_vectors, k, where=None):
+        """
+        여러 질문 벡터를 한 번의 행렬곱으로 검색.
+        (행 번호, 코사인 유사도) 배열을 각각 (질문 수 x k) 모양으로 반환 (후보가 k개보다 적으면 k가 줄어듦)
+        """
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        mask = self._mask(where)
+        rows = np.flatnonzero(mask) if mask is not None else None
+        num_rows = len(self.ids) if rows is None else len(rows)
+        if num_rows == 0:
+            return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+
+        if self.quantization is None:
+            return _select_top(queries @ self._matrix(self.vectors, rows).T, k, rows)
+
+        # 1) 양자화 행렬로 후보 rescore_k개 검색  2) 후보만 float32로 정확히 재채점
+        candidates, _ = _select_top(self.approximate_scores(queries, rows), max(k, self.rescore_k), rows)
+        exact = np.einsum("qd,qcd->qc", queries, np.asarray(self.vectors[candidates.ravel()]).reshape(
+            candidates.shape + (self.vectors.shape[1],)
+        ))
+        top, top_scores = _select_top(exact, k)
+        return np.take_along_axis(candidates, top, axis=1), top_scores
+
+    @staticmethod
+    def _matrix(matrix, rows):
+        return matrix if rows is None else matrix[rows]
+
+    def approximate_scores(self, queries, rows=None):
+        """양자화 행렬로 계산한 (질문 수 x 행 수) 근사 코사인 유사도. 블록 단위로 float32로 풀어 행렬곱"""
+        matrix = self._matrix(self.scan_vectors, rows)
+        scales = self._matrix(self.scales, rows) if self.scales is not None else None
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + SCAN_BLOCK_ROWS], dtype=np.float32)
+            block_scores = queries @ block.T
+            if scales is not None:
+                block_scores *= scales[start:start + SCAN_BLOCK_ROWS]
+            scores[:, start:start + len(block)] = block_scores
+        return scores
+
+    def mmr(self, query_vector, k=20, fetch_k=50, lambda_mult=0.5, where=None):
+        """상위 fetch_k개 후보에서 MMR로 k개를 고름 (후보 간 유사도는 행렬곱 한 번으로 계산)"""
+        top, top_scores = self.top_k(query_vector, fetch_k, where)
+        candidates, relevance = top[0], top_scores[0]
+        if len(candidates) == 0:
+            return []
+
+        vectors = np.asarray(self.vectors[candidates])
+        similarity = vectors @ vectors.T
+
+        selected = []
+        # 이미 고른 문서들과의 최대 유사도: -inf에서 시작해야 유사도가 음수인 후보도 실제 최댓값으로 벌점을 받음
+        redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+        available = np.ones(len(candidates), dtype=bool)
+        for _ in range(min(k, len(candidates))):
+            if selected:
+                score = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+                best = int(np.argmax(score))
+            else:
+                best = 0  # 첫 문서는 질문과 가장 가까운 후보 (langchain maximal_marginal_relevance와 같음)
+            selected.append(best)
+            available[best] = False
+            redundancy = np.maximum(redundancy, similarity[:, best])
+        return candidates[selected].tolist()
+
+
+def _select_top(scores, k, rows=None):
+    """(질문 수 x 후보 수) 점수 행렬에서 질문별 상위 k개의 (위치, 점수)를 점수 내림차순으로 반환"""
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    if rows is not None:
+        top = rows[top]
+    return top, top_scores
+
+
+def build_vector_index(collection, db_path, batch_size=5000):
+    """Chroma 컬렉션의 임베딩/본문/메타데이터를 MmapVectorIndex 파일로 내보냄 (임베딩 호출 없음)"""
+    path = os.path.join(db_path, VECTOR_INDEX_DIR)
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    total = collection.count()
+    ids, offsets = [], [0]
+    values = {field: {} for field in FILTER_FIELDS}
+    codes = {field: np.zeros(total, dtype=np.int32) for field in FILTER_FIELDS}
+    vectors = None
+    with open(os.path.join(tmp_path, "chunks.bin"), "wb") as chunks_file:
+        for start in range(0, total, batch_size):
+            batch = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=start)
+            embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    os.path.join(tmp_path, "vectors.npy"), mode="w+", dtype=np.float32,
+                    shape=(total, embeddings.shape[1]),
+                )
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+            vectors[start:start + len(embeddings)] = embeddings
+
+            for i, (chunk_id, text, metadata) in enumerate(zip(batch["ids"], batch["documents"], batch["metadatas"])):
+                metadata = metadata or {}
+                data = json.dumps({"content": text, "metadata": metadata}, ensure_ascii=False).encode("utf-8")
+                chunks_file.write(data)
+                ids.append(chunk_id)
+                offsets.append(offsets[-1] + len(data))
+                for field in FILTER_FIELDS:
+                    value = str(metadata.get(field, ""))
+                    codes[field][start + i] = values[field].setdefault(value, len(values[field]))
+
+    if vectors is None:
+        vectors = np.zeros((0, 0), dtype=np.float32)
+        np.save(os.path.join(tmp_path, "vectors.npy"), vectors)
+    else:
+        vectors.flush()
+
+    # 양자화 사본 (float16 / int8 + 벡터별 스케일)
+    vectors_f16 = np.lib.format.open_memmap(
+        os.path.join(tmp_path, "vectors_f16.npy"), mode="w+", dtype=np.float16, shape=vectors.shape
+    )
+    vectors_i8 = np.lib.format.open_memmap(
+        os.path.join(tmp_path, "vectors_i8.npy"), mode="w+", dtype=np.int8, shape=vectors.shape
+    )
+    scales_i8 = np.ones(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), batch_size):
+        block = np.asarray(vectors[start:start + batch_size])
+        vectors_f16[start:start + len(block)] = block.astype(np.float16)
+        vectors_i8[start:start + len(block)], scales_i8[start:start + len(block)] = quantize_int8(block)
+    np.save(os.path.join(tmp_path, "scales_i8.npy"), scales_i8)
+    vectors_f16.flush()
+    vectors_i8.flush()
+    del vectors, vectors_f16, vectors_i8
+
+    np.savez(
+        os.path.join(tmp_path, "meta.npz"),
+        ids=np.array(ids, dtype=str),
+        offsets=np.array(offsets, dtype=np.int64),
+        values=np.array(json.dumps({field: list(mapping) for field, mapping in values.items()}, ensure_ascii=False)),
+        **{f"code_{field}": codes[field] for field in FILTER_FIELDS},
+    )
+
+    # 검색 중인 프로세스가 반쯤 쓴 파일을 보지 않도록 다 만든 뒤 교체
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return total
+
+
+def quantization_report(db_path, query_vectors, k=20, rescore_k=50):
+    """
+    형식별 상주 메모리와 float32 정확 검색 대비 recall@k를 계산.
+    approx_recall은 양자화 점수만으로 고른 결과, recall은 rescore_k개 재채점 후 결과.
+    """
+    exact_index = MmapVectorIndex.from_db(db_path)
+    if exact_index is None or len(exact_index) == 0:
+        return {}
+    queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    exact_top, _ = exact_index.top_k(queries, k)
+    k = exact_top.shape[1]
+
+    def recall(top):
+        return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(top.tolist(), exact_top.tolist())]))
+
+    report = {}
+    for quantization in QUANTIZATIONS:
+        index = MmapVectorIndex.from_db(db_path, quantization, rescore_k)
+        approx_top, _ = _select_top(index.approximate_scores(queries), k)
+        report[quantization or "float32"] = {
+            "memory_mb": round(index.memory_bytes() / 2**20, 2),
+            f"approx_recall@{k}": round(recall(approx_top), 4),
+            f"recall@{k}": round(recall(index.top_k(queries, k)[0]), 4),
+        }
+    return report
+
+
+class MmapRetriever(BaseRetriever):
+    """
+    MmapVectorIndex를 쓰는 retriever. Chroma의 as_retriever()와 같은 search_type / search_kwargs를 받아
+    BiddingAgent.retriever 자리에 그대로 끼워 쓸 수 있음 (invoke(question, filter=where)도 동일).
+    """
+
+    index: Any
+    embeddings: Embeddings
+    search_type: str = "mmr"
+    search_kwargs: Dict[str, Any] = {}
+
+    def _search(self, query_vector, **kwargs):
+        options = {**self.search_kwargs, **kwargs}
+        k = options.get("k", 4)
+        where = options.get("filter")
+        if self.search_type == "mmr":
+            rows = self.index.mmr(
+                query_vector, k=k, fetch_k=options.get("fetch_k", 20),
+                lambda_mult=options.get("lambda_mult", 0.5), where=where,
+            )
+        else:
+            rows = self.index.top_k(query_vector, k, where)[0][0].tolist()
+        return [self.index.document(row) for row in rows]
+
+    def _get_relevant_documents(self, query, *, run_manager, **kwargs) -> List[Document]:
+        return self._search(self.embeddings.embed_query(query), **kwargs)
+
+    async def _aget_relevant_documents(self, query, *, run_manager, **kwargs) -> List[Document]:
+        query_vector = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._search, query_vector, **kwargs)